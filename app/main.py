@@ -1,9 +1,17 @@
-from fastapi import FastAPI, HTTPException, Query, Depends, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Query, Depends, UploadFile, File, Form, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import Optional, Dict, List
+from fastapi.responses import JSONResponse, Response
+from typing import Optional, Dict, List, Tuple
 from app.services.document_service import DocumentService
 from app.services.classification_service import ClassificationService
+from app.services.folder_watcher import FolderWatcher
+from backend.metrics import render_metrics, track_queue
+from backend.log_config import configure_logging
+from backend.shared_store import get_shared_store, worker_id
+from backend.file_scanner import folder_fingerprint
+from backend.responses import (
+    CompressionMiddleware, FastJSONResponse, is_not_modified, make_etag, not_modified, validator_headers
+)
 from app.models.document import Document, DocumentType, DocumentStatus, FolderAnalysis
 import asyncio
 from pathlib import Path
@@ -13,14 +21,16 @@ import os
 import logging
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging (JSON lines written by a background thread; see backend/log_config.py)
+log_handler = configure_logging()
+track_queue("log_records", log_handler.queue.qsize)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Document Management and Analysis API",
     description="API for managing and analyzing documents within folders",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS
@@ -31,6 +41,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# brotli or gzip, as negotiated with the client (see backend/responses.py)
+app.add_middleware(CompressionMiddleware)
 
 # Dependency injection for services
 @lru_cache()
@@ -41,6 +53,96 @@ def get_document_service():
 def get_classification_service():
     return ClassificationService()
 
+@lru_cache()
+def get_folder_watcher():
+    return FolderWatcher(get_document_service())
+
+async def warm_up_services() -> Dict[str, float]:
+    """Load models, parsers and worker pools now; returns the seconds each service took."""
+    timings = {}
+    started = time.perf_counter()
+    await get_document_service().warm_up()
+    timings["document_service"] = time.perf_counter() - started
+    started = time.perf_counter()
+    await asyncio.get_running_loop().run_in_executor(None, get_classification_service().warm_up)
+    timings["classification_service"] = time.perf_counter() - started
+    return timings
+
+@app.on_event("startup")
+async def warm_up_on_startup():
+    # Models are loaded on first use unless WARM_UP is set (recommended in production)
+    if os.getenv("WARM_UP", "false").strip().lower() in ("1", "true", "yes", "on"):
+        logger.info("Warmed up services: %s", await warm_up_services())
+
+@app.post("/api/warm-up")
+async def warm_up():
+    """Load models and parsers ahead of the first analysis request."""
+    try:
+        return {"status": "ready", "seconds": await warm_up_services()}
+    except Exception as e:
+        logger.error("Warm-up failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+# With several workers only the holder of this lease runs the folder watchers
+WATCHER_LEASE = "folder-watchers"
+WATCH_LEASE_SECONDS = float(os.getenv("WATCH_LEASE_SECONDS", "15"))
+# The watcher leader deletes expired shared-store entries this often (seconds)
+SHARED_STORE_PURGE_INTERVAL = float(os.getenv("SHARED_STORE_PURGE_INTERVAL", "300"))
+watcher_leader_task: Optional[asyncio.Task] = None
+
+async def lead_watchers():
+    """Run the folder watchers in exactly one worker.
+
+    Every worker competes for the watcher lease. The holder watches the folders
+    listed in the shared store ("watched_folders", filled from WATCH_FOLDERS and
+    /api/watch), publishes their counters there and purges the store's expired
+    entries every SHARED_STORE_PURGE_INTERVAL seconds; a worker that loses the
+    lease stops its watchers, and when the holder dies another worker takes over.
+    """
+    store = get_shared_store()
+    watcher = get_folder_watcher()
+    purged_at = time.monotonic()
+    while True:
+        try:
+            if store.acquire(WATCHER_LEASE, WATCH_LEASE_SECONDS):
+                if time.monotonic() - purged_at >= SHARED_STORE_PURGE_INTERVAL:
+                    purged_at = time.monotonic()
+                    logger.info("Purged %d expired shared-store entries", store.purge_expired())
+                wanted = {folder_path for folder_path, _ in store.items("watched_folders")}
+                for folder_path in watcher.watched() - wanted:
+                    await watcher.unwatch(folder_path)
+                    store.delete("watch_status", folder_path)
+                for folder_path in wanted - watcher.watched():
+                    watcher.watch(folder_path)
+                for status in watcher.status():
+                    store.put("watch_status", status["folder_path"], status, ttl=WATCH_LEASE_SECONDS * 2)
+            elif watcher.watched():
+                logger.info("Lost the watcher lease, stopping watchers")
+                await watcher.stop()
+        except Exception as e:
+            logger.error("Error coordinating folder watchers: %s", e)
+        await asyncio.sleep(WATCH_LEASE_SECONDS / 3)
+
+@app.on_event("startup")
+async def start_watchers():
+    global watcher_leader_task
+    # Folders listed in WATCH_FOLDERS (comma-separated) are watched from startup
+    store = get_shared_store()
+    for folder_path in filter(None, os.getenv("WATCH_FOLDERS", "").split(",")):
+        if os.path.isdir(folder_path):
+            store.put("watched_folders", folder_path, {"added_at": time.time()})
+        else:
+            logger.error(f"Cannot watch missing folder: {folder_path}")
+    watcher_leader_task = asyncio.create_task(lead_watchers())
+
+@app.on_event("shutdown")
+async def stop_watchers():
+    """Stop watching, let running ingestions finish and hand the watcher lease to another worker."""
+    if watcher_leader_task is not None:
+        watcher_leader_task.cancel()
+    await get_folder_watcher().stop()
+    get_shared_store().release(WATCHER_LEASE)
+
 @app.get("/")
 async def root():
     return {
@@ -50,32 +152,66 @@ async def root():
         "redoc_url": "/redoc"
     }
 
+# Part of every ETag with the analysis model version; bump it to make clients refetch unchanged folders
+CACHE_VERSION = os.getenv("CACHE_VERSION", "1")
+
+async def folder_validators(folder_path: str, representation: str) -> Tuple[str, float]:
+    """ETag and Last-Modified time of a response about a folder, from a stat-only scan of the folder."""
+    fingerprint = await asyncio.get_running_loop().run_in_executor(None, folder_fingerprint, folder_path)
+    etag = make_etag(
+        representation, os.path.abspath(folder_path), *fingerprint,
+        CACHE_VERSION, get_classification_service().model_version
+    )
+    return etag, fingerprint.modified_at
+
 @app.get("/api/folder-insights")
-async def get_folder_insights(folder_path: str):
-    """Get insights about a folder."""
+async def get_folder_insights(
+    folder_path: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None)
+):
+    """Get insights about a folder; an unchanged folder is answered with 304 to conditional requests."""
     try:
         logger.info(f"Getting insights for folder: {folder_path}")
         if not os.path.exists(folder_path):
             logger.error(f"Folder path does not exist: {folder_path}")
             raise HTTPException(status_code=404, detail="Folder path does not exist")
-        
+
+        etag, last_modified = await folder_validators(folder_path, "folder-insights")
+        headers = validator_headers(etag, last_modified)
+        if is_not_modified(etag, last_modified, if_none_match, if_modified_since):
+            return not_modified(headers)
+
         analysis, _ = await get_document_service().analyze_folder(folder_path)
-        return analysis
+        return FastJSONResponse(analysis, headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting folder insights: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/documents")
-async def get_documents(folder_path: str):
-    """Get a list of documents in a folder."""
+async def get_documents(
+    folder_path: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None)
+):
+    """Get a list of documents in a folder; an unchanged folder is answered with 304 to conditional requests."""
     try:
         logger.info(f"Getting documents for folder: {folder_path}")
         if not os.path.exists(folder_path):
             logger.error(f"Folder path does not exist: {folder_path}")
             raise HTTPException(status_code=404, detail="Folder path does not exist")
-        
+
+        etag, last_modified = await folder_validators(folder_path, "documents")
+        headers = validator_headers(etag, last_modified)
+        if is_not_modified(etag, last_modified, if_none_match, if_modified_since):
+            return not_modified(headers)
+
         analysis, _ = await get_document_service().analyze_folder(folder_path)
-        return {"documents": analysis.documents}
+        return FastJSONResponse({"documents": analysis.documents}, headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting documents: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -90,7 +226,9 @@ async def get_document(
         document = await document_service.get_document(document_id)
         if not document:
             raise HTTPException(status_code=404, detail="Document not found")
-        return document.dict()
+        return FastJSONResponse(document)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -105,6 +243,8 @@ async def delete_document(
         if not success:
             raise HTTPException(status_code=404, detail="Document not found")
         return {"message": "Document deleted successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -121,6 +261,12 @@ async def health_check():
         "timestamp": time.time()
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.post("/api/analyze-folder")
 async def analyze_folder(folder_path: str):
     """Analyze a folder and return insights."""
@@ -132,11 +278,49 @@ async def analyze_folder(folder_path: str):
         
         analysis, total_documents = await get_document_service().analyze_folder(folder_path)
         logger.info(f"Analysis completed. Total documents: {total_documents}")
-        return analysis
+        return FastJSONResponse(analysis)
     except Exception as e:
         logger.error(f"Error analyzing folder: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/watch")
+async def watch_folder(folder_path: str):
+    """Keep a folder's documents in sync as its files change.
+
+    The folder is recorded in the shared store and watched by the worker that
+    holds the watcher lease, within a few seconds if that is another worker.
+    """
+    if not os.path.isdir(folder_path):
+        raise HTTPException(status_code=404, detail="Folder path does not exist")
+    store = get_shared_store()
+    store.put("watched_folders", folder_path, {"added_at": time.time()})
+    if store.lease_owner(WATCHER_LEASE) == worker_id():
+        return get_folder_watcher().watch(folder_path)
+    return {"folder_path": folder_path, "scheduled": True}
+
+@app.delete("/api/watch")
+async def unwatch_folder(folder_path: str):
+    """Stop watching a folder."""
+    store = get_shared_store()
+    if not store.delete("watched_folders", folder_path):
+        raise HTTPException(status_code=404, detail="Folder is not watched")
+    store.delete("watch_status", folder_path)
+    await get_folder_watcher().unwatch(folder_path)
+    return {"message": "Stopped watching folder"}
+
+@app.get("/api/watch")
+async def list_watched_folders():
+    """List watched folders with the sync counters published by the watching worker."""
+    store = get_shared_store()
+    statuses = dict(store.items("watch_status"))
+    return {
+        "watcher": store.lease_owner(WATCHER_LEASE),
+        "folders": [
+            statuses.get(folder_path, {"folder_path": folder_path, "scheduled": True})
+            for folder_path, _ in store.items("watched_folders")
+        ]
+    }
+
 @app.post("/api/upload-folder")
 async def upload_folder(
     files: List[UploadFile] = File(...),
@@ -14,6 +14,7 @@ class DBDocument(Base):
     created_at = Column(DateTime, nullable=False)
     modified_at = Column(DateTime, nullable=False)
     path = Column(String, nullable=False)
+    content_hash = Column(String, nullable=True)
     content = Column(String, nullable=True)
     sentiment_polarity = Column(Float, nullable=True)
     sentiment_subjectivity = Column(Float, nullable=True)
@@ -33,6 +34,7 @@ class DBDocument(Base):
         Index('ix_document_file_type', 'file_type'),
         Index('ix_document_status', 'status'),
         Index('ix_document_modified_at', 'modified_at'),
+        Index('ix_document_content_hash', 'content_hash'),
     )
 
 class DBFolder(Base):
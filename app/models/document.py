@@ -1,7 +1,9 @@
 from enum import Enum
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, Dict, List
+from typing import Any, Optional, Dict, List
 from pydantic import BaseModel, Field
+import sys
 import uuid
 
 class DocumentType(str, Enum):
@@ -36,6 +38,7 @@ class Document(BaseModel):
     created_at: datetime
     modified_at: datetime
     path: str
+    content_hash: Optional[str] = None
     content: Optional[str] = None
     sentiment: Optional[SentimentAnalysis] = None
     metadata: Dict = Field(default_factory=dict)
@@ -55,4 +58,78 @@ class FolderAnalysis(BaseModel):
     document_types: Dict[str, int]
     average_file_size: float
     last_modified: datetime
-    documents: List[Document] 
\ No newline at end of file
+    documents: List[Document] 
+
+@dataclass(slots=True)
+class DocumentRecord:
+    """Lightweight internal form of a document, used while ingesting and analyzing folders.
+
+    A slotted dataclass without validation: file type and status are the shared
+    enum members, repeated strings (MIME type, sentiment label) are interned,
+    times are POSIX timestamps as in ScanEntry and sentiment is three plain
+    fields. ``metadata`` only holds what is specific to the document; the
+    API models are built with ``to_model()`` at the API boundary.
+    """
+    id: str
+    filename: str
+    file_type: DocumentType
+    size: int
+    created_at: float
+    modified_at: float
+    path: str
+    content_hash: Optional[str] = None
+    content: Optional[str] = None
+    mime_type: Optional[str] = None
+    sentiment_polarity: Optional[float] = None
+    sentiment_subjectivity: Optional[float] = None
+    sentiment_label: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+    # Analysis shared by every document with the same content (see ClassificationService.analyze_folder)
+    analysis: Optional[Dict[str, Any]] = None
+    status: DocumentStatus = DocumentStatus.COMPLETED
+
+    def __post_init__(self):
+        if self.mime_type is not None:
+            self.mime_type = sys.intern(self.mime_type)
+        if self.sentiment_label is not None:
+            self.sentiment_label = sys.intern(self.sentiment_label)
+
+    @property
+    def sentiment(self) -> Optional[SentimentAnalysis]:
+        if self.sentiment_polarity is None:
+            return None
+        return SentimentAnalysis(
+            polarity=self.sentiment_polarity,
+            subjectivity=self.sentiment_subjectivity,
+            sentiment=self.sentiment_label
+        )
+
+    def metadata_dict(self) -> Dict[str, Any]:
+        """The metadata stored with the document and returned by the API."""
+        metadata = {"mime_type": self.mime_type, "processed": True} if self.mime_type is not None else {}
+        if self.analysis is not None:
+            metadata.update({
+                "classification_method": self.analysis["method"],
+                "confidence": self.analysis["classification"]["confidence"],
+                "sentiment_score": self.analysis["sentiment_score"],
+                "subjectivity": self.analysis["subjectivity"]
+            })
+        if self.metadata:
+            metadata.update(self.metadata)
+        return metadata
+
+    def to_model(self) -> Document:
+        return Document(
+            id=self.id,
+            filename=self.filename,
+            file_type=self.file_type,
+            size=self.size,
+            created_at=datetime.fromtimestamp(self.created_at),
+            modified_at=datetime.fromtimestamp(self.modified_at),
+            path=self.path,
+            content_hash=self.content_hash,
+            content=self.content,
+            sentiment=self.sentiment,
+            metadata=self.metadata_dict(),
+            status=self.status
+        )
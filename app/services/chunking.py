@@ -0,0 +1,22 @@
+from typing import Dict, Sequence
+
+from app.services.sentiment_engine import label_for
+# Windows are cut by the backend's splitter, so both services share one chunk budget
+from backend.chunking import CHUNK_SIZE, MAX_CHUNKS, split_into_chunks  # noqa: F401
+
+def aggregate_sentiment(results: Sequence[Dict], weights: Sequence[float]) -> Dict:
+    """Combine per-chunk sentiment results into one, weighting each chunk by its size."""
+    total = sum(weights)
+    if not results or total <= 0:
+        return {"sentiment": "neutral", "polarity": 0, "subjectivity": 0, "confidence": 0}
+
+    polarity = sum(r["polarity"] * w for r, w in zip(results, weights)) / total
+    subjectivity = sum(r["subjectivity"] * w for r, w in zip(results, weights)) / total
+
+    return {
+        "sentiment": label_for(polarity),
+        "polarity": polarity,
+        "subjectivity": subjectivity,
+        "confidence": abs(polarity),
+        "chunks": len(results)
+    }
@@ -2,89 +2,206 @@ import os
 from typing import Dict, List, Optional
 import asyncio
 from pathlib import Path
-import spacy
-import asent
-from openai import AsyncOpenAI
-from functools import lru_cache
+from importlib import metadata
+import threading
 import time
-from app.models.document import Document, DocumentType, DocumentStatus
+from app.models.document import DocumentRecord, DocumentType
+from app.services.file_hasher import FileHasher
+from app.services.file_types import detect_file_type
+from app.services.keyword_matcher import KeywordMatcher, load_keywords
+from app.services.result_cache import AsyncResultCache, content_key
+from backend.file_scanner import scan_directory_async
+from backend.metrics import observe_stage, register_cache, stage_timer
+from backend.shared_store import get_shared_store
+import json
+import logging
 import uuid
-from datetime import datetime
+
+# spaCy batching settings (override through environment variables)
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "64"))
+SPACY_N_PROCESS = int(os.getenv("SPACY_N_PROCESS", "1"))
+# Only the first MAX_ANALYSIS_TEXT_LENGTH characters of a document are analyzed
+MAX_ANALYSIS_TEXT_LENGTH = int(os.getenv("MAX_ANALYSIS_TEXT_LENGTH", "100000"))
+
+OPENAI_MODEL = "gpt-4"
+
+logger = logging.getLogger(__name__)
+
+def _package_version(name: str) -> str:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+# Components of en_core_web_sm that sentiment analysis does not need;
+# asent only relies on tokens and sentence boundaries.
+SPACY_EXCLUDED_COMPONENTS = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"]
 
 class ClassificationService:
-    def __init__(self, use_openai: bool = False):
+    def __init__(
+        self,
+        use_openai: bool = False,
+        batch_size: int = SPACY_BATCH_SIZE,
+        n_process: int = SPACY_N_PROCESS,
+        max_text_length: int = MAX_ANALYSIS_TEXT_LENGTH,
+        keywords_file: Optional[str] = None,
+        result_cache: Optional[AsyncResultCache] = None
+    ):
         self.use_openai = use_openai
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.max_text_length = max_text_length
+        self.keyword_matcher = KeywordMatcher(load_keywords(keywords_file) if keywords_file else None)
+        # Results are shared with the other worker processes through the shared store
+        self.result_cache = result_cache if result_cache is not None else AsyncResultCache(store=get_shared_store())
+        self.file_hasher = FileHasher()
+        register_cache("analysis_results", self._cache_counts)
+        # The spaCy pipeline and the OpenAI client are created on first use (or by warm_up)
+        self._nlp = None
+        self._client = None
+        self._load_lock = threading.Lock()
         if use_openai:
-            self.client = AsyncOpenAI()
+            self.model_version = f"openai:{OPENAI_MODEL}"
         else:
-            # Load the English language model
-            self.nlp = spacy.load("en_core_web_sm")
-            # Add sentiment analysis pipeline
-            self.nlp.add_pipe("asent_en_v1")
+            # Taken from the installed package so cache keys do not require loading the model
+            self.model_version = f"spacy:core_web_sm-{_package_version('en_core_web_sm')}:asent_en_v1:{max_text_length}"
+
+    @property
+    def nlp(self):
+        """The spaCy pipeline, loaded on first access."""
+        if self._nlp is None:
+            with self._load_lock:
+                if self._nlp is None:
+                    self._nlp = self._load_nlp()
+        return self._nlp
+
+    def _load_nlp(self):
+        import spacy
+        import asent  # noqa: F401 - registers the asent_en_v1 pipe
+
+        started = time.perf_counter()
+        # Load the English language model without the unused components
+        nlp = spacy.load("en_core_web_sm", exclude=SPACY_EXCLUDED_COMPONENTS)
+        # Rule-based sentence boundaries replace the excluded parser
+        nlp.add_pipe("sentencizer")
+        # Add sentiment analysis pipeline
+        nlp.add_pipe("asent_en_v1")
+        nlp.max_length = max(nlp.max_length, self.max_text_length)
+        logger.info("Loaded spaCy pipeline in %.2fs", time.perf_counter() - started)
+        return nlp
+
+    @property
+    def client(self):
+        """The OpenAI client, created on first access."""
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI()
+        return self._client
+
+    def warm_up(self):
+        """Load the model (or client) now instead of on the first request."""
+        if self.use_openai:
+            self.client
+        else:
+            self.nlp
+
+    def _cache_counts(self):
+        stats = self.result_cache.stats()
+        return stats["hits"], stats["misses"]
 
-    @lru_cache(maxsize=1000)
     def _determine_document_type(self, content: str) -> str:
-        """Determine document type based on content with caching."""
-        content_lower = content.lower()
-        
-        # Define keywords for different document types
-        type_keywords = {
-            "Contract": ["agreement", "contract", "terms", "conditions", "signature"],
-            "Report": ["report", "summary", "conclusion", "findings", "analysis"],
-            "Email": ["dear", "regards", "sincerely", "best regards", "email"],
-            "Memo": ["memo", "memorandum", "internal", "confidential"],
-            "Proposal": ["proposal", "offer", "quote", "pricing", "estimate"],
-            "Invoice": ["invoice", "bill", "payment", "amount due", "total"],
-            "Resume": ["resume", "cv", "experience", "education", "skills"],
-            "Presentation": ["slide", "presentation", "agenda", "overview"],
-            "Manual": ["manual", "guide", "instructions", "how to", "steps"],
-            "Policy": ["policy", "procedure", "guidelines", "rules", "compliance"]
+        """Determine document type based on content keywords."""
+        return self.keyword_matcher.match(content)["type"]
+
+    def _read_text(self, document: DocumentRecord, root: str = "") -> str:
+        """Read a document's text, capped at max_text_length characters; its path is relative to ``root``."""
+        with open(os.path.join(root, document.path), 'r', encoding='utf-8') as f:
+            return f.read(self.max_text_length)
+
+    def _build_analysis(self, doc, content: str) -> Dict:
+        """Build the analysis result from a processed spaCy doc."""
+        # Compound polarity score from asent (-1 to 1)
+        sentiment = doc._.polarity.compound
+
+        # Determine document type based on content keywords
+        type_match = self.keyword_matcher.match(content)
+
+        return {
+            "classification": {
+                "type": type_match["type"],
+                "sentiment": sentiment,
+                "confidence": type_match["confidence"],
+                "type_scores": type_match["scores"]
+            },
+            "method": "spaCy",
+            "sentiment_score": sentiment,
+            "subjectivity": 0.5  # Default value
         }
-        
-        # Check for keywords and return the most likely type
-        max_matches = 0
-        best_type = "Other"
-        
-        for doc_type, keywords in type_keywords.items():
-            matches = sum(1 for keyword in keywords if keyword in content_lower)
-            if matches > max_matches:
-                max_matches = matches
-                best_type = doc_type
-        
-        return best_type
-
-    @lru_cache(maxsize=1000)
-    async def analyze_document(self, document: Document) -> Dict:
-        """Analyze a text document using spaCy and sentiment analysis."""
-        try:
-            # Read file content
-            with open(document.path, 'r', encoding='utf-8') as f:
-                content = f.read()
 
-            # Process with spaCy
-            doc = self.nlp(content)
-            
-            # Get sentiment analysis
-            sentiment = doc._.sentiment
-            
-            # Determine document type based on content
-            doc_type = self._determine_document_type(content)
-            
-            return {
-                "classification": {
-                    "type": doc_type,
-                    "sentiment": sentiment,
-                    "confidence": 0.8
-                },
-                "method": "spaCy",
-                "sentiment_score": sentiment,
-                "subjectivity": 0.5  # Default value
-            }
+    def _analyze_text(self, content: str) -> Dict:
+        """Run the spaCy pipeline over a single text."""
+        return self._build_analysis(self.nlp(content), content)
+
+    async def analyze_document(self, document: DocumentRecord) -> Dict:
+        """Analyze a text document using spaCy and sentiment analysis.
+
+        Results are cached by content hash and model version; concurrent
+        requests for the same content share a single analysis.
+        """
+        try:
+            content = self._read_text(document)
+            loop = asyncio.get_running_loop()
+            return await self.result_cache.get_or_compute(
+                content_key(content, self.model_version),
+                lambda: loop.run_in_executor(None, self._analyze_text, content)
+            )
         except Exception as e:
-            print(f"Error analyzing document {document.filename}: {str(e)}")
+            logger.error("Error analyzing document %s: %s", document.filename, e)
             return self._create_default_analysis(document)
 
-    def _create_default_analysis(self, document: Document) -> Dict:
+    def analyze_documents_batch(self, documents: List[DocumentRecord], root: str = "") -> List[Dict]:
+        """Analyze text documents in bulk with nlp.pipe.
+
+        This is CPU-bound; async callers should run it in an executor.
+        Documents that cannot be read get the default analysis; texts already
+        in the result cache are not processed again. Document paths are
+        relative to ``root``.
+        """
+        results: List[Optional[Dict]] = [None] * len(documents)
+        texts = []
+        keys = []
+        indices = []
+        for i, document in enumerate(documents):
+            if document.file_type != DocumentType.TXT:
+                results[i] = self._create_default_analysis(document)
+                continue
+            try:
+                content = self._read_text(document, root)
+            except Exception as e:
+                logger.error("Error reading document %s: %s", document.filename, e)
+                results[i] = self._create_default_analysis(document)
+                continue
+            key = content_key(content, self.model_version)
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                results[i] = cached
+                continue
+            texts.append(content)
+            keys.append(key)
+            indices.append(i)
+
+        # Only load the model when something is not cached
+        docs = self.nlp.pipe(texts, batch_size=self.batch_size, n_process=self.n_process) if texts else []
+        for i, key, content, doc in zip(indices, keys, texts, docs):
+            try:
+                results[i] = self._build_analysis(doc, content)
+                self.result_cache.put(key, results[i])
+            except Exception as e:
+                logger.error("Error analyzing document %s: %s", documents[i].filename, e)
+                results[i] = self._create_default_analysis(documents[i])
+        return results
+
+    def _create_default_analysis(self, document: DocumentRecord) -> Dict:
         """Create a default analysis for non-text documents or analysis failures."""
         return {
             "classification": {
@@ -97,20 +214,10 @@ class ClassificationService:
             "subjectivity": 0.5
         }
 
-    async def process_documents_batch(self, documents: List[Document]) -> List[Dict]:
-        """Process a batch of documents concurrently."""
-        tasks = []
-        for doc in documents:
-            if doc.file_type == DocumentType.TXT:
-                # Create a coroutine for text documents
-                tasks.append(self.analyze_document(doc))
-            else:
-                # For non-text documents, create a coroutine that returns the default analysis
-                tasks.append(asyncio.create_task(asyncio.sleep(0, result=self._create_default_analysis(doc))))
-        
-        # Wait for all tasks to complete
-        results = await asyncio.gather(*tasks)
-        return results
+    async def process_documents_batch(self, documents: List[DocumentRecord], root: str = "") -> List[Dict]:
+        """Process a batch of documents without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.analyze_documents_batch, documents, root)
 
     async def analyze_folder(self, folder_path: str) -> Dict:
         """Analyze all documents in a folder and return aggregated statistics."""
@@ -119,62 +226,55 @@ class ClassificationService:
             return {"error": "Folder not found"}
 
         documents = []
+        hashes = []
         total_size = 0
         sentiment_scores = []
         document_types = {}
 
-        # Process all files in the folder and its subfolders
-        for file_path in folder.rglob("*"):
-            if file_path.is_file():
-                try:
-                    # Get file size
-                    size = file_path.stat().st_size
-                    total_size += size
-
-                    # Create a Document object
-                    doc = Document(
-                        id=str(uuid.uuid4()),
-                        filename=file_path.name,
-                        file_type=self._get_file_type(str(file_path)),
-                        size=size,
-                        created_at=datetime.fromtimestamp(file_path.stat().st_ctime),
-                        modified_at=datetime.fromtimestamp(file_path.stat().st_mtime),
-                        path=str(file_path.relative_to(folder)),
-                        metadata={},
-                        classification=None,
-                        status=DocumentStatus.COMPLETED
-                    )
-
-                    # Analyze document if it's a text file
-                    if doc.file_type == DocumentType.TXT:
-                        analysis = await self.analyze_document(doc)
-                        doc.classification = analysis["classification"]
-                        doc.metadata.update({
-                            "classification_method": analysis["method"],
-                            "confidence": analysis["classification"]["confidence"],
-                            "sentiment_score": analysis["sentiment_score"],
-                            "subjectivity": analysis["subjectivity"]
-                        })
-                    else:
-                        # For non-text files, create a default analysis
-                        analysis = self._create_default_analysis(doc)
-                        doc.classification = analysis["classification"]
-                        doc.metadata.update({
-                            "classification_method": "default",
-                            "confidence": 0.5,
-                            "sentiment_score": 0,
-                            "subjectivity": 0.5
-                        })
-
-                    documents.append(doc)
-
-                    # Update statistics
-                    sentiment_scores.append(doc.metadata.get("sentiment_score", 0))
-                    doc_type = doc.classification["type"]
-                    document_types[doc_type] = document_types.get(doc_type, 0) + 1
-
-                except Exception as e:
-                    print(f"Error processing {file_path}: {str(e)}")
+        # Process all files in the folder and its subfolders, hashing them while the scan continues
+        scan_started = time.perf_counter()
+        async for entry in scan_directory_async(folder_path, include_dirs=False):
+            try:
+                total_size += entry.size
+
+                doc = DocumentRecord(
+                    id=str(uuid.uuid4()),
+                    filename=entry.name,
+                    file_type=detect_file_type(entry.path),
+                    size=entry.size,
+                    created_at=entry.created_at,
+                    modified_at=entry.modified_at,
+                    path=entry.relative_path
+                )
+
+                documents.append(doc)
+                hashes.append(asyncio.ensure_future(self.file_hasher.hash(entry.path)))
+
+            except Exception as e:
+                logger.error("Error processing %s: %s", entry.path, e)
+
+        observe_stage("scan", time.perf_counter() - scan_started)
+
+        # Identical files are analyzed once; unreadable files are analyzed individually
+        unique = {}
+        for doc, content_hash in zip(documents, await asyncio.gather(*hashes, return_exceptions=True)):
+            if isinstance(content_hash, str):
+                doc.content_hash = content_hash
+            unique.setdefault(doc.content_hash or doc.id, doc)
+        representatives = list(unique.values())
+
+        # Analyze all documents in one batch (text files go through nlp.pipe)
+        with stage_timer("classification"):
+            analyses = await self.process_documents_batch(representatives, folder_path)
+        analyzed = dict(zip((doc.content_hash or doc.id for doc in representatives), analyses))
+        for doc in documents:
+            # Documents with the same content share one analysis dict
+            doc.analysis = analysis = analyzed[doc.content_hash or doc.id]
+
+            # Update statistics
+            sentiment_scores.append(analysis["sentiment_score"])
+            doc_type = analysis["classification"]["type"]
+            document_types[doc_type] = document_types.get(doc_type, 0) + 1
 
         # Calculate statistics
         avg_sentiment = sum(sentiment_scores) / len(sentiment_scores) if sentiment_scores else 0
@@ -190,21 +290,15 @@ class ClassificationService:
             "average_sentiment": avg_sentiment,
             "sentiment_distribution": sentiment_distribution,
             "document_types": document_types,
-            "documents": [doc.dict() for doc in documents]
+            "documents": [
+                dict(doc.to_model().model_dump(), classification=doc.analysis["classification"])
+                for doc in documents
+            ]
         }
 
-    async def analyze_document_with_openai(self, file_path: str) -> Dict:
-        """Analyze a document using OpenAI's API."""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            # Truncate content if too long
-            max_tokens = 4000
-            if len(content) > max_tokens:
-                content = content[:max_tokens] + "..."
-
-            prompt = f"""Analyze the following document and provide:
+    async def _request_openai_analysis(self, content: str) -> Dict:
+        """Send a single analysis request to OpenAI and parse the JSON reply."""
+        prompt = f"""Analyze the following document and provide:
             1. Document type (Contract, Report, Email, Invoice, Proposal, Meeting, Policy, or Other)
             2. Sentiment (Positive, Negative, or Neutral)
             3. Sentiment score (-1 to 1)
@@ -215,21 +309,40 @@ class ClassificationService:
 
             Provide the response in JSON format with keys: type, sentiment, sentiment_score, subjectivity"""
 
-            response = await self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3
-            )
+        response = await self.client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3
+        )
+
+        # Parse the response
+        return json.loads(response.choices[0].message.content)
+
+    async def analyze_document_with_openai(self, file_path: str) -> Dict:
+        """Analyze a document using OpenAI's API.
+
+        Results are cached by content hash and model version; failed requests
+        are not cached.
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+
+            # Truncate content if too long
+            max_tokens = 4000
+            if len(content) > max_tokens:
+                content = content[:max_tokens] + "..."
 
-            # Parse the response
-            result = eval(response.choices[0].message.content)
-            return result
+            return await self.result_cache.get_or_compute(
+                content_key(content, self.model_version),
+                lambda: self._request_openai_analysis(content)
+            )
 
         except Exception as e:
-            print(f"Error analyzing document with OpenAI: {str(e)}")
+            logger.error("Error analyzing document with OpenAI: %s", e)
             return {
                 "type": "Unknown",
                 "sentiment": "Neutral",
                 "sentiment_score": 0.0,
                 "subjectivity": 0.0
-            } 
\ No newline at end of file
+            }
@@ -2,7 +2,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete, and_
 from sqlalchemy.exc import IntegrityError
 from app.models.database_models import DBDocument, DBFolder, DBClassification
-from app.models.document import Document, DocumentType, DocumentStatus
+from app.models.document import DocumentRecord, DocumentStatus
 from datetime import datetime
 import uuid
 import logging
@@ -13,7 +13,14 @@ class DatabaseService:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def create_document(self, document: Document, folder_id: str = None) -> DBDocument:
+    async def _commit_or_flush(self, commit: bool):
+        """Commit the session, or only flush it when the caller owns the unit of work."""
+        if commit:
+            await self.session.commit()
+        else:
+            await self.session.flush()
+
+    async def create_document(self, document: DocumentRecord, folder_id: str = None, commit: bool = True) -> DBDocument:
         """Create a new document in the database."""
         try:
             # Check for existing document with same path in the same folder
@@ -29,17 +36,19 @@ class DatabaseService:
 
             if existing_doc:
                 # Update existing document if it exists
-                logger.info(f"Document already exists, updating: {document.path}")
+                logger.debug("Document already exists, updating: %s", document.path)
                 return await self.update_document(
                     existing_doc.id,
                     size=document.size,
-                    modified_at=document.modified_at,
+                    modified_at=datetime.fromtimestamp(document.modified_at),
+                    content_hash=document.content_hash,
                     content=document.content,
-                    sentiment_polarity=document.sentiment.polarity if document.sentiment else None,
-                    sentiment_subjectivity=document.sentiment.subjectivity if document.sentiment else None,
-                    sentiment_label=document.sentiment.sentiment if document.sentiment else None,
-                    metadata=document.metadata,
-                    status=document.status
+                    sentiment_polarity=document.sentiment_polarity,
+                    sentiment_subjectivity=document.sentiment_subjectivity,
+                    sentiment_label=document.sentiment_label,
+                    metadata=document.metadata_dict(),
+                    status=document.status,
+                    commit=commit
                 )
 
             # Create new document
@@ -48,32 +57,36 @@ class DatabaseService:
                 filename=document.filename,
                 file_type=document.file_type,
                 size=document.size,
-                created_at=document.created_at,
-                modified_at=document.modified_at,
+                created_at=datetime.fromtimestamp(document.created_at),
+                modified_at=datetime.fromtimestamp(document.modified_at),
                 path=document.path,
+                content_hash=document.content_hash,
                 content=document.content,
-                sentiment_polarity=document.sentiment.polarity if document.sentiment else None,
-                sentiment_subjectivity=document.sentiment.subjectivity if document.sentiment else None,
-                sentiment_label=document.sentiment.sentiment if document.sentiment else None,
-                metadata=document.metadata,
+                sentiment_polarity=document.sentiment_polarity,
+                sentiment_subjectivity=document.sentiment_subjectivity,
+                sentiment_label=document.sentiment_label,
+                metadata=document.metadata_dict(),
                 status=document.status,
                 folder_id=folder_id
             )
             self.session.add(db_document)
-            await self.session.commit()
-            await self.session.refresh(db_document)
+            await self._commit_or_flush(commit)
+            if commit:
+                await self.session.refresh(db_document)
             return db_document
 
         except IntegrityError as e:
-            await self.session.rollback()
+            if commit:
+                await self.session.rollback()
             logger.error(f"Integrity error creating document: {str(e)}")
             raise
         except Exception as e:
-            await self.session.rollback()
+            if commit:
+                await self.session.rollback()
             logger.error(f"Error creating document: {str(e)}")
             raise
 
-    async def create_folder(self, name: str, path: str, parent_id: str = None) -> DBFolder:
+    async def create_folder(self, name: str, path: str, parent_id: str = None, commit: bool = True) -> DBFolder:
         """Create a new folder in the database."""
         try:
             # Check for existing folder with same path
@@ -84,11 +97,12 @@ class DatabaseService:
 
             if existing_folder:
                 # Update existing folder if it exists
-                logger.info(f"Folder already exists, updating: {path}")
+                logger.debug("Folder already exists, updating: %s", path)
                 return await self.update_folder(
                     existing_folder.id,
                     name=name,
-                    parent_id=parent_id
+                    parent_id=parent_id,
+                    commit=commit
                 )
 
             # Create new folder
@@ -100,16 +114,19 @@ class DatabaseService:
                 parent_id=parent_id
             )
             self.session.add(db_folder)
-            await self.session.commit()
-            await self.session.refresh(db_folder)
+            await self._commit_or_flush(commit)
+            if commit:
+                await self.session.refresh(db_folder)
             return db_folder
 
         except IntegrityError as e:
-            await self.session.rollback()
+            if commit:
+                await self.session.rollback()
             logger.error(f"Integrity error creating folder: {str(e)}")
             raise
         except Exception as e:
-            await self.session.rollback()
+            if commit:
+                await self.session.rollback()
             logger.error(f"Error creating folder: {str(e)}")
             raise
 
@@ -124,7 +141,7 @@ class DatabaseService:
 
             if existing_class:
                 # Update existing classification if it exists
-                logger.info(f"Classification already exists, updating: {document_id}")
+                logger.debug("Classification already exists, updating: %s", document_id)
                 return await self.update_classification(
                     existing_class.id,
                     category=category,
@@ -153,7 +170,7 @@ class DatabaseService:
             logger.error(f"Error creating classification: {str(e)}")
             raise
 
-    async def update_folder(self, folder_id: str, **kwargs) -> DBFolder:
+    async def update_folder(self, folder_id: str, commit: bool = True, **kwargs) -> DBFolder:
         """Update a folder's properties."""
         try:
             result = await self.session.execute(
@@ -162,14 +179,16 @@ class DatabaseService:
                 .values(**kwargs)
                 .returning(DBFolder)
             )
-            await self.session.commit()
+            await self._commit_or_flush(commit)
             return result.scalar_one_or_none()
         except IntegrityError as e:
-            await self.session.rollback()
+            if commit:
+                await self.session.rollback()
             logger.error(f"Integrity error updating folder: {str(e)}")
             raise
         except Exception as e:
-            await self.session.rollback()
+            if commit:
+                await self.session.rollback()
             logger.error(f"Error updating folder: {str(e)}")
             raise
 
@@ -193,7 +212,7 @@ class DatabaseService:
             logger.error(f"Error updating classification: {str(e)}")
             raise
 
-    async def delete_folder(self, folder_id: str) -> bool:
+    async def delete_folder(self, folder_id: str, commit: bool = True) -> bool:
         """Delete a folder and all its contents."""
         try:
             # Delete all documents in the folder
@@ -205,8 +224,8 @@ class DatabaseService:
             subfolders = await self.session.execute(
                 select(DBFolder).where(DBFolder.parent_id == folder_id)
             )
-            for subfolder in subfolders.scalars():
-                await self.delete_folder(subfolder.id)
+            for subfolder in subfolders.scalars().all():
+                await self.delete_folder(subfolder.id, commit=False)
             
             # Delete the folder itself
             result = await self.session.execute(
@@ -214,10 +233,11 @@ class DatabaseService:
                 .where(DBFolder.id == folder_id)
                 .returning(DBFolder.id)
             )
-            await self.session.commit()
+            await self._commit_or_flush(commit)
             return bool(result.scalar_one_or_none())
         except Exception as e:
-            await self.session.rollback()
+            if commit:
+                await self.session.rollback()
             logger.error(f"Error deleting folder: {str(e)}")
             raise
 
@@ -235,6 +255,39 @@ class DatabaseService:
         )
         return result.scalar_one_or_none()
 
+    async def get_folder_by_path(self, path: str) -> DBFolder:
+        """Get a folder by its path."""
+        result = await self.session.execute(
+            select(DBFolder).where(DBFolder.path == path)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_document_by_path(self, path: str, folder_id: str) -> DBDocument:
+        """Get a document by its path within a folder."""
+        result = await self.session.execute(
+            select(DBDocument).where(
+                and_(
+                    DBDocument.path == path,
+                    DBDocument.folder_id == folder_id
+                )
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def get_document_by_hash(self, content_hash: str) -> DBDocument:
+        """Get an analyzed document with the given content hash, if any."""
+        result = await self.session.execute(
+            select(DBDocument)
+            .where(
+                and_(
+                    DBDocument.content_hash == content_hash,
+                    DBDocument.status == DocumentStatus.COMPLETED
+                )
+            )
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
     async def get_folder_structure(self, folder_id: str) -> dict:
         """Get the complete folder structure starting from a specific folder."""
         folder = await self.get_folder(folder_id)
@@ -273,7 +326,7 @@ class DatabaseService:
 
         return structure
 
-    async def update_document(self, document_id: str, **kwargs) -> DBDocument:
+    async def update_document(self, document_id: str, commit: bool = True, **kwargs) -> DBDocument:
         """Update a document's properties."""
         result = await self.session.execute(
             update(DBDocument)
@@ -281,17 +334,17 @@ class DatabaseService:
             .values(**kwargs)
             .returning(DBDocument)
         )
-        await self.session.commit()
+        await self._commit_or_flush(commit)
         return result.scalar_one_or_none()
 
-    async def delete_document(self, document_id: str) -> bool:
+    async def delete_document(self, document_id: str, commit: bool = True) -> bool:
         """Delete a document by ID."""
         result = await self.session.execute(
             delete(DBDocument)
             .where(DBDocument.id == document_id)
             .returning(DBDocument.id)
         )
-        await self.session.commit()
+        await self._commit_or_flush(commit)
         return bool(result.scalar_one_or_none())
 
     async def get_all_documents(self, folder_id: str = None) -> list[DBDocument]:
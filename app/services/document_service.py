@@ -2,93 +2,78 @@ import os
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, List, Tuple, Any
+from typing import Optional, Dict, Iterable, List, Sequence, Tuple, Union, Any
 import asyncio
 import aiofiles
-from app.models.document import Document, DocumentType, DocumentStatus, FolderAnalysis, SentimentAnalysis
+from app.models.document import Document, DocumentRecord, DocumentType, DocumentStatus, FolderAnalysis, SentimentAnalysis
+from app.services.file_hasher import FileHasher
+from app.services.file_types import detect_file_type
 from app.services.classification_service import ClassificationService
-from functools import lru_cache
+from app.services.sentiment_engine import score_texts
+from app.services.chunking import split_into_chunks, aggregate_sentiment
 import time
 import logging
-from textblob import TextBlob
+from concurrent.futures import ProcessPoolExecutor
 import magic
-import hashlib
-from docx import Document as DocxDocument
 from app.services.database_service import DatabaseService
+from app.models.database_models import DBDocument
 from app.database import AsyncSessionLocal
+from backend.file_scanner import ScanEntry, scan_directory_async
+from backend.metrics import CacheStats, IN_FLIGHT, observe_stage, stage_timer, track_queue
+from backend.log_config import sampled
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sentiment scoring runs in a process pool; 0 workers scores in a thread instead
+SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", str(os.cpu_count() or 1)))
+# Number of texts sent to a sentiment worker per task
+SENTIMENT_CHUNK_SIZE = int(os.getenv("SENTIMENT_CHUNK_SIZE", "500"))
+# Files hashed ahead of the database writes during a folder scan; each window is written as one batch
+HASH_WINDOW = int(os.getenv("HASH_WINDOW", "256"))
+
+duplicate_stats = CacheStats("content_hash")
+documents_in_flight = IN_FLIGHT.labels("create_document")
+
 class DocumentService:
-    def __init__(self, base_directory: str = "Client Data", batch_size: int = 50):
+    def __init__(
+        self,
+        base_directory: str = "Client Data",
+        batch_size: int = 50,
+        sentiment_workers: int = SENTIMENT_WORKERS
+    ):
         self.base_directory = Path(base_directory)
         self.classification_service = ClassificationService()
         self.batch_size = batch_size
+        self.sentiment_workers = sentiment_workers
+        self._sentiment_pool: Optional[ProcessPoolExecutor] = None
+        self.file_hasher = FileHasher()
+        # Files scanned but not yet written to the database
+        self.pending_files = 0
+        track_queue("document_ingest", lambda: self.pending_files)
         
         # Create base directory if it doesn't exist
         self.base_directory.mkdir(parents=True, exist_ok=True)
         logger.info(f"Initialized DocumentService with base directory: {self.base_directory.absolute()}")
 
-    @lru_cache(maxsize=100)
-    def _get_file_type(self, file_path: str) -> DocumentType:
-        """Determine the file type based on extension and content with caching."""
-        try:
-            # First try to get the MIME type using python-magic
-            mime = magic.Magic(mime=True)
-            mime_type = mime.from_file(str(file_path))
-            
-            # Map MIME types to document types
-            mime_map = {
-                'application/pdf': DocumentType.PDF,
-                'application/msword': DocumentType.DOCX,
-                'application/vnd.openxmlformats-officedocument.wordprocessingml.document': DocumentType.DOCX,
-                'text/plain': DocumentType.TXT,
-                'application/vnd.ms-excel': DocumentType.XLSX,
-                'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': DocumentType.XLSX,
-                'application/vnd.ms-powerpoint': DocumentType.PPTX,
-                'application/vnd.openxmlformats-officedocument.presentationml.presentation': DocumentType.PPTX,
-                'image/jpeg': DocumentType.JPG,
-                'image/png': DocumentType.PNG
-            }
-            
-            doc_type = mime_map.get(mime_type, DocumentType.OTHER)
-            logger.info(f"Determined file type for {file_path}: {doc_type} (MIME: {mime_type})")
-            return doc_type
-        except Exception as e:
-            logger.error(f"Error determining file type for {file_path}: {str(e)}")
-            # Fallback to extension-based detection
-            ext = Path(file_path).suffix.lower().lstrip('.')
-            extension_map = {
-                'pdf': DocumentType.PDF,
-                'doc': DocumentType.DOCX,
-                'docx': DocumentType.DOCX,
-                'txt': DocumentType.TXT,
-                'xls': DocumentType.XLSX,
-                'xlsx': DocumentType.XLSX,
-                'ppt': DocumentType.PPTX,
-                'pptx': DocumentType.PPTX,
-                'jpg': DocumentType.JPG,
-                'jpeg': DocumentType.JPG,
-                'png': DocumentType.PNG
-            }
-            return extension_map.get(ext, DocumentType.OTHER)
-
     def _calculate_file_hash(self, file_path: Path) -> str:
-        """Calculate SHA-256 hash of a file."""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+        """Calculate the content hash of a file with the configured FILE_HASH_ALGORITHM."""
+        return self.file_hasher.hash_file(str(file_path))
+
+    async def _find_duplicate(self, content_hash: str, db_service: Optional[DatabaseService]) -> Optional[DBDocument]:
+        """Return an analyzed document with the same content, if one is stored."""
+        if db_service is not None:
+            return await db_service.get_document_by_hash(content_hash)
+        async with AsyncSessionLocal() as session:
+            return await DatabaseService(session).get_document_by_hash(content_hash)
 
     async def extract_text_content(self, file_path: Path) -> Optional[str]:
         """Extract text content from various file types."""
         try:
-            file_type = self._get_file_type(str(file_path))
+            file_type = detect_file_type(str(file_path))
             
             if file_type == DocumentType.DOCX:
+                # python-docx (and lxml) are imported on the first DOCX file
+                from docx import Document as DocxDocument
                 doc = DocxDocument(file_path)
                 return "\n".join([paragraph.text for paragraph in doc.paragraphs])
             elif file_type == DocumentType.TXT:
@@ -103,99 +88,262 @@ class DocumentService:
             logger.error(f"Error extracting text from {file_path}: {str(e)}")
             return None
 
+    async def warm_up(self):
+        """Load the spaCy model, python-docx and the sentiment workers now instead of on first use."""
+        import docx  # noqa: F401
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.classification_service.warm_up)
+        # One task per worker so every worker process starts and loads the lexicon
+        pool = self._get_sentiment_pool()
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, score_texts, ["warm up"]) for _ in range(max(1, self.sentiment_workers))
+        ))
+
+    def _get_sentiment_pool(self) -> Optional[ProcessPoolExecutor]:
+        """Create the sentiment process pool on first use."""
+        if self._sentiment_pool is None and self.sentiment_workers > 0:
+            self._sentiment_pool = ProcessPoolExecutor(max_workers=self.sentiment_workers)
+        return self._sentiment_pool
+
+    async def analyze_sentiment_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Score many texts with the vectorized sentiment engine, in chunks across the process pool.
+
+        The texts are spread evenly over the workers, at most SENTIMENT_CHUNK_SIZE
+        per task, so even a small batch keeps every worker busy.
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_sentiment_pool()
+        size = max(1, min(SENTIMENT_CHUNK_SIZE, -(-len(texts) // max(1, self.sentiment_workers))))
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+        results = await asyncio.gather(*(loop.run_in_executor(pool, score_texts, chunk) for chunk in chunks))
+        return [result for chunk in results for result in chunk]
+
     async def analyze_sentiment(self, text: str) -> Dict[str, Any]:
-        """Analyze sentiment of text using TextBlob for multilingual support."""
+        """Analyze sentiment of text with the TextBlob-compatible lexicon engine.
+
+        Long texts are split into at most MAX_CHUNKS windows that are scored in
+        parallel across the sentiment workers and combined into a length-weighted mean.
+        """
+        return (await self.analyze_sentiments([text]))[0]
+
+    async def analyze_sentiments(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """Analyze the sentiment of many texts, scoring the windows of all of them in one batch."""
         try:
-            # Use TextBlob for sentiment analysis
-            blob = TextBlob(text)
-            
-            # Get polarity (-1 to 1) and subjectivity (0 to 1)
-            polarity = blob.sentiment.polarity
-            subjectivity = blob.sentiment.subjectivity
-            
-            # Determine sentiment category
-            if polarity > 0.1:
-                sentiment_category = "positive"
-            elif polarity < -0.1:
-                sentiment_category = "negative"
-            else:
-                sentiment_category = "neutral"
-            
-            return {
-                "sentiment": sentiment_category,
-                "polarity": polarity,
-                "subjectivity": subjectivity,
-                "confidence": abs(polarity)  # Use absolute polarity as confidence
-            }
+            chunks = [split_into_chunks(text) for text in texts]
+            results = await self.analyze_sentiment_batch([chunk for text_chunks in chunks for chunk in text_chunks])
         except Exception as e:
             logger.error(f"Error analyzing sentiment: {str(e)}")
-            return {
-                "sentiment": "neutral",
-                "polarity": 0,
-                "subjectivity": 0,
-                "confidence": 0
-            }
-
-    async def create_document(self, file_path: Path, base_dir: Path) -> Document:
-        """Create a Document object from a file path."""
+            return [
+                {"sentiment": "neutral", "polarity": 0, "subjectivity": 0, "confidence": 0}
+                for _ in texts
+            ]
+        sentiments = []
+        position = 0
+        for text_chunks in chunks:
+            sentiments.append(aggregate_sentiment(
+                results[position:position + len(text_chunks)], [len(chunk) for chunk in text_chunks]
+            ))
+            position += len(text_chunks)
+        return sentiments
+
+    async def create_document(
+        self,
+        file_path: Path,
+        base_dir: Path,
+        db_service: Optional[DatabaseService] = None,
+        folder_id: Optional[str] = None,
+        entry: Optional[ScanEntry] = None,
+        content_hash: Optional[str] = None
+    ) -> DocumentRecord:
+        """Create a document record from a file path.
+
+        When ``db_service`` is given the document is written through its session
+        as part of the caller's unit of work; otherwise a short-lived session is used.
+        File stats are taken from ``entry`` when the file comes from the scanner.
+        When a document with the same content hash has already been analyzed, its
+        content and sentiment are reused and extraction and analysis are skipped.
+        """
+        result = (await self.create_documents([(file_path, base_dir, folder_id, entry, content_hash)], db_service))[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def create_documents(
+        self,
+        files: Sequence[Tuple[Path, Path, Optional[str], Optional[ScanEntry], Optional[str]]],
+        db_service: Optional[DatabaseService] = None
+    ) -> List[Union[DocumentRecord, Exception]]:
+        """Create the documents of many files, as create_document does for one.
+
+        ``files`` holds ``(file_path, base_dir, folder_id, entry, content_hash)``
+        tuples. Texts are extracted file by file, then the sentiment of all of
+        them is scored in one batch, so a batch of files shares a few pool tasks
+        instead of paying one round trip per document. Returns the document, or
+        the exception that stopped it, for each file in order.
+        """
+        documents_in_flight.inc(len(files))
         try:
-            # Get relative path from base directory
-            relative_path = file_path.relative_to(base_dir)
-            logger.info(f"Creating document from file: {relative_path}")
+            prepared: List[Union[Tuple[DocumentRecord, Any], Exception]] = []
+            batch: Dict[str, Tuple[DocumentRecord, Optional[str]]] = {}
+            for file_path, base_dir, folder_id, entry, content_hash in files:
+                try:
+                    doc, duplicate = await self._prepare_document(
+                        file_path, base_dir, db_service, folder_id, entry, content_hash, batch
+                    )
+                    if doc.content_hash:
+                        batch.setdefault(doc.content_hash, (doc, folder_id))
+                    prepared.append((doc, duplicate))
+                except Exception as e:
+                    prepared.append(e)
 
-            # Get file type
-            file_type = self._get_file_type(str(file_path))
-            logger.info(f"File type detected: {file_type}")
+            # Documents reusing an analyzed duplicate keep its sentiment
+            documents = [item for item in prepared if not isinstance(item, Exception)]
+            scored = [doc for doc, duplicate in documents if duplicate is None and doc.content]
+            if scored:
+                with stage_timer("sentiment"):
+                    sentiments = await self.analyze_sentiments([doc.content for doc in scored])
+                for doc, sentiment in zip(scored, sentiments):
+                    doc.sentiment_polarity = sentiment["polarity"]
+                    doc.sentiment_subjectivity = sentiment["subjectivity"]
+                    doc.sentiment_label = sentiment["sentiment"]
+            for doc, duplicate in documents:
+                if isinstance(duplicate, DocumentRecord):
+                    doc.sentiment_polarity = duplicate.sentiment_polarity
+                    doc.sentiment_subjectivity = duplicate.sentiment_subjectivity
+                    doc.sentiment_label = duplicate.sentiment_label
 
-            # Get file stats
-            stats = file_path.stat()
-            size = stats.st_size
-            created_at = datetime.fromtimestamp(stats.st_ctime)
-            modified_at = datetime.fromtimestamp(stats.st_mtime)
-            logger.info(f"File stats - Size: {size}, Created: {created_at}, Modified: {modified_at}")
-
-            # Process text content for analysis
-            content = None
-            sentiment = None
-            
-            if file_type in [DocumentType.TXT, DocumentType.MARKDOWN, DocumentType.PDF, DocumentType.DOCX]:
+            results: List[Union[DocumentRecord, Exception]] = []
+            for (file_path, _, folder_id, _, _), item in zip(files, prepared):
                 try:
-                    content = await self.extract_text_content(file_path)
-                    if content:
-                        # Perform sentiment analysis
-                        sentiment = await self.analyze_sentiment(content)
-                        logger.info(f"Analysis completed for {relative_path}")
+                    if isinstance(item, Exception):
+                        raise item
+                    doc, duplicate = item
+                    await self._write_document(doc, folder_id, db_service, duplicate is not None)
+                    results.append(doc)
                 except Exception as e:
-                    logger.error(f"Error processing content for {relative_path}: {str(e)}")
-
-            # Create document object with all required fields
-            doc = Document(
-                id=str(uuid.uuid4()),
-                filename=str(relative_path),
-                file_type=file_type,
-                size=size,
-                created_at=created_at,
-                modified_at=modified_at,
-                path=str(relative_path),
-                content=content,
-                sentiment=sentiment,
-                metadata={
-                    "mime_type": magic.Magic(mime=True).from_file(str(file_path)),
-                    "processed": True
+                    logger.error("Error creating document from %s: %s", file_path, e, exc_info=True)
+                    results.append(e)
+            return results
+        finally:
+            documents_in_flight.dec(len(files))
+
+    async def _prepare_document(
+        self,
+        file_path: Path,
+        base_dir: Path,
+        db_service: Optional[DatabaseService],
+        folder_id: Optional[str],
+        entry: Optional[ScanEntry],
+        content_hash: Optional[str],
+        batch: Dict[str, Tuple[DocumentRecord, Optional[str]]]
+    ) -> Tuple[DocumentRecord, Union[DBDocument, DocumentRecord, None]]:
+        """Build a file's document and return it with the duplicate it reuses, if any.
+
+        The duplicate is a stored document, or a document earlier in ``batch``
+        (by content hash, with its folder id) that is not written yet. Only a
+        document reusing a stored duplicate has its sentiment set.
+        """
+        # Get relative path from base directory
+        relative_path = file_path.relative_to(base_dir)
+        logger.debug("Creating document from file: %s", relative_path)
+
+        # Get file type
+        with stage_timer("type_detection"):
+            file_type = detect_file_type(str(file_path))
+
+        # Get file stats
+        if entry is None:
+            stats = file_path.stat()
+            entry = ScanEntry(str(file_path), str(relative_path), file_path.name, False,
+                              stats.st_size, stats.st_mtime, stats.st_ctime)
+
+        if content_hash is None:
+            try:
+                content_hash = await self.file_hasher.hash(str(file_path))
+            except OSError as e:
+                logger.error("Error hashing %s: %s", relative_path, e)
+
+        # Process text content for analysis
+        content = None
+        sentiment = None
+        metadata = None
+        mime_type = None
+
+        duplicate = await self._find_duplicate(content_hash, db_service) if content_hash else None
+        # Identical content earlier in the batch is not in the database yet
+        earlier = batch.get(content_hash) if duplicate is None and content_hash else None
+        duplicate_stats.record(hit=duplicate is not None or earlier is not None)
+        if duplicate is not None:
+            logger.debug("Identical content already analyzed, reusing document %s for %s", duplicate.id, relative_path)
+            content = duplicate.content
+            if duplicate.sentiment_polarity is not None:
+                sentiment = {
+                    "polarity": duplicate.sentiment_polarity,
+                    "subjectivity": duplicate.sentiment_subjectivity,
+                    "sentiment": duplicate.sentiment_label
                 }
-            )
+            metadata = dict(duplicate.metadata or {})
+            # The MIME type is stored in the metadata; identical content has the same one
+            mime_type = metadata.pop("mime_type", None)
+            if duplicate.folder_id != folder_id or duplicate.path != str(relative_path):
+                metadata["duplicate_of"] = duplicate.id
+        elif earlier is not None:
+            duplicate, duplicate_folder_id = earlier
+            logger.debug("Identical content earlier in the batch, reusing document %s for %s", duplicate.id, relative_path)
+            content = duplicate.content
+            mime_type = duplicate.mime_type
+            metadata = dict(duplicate.metadata or {})
+            if duplicate_folder_id != folder_id or duplicate.path != str(relative_path):
+                metadata["duplicate_of"] = duplicate.id
+        elif file_type in [DocumentType.TXT, DocumentType.MARKDOWN, DocumentType.PDF, DocumentType.DOCX]:
+            try:
+                with stage_timer("extraction"):
+                    content = await self.extract_text_content(file_path)
+            except Exception as e:
+                logger.error("Error processing content for %s: %s", relative_path, e)
 
-            # Save to database
-            async with AsyncSessionLocal() as session:
-                db_service = DatabaseService(session)
-                await db_service.create_document(doc)
+        if mime_type is None:
+            mime_type = magic.Magic(mime=True).from_file(str(file_path))
 
-            logger.info(f"Document created successfully: {doc.filename}")
-            return doc
+        path = str(relative_path)
+        doc = DocumentRecord(
+            id=str(uuid.uuid4()),
+            filename=path,
+            file_type=file_type,
+            size=entry.size,
+            created_at=entry.created_at,
+            modified_at=entry.modified_at,
+            path=path,
+            content_hash=content_hash,
+            content=content,
+            mime_type=mime_type,
+            sentiment_polarity=sentiment["polarity"] if sentiment else None,
+            sentiment_subjectivity=sentiment["subjectivity"] if sentiment else None,
+            sentiment_label=sentiment["sentiment"] if sentiment else None,
+            metadata=metadata
+        )
+        return doc, duplicate
 
-        except Exception as e:
-            logger.error(f"Error creating document from {file_path}: {str(e)}", exc_info=True)
-            raise
+    async def _write_document(
+        self,
+        doc: DocumentRecord,
+        folder_id: Optional[str],
+        db_service: Optional[DatabaseService],
+        duplicate: bool
+    ):
+        """Save a document, in a savepoint of the caller's session when one is given."""
+        with stage_timer("db_write"):
+            if db_service is not None:
+                async with db_service.session.begin_nested():
+                    await db_service.create_document(doc, folder_id, commit=False)
+            else:
+                async with AsyncSessionLocal() as session:
+                    await DatabaseService(session).create_document(doc, folder_id)
+
+        logger.info(
+            "Document created: %s", doc.filename,
+            extra=sampled(file=doc.filename, file_type=doc.file_type.value, size=doc.size, duplicate=duplicate)
+        )
 
     async def analyze_folder(self, folder_path: Optional[str] = None, page: int = 1, page_size: int = 50) -> Tuple[FolderAnalysis, int]:
         """Analyze contents of a folder with enhanced insights and pagination."""
@@ -220,11 +368,13 @@ class DocumentService:
                 db_service = DatabaseService(session)
                 root_folder = await db_service.create_folder(
                     name=target_dir.name,
-                    path=str(target_dir)
+                    path=str(target_dir),
+                    commit=False
                 )
 
-                # Process all files and subfolders
+                # Process all files and subfolders in one unit of work
                 await self._process_folder_contents(target_dir, root_folder.id, db_service)
+                await session.commit()
 
                 # Get folder structure from database
                 folder_structure = await db_service.get_folder_structure(root_folder.id)
@@ -256,29 +406,157 @@ class DocumentService:
             raise
 
     async def _process_folder_contents(self, folder_path: Path, folder_id: str, db_service: DatabaseService):
-        """Process all contents of a folder and save to database."""
-        for item in folder_path.iterdir():
-            if item.name.startswith('.') or item.name in ['.DS_Store', 'Thumbs.db']:
+        """Process all contents of a folder and save to database.
+
+        Entries are streamed from the shared scanner, which yields every folder
+        before its contents, so parent folder ids are always known. Writes go
+        through the caller's session; each item is written in a savepoint so a
+        failing file does not roll back the rest of the ingestion. Contents of a
+        folder that could not be written are skipped.
+        """
+        folder_ids = {"": folder_id}
+        files: List[Tuple[Path, str, ScanEntry, asyncio.Future]] = []
+        scan_started = time.perf_counter()
+        async for entry in scan_directory_async(str(folder_path)):
+            parent_id = folder_ids.get(entry.parent_relative_path)
+            if parent_id is None:
                 continue
 
-            if item.is_file():
+            # Keep folder paths relative to folder_path as given, as the root folder is stored
+            item = folder_path / entry.relative_path
+            if entry.is_dir:
                 try:
-                    doc = await self.create_document(item, folder_path)
-                    await db_service.create_document(doc, folder_id)
+                    async with db_service.session.begin_nested():
+                        subfolder = await db_service.create_folder(
+                            name=entry.name,
+                            path=str(item),
+                            parent_id=parent_id,
+                            commit=False
+                        )
+                    folder_ids[entry.relative_path] = subfolder.id
                 except Exception as e:
-                    logger.error(f"Error processing file {item}: {str(e)}")
-                    continue
-            elif item.is_dir():
+                    logger.error(f"Error processing subfolder {item}: {str(e)}")
+            else:
+                # Hash files in parallel while the scan continues; every HASH_WINDOW files are written as one batch
+                files.append((item, parent_id, entry, asyncio.ensure_future(self.file_hasher.hash(entry.path))))
+                self.pending_files += 1
+                if len(files) >= HASH_WINDOW:
+                    await self._write_hashed_files(files, db_service)
+        observe_stage("scan", time.perf_counter() - scan_started)
+
+        await self._write_hashed_files(files, db_service)
+
+    async def _write_hashed_files(self, files: List[Tuple[Path, str, ScanEntry, asyncio.Future]], db_service: DatabaseService):
+        """Wait for the hashes of scanned files and write their documents in one batch; empties ``files``."""
+        batch = []
+        for item, parent_id, entry, content_hash in files:
+            try:
+                batch.append((item, item.parent, parent_id, entry, await content_hash))
+            except Exception as e:
+                logger.error(f"Error processing file {item}: {str(e)}")
+        try:
+            for (item, *_), result in zip(batch, await self.create_documents(batch, db_service)):
+                if isinstance(result, Exception):
+                    logger.error(f"Error processing file {item}: {str(result)}")
+        finally:
+            self.pending_files -= len(files)
+            files.clear()
+
+    async def _ensure_folder(
+        self,
+        directory: Path,
+        root: Path,
+        db_service: DatabaseService,
+        folder_ids: Dict[Path, str]
+    ) -> str:
+        """Return the folder id for directory, creating it and any missing parents up to root."""
+        if directory in folder_ids:
+            return folder_ids[directory]
+        folder = await db_service.get_folder_by_path(str(directory))
+        if folder is None:
+            parent_id = None
+            if directory != root:
+                parent_id = await self._ensure_folder(directory.parent, root, db_service, folder_ids)
+            async with db_service.session.begin_nested():
+                folder = await db_service.create_folder(
+                    name=directory.name,
+                    path=str(directory),
+                    parent_id=parent_id,
+                    commit=False
+                )
+        folder_ids[directory] = folder.id
+        return folder.id
+
+    async def ingest_changes(
+        self,
+        folder_path: str,
+        changed: Iterable[str],
+        deleted: Iterable[str] = ()
+    ) -> Dict[str, int]:
+        """Ingest only the changed files of a folder and remove deleted ones from the database.
+
+        Paths must be given under ``folder_path`` as it was analyzed (see
+        FolderWatcher). A changed directory is expanded to the files it contains;
+        a deleted path removes either the folder or the document stored under it.
+        Everything is written in one unit of work.
+        """
+        root = Path(folder_path)
+        counts = {"ingested": 0, "deleted": 0, "failed": 0}
+        folder_ids: Dict[Path, str] = {}
+
+        files: List[Tuple[Path, Optional[ScanEntry]]] = []
+        for path in sorted(set(changed)):
+            item = Path(path)
+            if item.is_dir():
+                async for entry in scan_directory_async(str(item), include_dirs=False):
+                    files.append((item / entry.relative_path, entry))
+            elif item.is_file():
+                files.append((item, None))
+
+        hashes = await self.file_hasher.hash_files([str(item) for item, _ in files])
+
+        async with AsyncSessionLocal() as session:
+            db_service = DatabaseService(session)
+
+            batch = []
+            for (item, entry), content_hash in zip(files, hashes):
                 try:
-                    subfolder = await db_service.create_folder(
-                        name=item.name,
-                        path=str(item),
-                        parent_id=folder_id
-                    )
-                    await self._process_folder_contents(item, subfolder.id, db_service)
+                    folder_id = await self._ensure_folder(item.parent, root, db_service, folder_ids)
+                    batch.append((item, item.parent, folder_id, entry, content_hash))
                 except Exception as e:
-                    logger.error(f"Error processing subfolder {item}: {str(e)}")
-                    continue
+                    logger.error(f"Error ingesting changed file {item}: {str(e)}")
+                    counts["failed"] += 1
+            for start in range(0, len(batch), HASH_WINDOW):
+                window = batch[start:start + HASH_WINDOW]
+                for (item, *_), result in zip(window, await self.create_documents(window, db_service)):
+                    if isinstance(result, Exception):
+                        logger.error(f"Error ingesting changed file {item}: {str(result)}")
+                        counts["failed"] += 1
+                    else:
+                        counts["ingested"] += 1
+
+            for path in sorted(set(deleted)):
+                item = Path(path)
+                try:
+                    async with session.begin_nested():
+                        folder = await db_service.get_folder_by_path(str(item))
+                        if folder is not None:
+                            await db_service.delete_folder(folder.id, commit=False)
+                            counts["deleted"] += 1
+                            continue
+                        parent = await db_service.get_folder_by_path(str(item.parent))
+                        document = await db_service.get_document_by_path(item.name, parent.id) if parent else None
+                        if document is not None:
+                            await db_service.delete_document(document.id, commit=False)
+                            counts["deleted"] += 1
+                except Exception as e:
+                    logger.error(f"Error removing deleted path {item}: {str(e)}")
+                    counts["failed"] += 1
+
+            await session.commit()
+
+        logger.info(f"Ingested changes in {folder_path}: {counts}")
+        return counts
 
     def _db_to_document(self, db_doc: DBDocument) -> Document:
         """Convert database document to Document model."""
@@ -290,6 +568,7 @@ class DocumentService:
             created_at=db_doc.created_at,
             modified_at=db_doc.modified_at,
             path=db_doc.path,
+            content_hash=db_doc.content_hash,
             content=db_doc.content,
             sentiment=SentimentAnalysis(
                 polarity=db_doc.sentiment_polarity,
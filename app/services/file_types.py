@@ -0,0 +1,64 @@
+"""Document type detection shared by the document and classification services."""
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import magic
+
+from app.models.document import DocumentType
+
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {
+    'application/pdf': DocumentType.PDF,
+    'application/msword': DocumentType.DOCX,
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': DocumentType.DOCX,
+    'text/plain': DocumentType.TXT,
+    'application/vnd.ms-excel': DocumentType.XLSX,
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': DocumentType.XLSX,
+    'application/vnd.ms-powerpoint': DocumentType.PPTX,
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation': DocumentType.PPTX,
+    'image/jpeg': DocumentType.JPG,
+    'image/png': DocumentType.PNG
+}
+
+EXTENSIONS = {
+    'pdf': DocumentType.PDF,
+    'doc': DocumentType.DOCX,
+    'docx': DocumentType.DOCX,
+    'txt': DocumentType.TXT,
+    'xls': DocumentType.XLSX,
+    'xlsx': DocumentType.XLSX,
+    'ppt': DocumentType.PPTX,
+    'pptx': DocumentType.PPTX,
+    'jpg': DocumentType.JPG,
+    'jpeg': DocumentType.JPG,
+    'png': DocumentType.PNG
+}
+
+def detect_file_type(file_path: str) -> DocumentType:
+    """Determine the file type from its content (MIME type), or from its extension when that fails.
+
+    Results are cached by path, modification time and size, so a file whose
+    content changed in place is detected again.
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return _detect_file_type(str(file_path))
+    return _cached_file_type(str(file_path), stat.st_mtime_ns, stat.st_size)
+
+@lru_cache(maxsize=100)
+def _cached_file_type(file_path: str, modified_at_ns: int, size: int) -> DocumentType:
+    return _detect_file_type(file_path)
+
+def _detect_file_type(file_path: str) -> DocumentType:
+    try:
+        mime_type = magic.Magic(mime=True).from_file(file_path)
+        doc_type = MIME_TYPES.get(mime_type, DocumentType.OTHER)
+        logger.debug("Determined file type for %s: %s (MIME: %s)", file_path, doc_type, mime_type)
+        return doc_type
+    except Exception as e:
+        logger.error("Error determining file type for %s: %s", file_path, e)
+        return EXTENSIONS.get(Path(file_path).suffix.lower().lstrip('.'), DocumentType.OTHER)
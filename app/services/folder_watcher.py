@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.services.document_service import DocumentService
+from backend.file_scanner import ScanRules, scan_directory
+
+try:
+    from watchfiles import Change, awatch
+except ImportError:  # watchfiles is optional; fall back to polling
+    Change = awatch = None
+
+logger = logging.getLogger(__name__)
+
+# Watch settings (override through environment variables)
+WATCH_DEBOUNCE = float(os.getenv("WATCH_DEBOUNCE", "1.0"))  # quiet seconds before a batch is ingested
+WATCH_MAX_DELAY = float(os.getenv("WATCH_MAX_DELAY", "10.0"))  # longest a busy folder delays a batch
+WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "5.0"))
+WATCH_FORCE_POLLING = os.getenv("WATCH_FORCE_POLLING", "false").lower() in ("1", "true", "yes", "on")
+# Seconds stop() waits for batches that are being ingested
+WATCH_DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "30"))
+
+Snapshot = Dict[str, Tuple[int, float]]
+
+class FolderWatcher:
+    """Keep registered folders in sync with the database as their files change.
+
+    Changes are picked up through inotify (via watchfiles) or, when that is not
+    available, by polling file sizes and mtimes. Bursts of events are debounced
+    into one batch, and only the changed and deleted paths of a batch are passed
+    to ``DocumentService.ingest_changes``.
+    """
+
+    def __init__(
+        self,
+        document_service: DocumentService,
+        debounce: float = WATCH_DEBOUNCE,
+        max_delay: float = WATCH_MAX_DELAY,
+        poll_interval: float = WATCH_POLL_INTERVAL,
+        force_polling: bool = WATCH_FORCE_POLLING,
+        rules: Optional[ScanRules] = None
+    ):
+        self.document_service = document_service
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.mode = "polling" if force_polling or awatch is None else "inotify"
+        self.rules = rules or ScanRules()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._status: Dict[str, Dict] = {}
+        # Ingestions run as their own tasks so stopping a watcher does not interrupt them
+        self._ingestions: Set[asyncio.Task] = set()
+
+    def watch(self, folder_path: str) -> Dict:
+        """Start watching a folder; watching an already watched folder is a no-op."""
+        if folder_path not in self._tasks:
+            self._status[folder_path] = {
+                "folder_path": folder_path,
+                "mode": self.mode,
+                "started_at": time.time(),
+                "last_sync": None,
+                "batches": 0,
+                "ingested": 0,
+                "deleted": 0,
+                "failed": 0
+            }
+            self._tasks[folder_path] = asyncio.create_task(self._run(folder_path))
+            logger.info(f"Watching {folder_path} ({self.mode})")
+        return self._status[folder_path]
+
+    async def unwatch(self, folder_path: str) -> bool:
+        """Stop watching a folder."""
+        task = self._tasks.pop(folder_path, None)
+        self._status.pop(folder_path, None)
+        if task is None:
+            return False
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        logger.info(f"Stopped watching {folder_path}")
+        return True
+
+    async def stop(self, drain_timeout: float = WATCH_DRAIN_TIMEOUT):
+        """Stop all watchers, waiting up to ``drain_timeout`` seconds for running ingestions."""
+        for folder_path in list(self._tasks):
+            await self.unwatch(folder_path)
+        if self._ingestions:
+            logger.info("Waiting for %d running ingestions", len(self._ingestions))
+            _, pending = await asyncio.wait(self._ingestions, timeout=drain_timeout)
+            if pending:
+                logger.warning("Stopped with %d ingestions still running", len(pending))
+
+    def watched(self) -> Set[str]:
+        """Return the folders currently being watched."""
+        return set(self._tasks)
+
+    def status(self) -> List[Dict]:
+        """Return the state and counters of every watched folder."""
+        return list(self._status.values())
+
+    async def _run(self, folder_path: str):
+        try:
+            if self.mode == "inotify":
+                await self._watch_events(folder_path)
+            else:
+                await self._watch_polling(folder_path)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Watcher for {folder_path} stopped: {str(e)}", exc_info=True)
+            self._tasks.pop(folder_path, None)
+            if folder_path in self._status:
+                self._status[folder_path]["error"] = str(e)
+
+    def _relative(self, root: str, path: str) -> Optional[str]:
+        """Return path relative to root, or None when the ignore rules exclude it."""
+        relative_path = os.path.relpath(path, os.path.abspath(root))
+        if relative_path.startswith(os.pardir) or self.rules.skip_relative_path(relative_path):
+            return None
+        return relative_path
+
+    async def _watch_events(self, folder_path: str):
+        """Ingest batches of inotify events; watchfiles waits for ``debounce`` seconds of quiet."""
+        def watch_filter(change, path: str) -> bool:
+            return self._relative(folder_path, path) is not None
+
+        async for changes in awatch(
+            folder_path,
+            watch_filter=watch_filter,
+            debounce=int(self.max_delay * 1000),
+            step=int(self.debounce * 1000)
+        ):
+            changed, deleted = set(), set()
+            for change, path in changes:
+                relative_path = self._relative(folder_path, path)
+                if change == Change.deleted:
+                    deleted.add(relative_path)
+                    changed.discard(relative_path)
+                else:
+                    changed.add(relative_path)
+                    deleted.discard(relative_path)
+            await self._sync(folder_path, changed, deleted)
+
+    def _snapshot(self, folder_path: str) -> Snapshot:
+        return {
+            entry.relative_path: (entry.size, entry.modified_at)
+            for entry in scan_directory(folder_path, self.rules, include_dirs=False)
+        }
+
+    async def _watch_polling(self, folder_path: str):
+        """Compare size/mtime snapshots every ``poll_interval`` seconds; no file contents are read.
+
+        Once a change is seen the folder is polled every ``debounce`` seconds until
+        it is quiet (or ``max_delay`` has passed), and the whole burst is ingested
+        as one batch.
+        """
+        loop = asyncio.get_running_loop()
+        previous = await loop.run_in_executor(None, self._snapshot, folder_path)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            current = await loop.run_in_executor(None, self._snapshot, folder_path)
+            if current == previous:
+                continue
+
+            baseline = previous
+            burst_started = time.monotonic()
+            while time.monotonic() - burst_started < self.max_delay:
+                await asyncio.sleep(self.debounce)
+                latest = await loop.run_in_executor(None, self._snapshot, folder_path)
+                if latest == current:
+                    break
+                current = latest
+
+            changed = {path for path, signature in current.items() if baseline.get(path) != signature}
+            deleted = set(baseline) - set(current)
+            await self._sync(folder_path, changed, deleted)
+            previous = current
+
+    async def _sync(self, folder_path: str, changed: Set[str], deleted: Set[str]):
+        if not changed and not deleted:
+            return
+        root = Path(folder_path)
+        ingestion = asyncio.ensure_future(self.document_service.ingest_changes(
+            folder_path,
+            [str(root / path) for path in changed],
+            [str(root / path) for path in deleted]
+        ))
+        self._ingestions.add(ingestion)
+        ingestion.add_done_callback(self._ingestions.discard)
+        try:
+            # Shield so unwatching or stopping lets a started batch finish
+            counts = await asyncio.shield(ingestion)
+        except Exception as e:
+            logger.error(f"Error syncing changes in {folder_path}: {str(e)}", exc_info=True)
+            counts = {"failed": len(changed) + len(deleted)}
+
+        status = self._status.get(folder_path)
+        if status is not None:
+            status["batches"] += 1
+            status["last_sync"] = time.time()
+            for key, value in counts.items():
+                status[key] = status.get(key, 0) + value
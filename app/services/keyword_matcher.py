@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Bundled keyword sets; DOCUMENT_TYPE_KEYWORDS_FILE points at a replacement JSON file
+DEFAULT_KEYWORDS_FILE = Path(__file__).resolve().parent.parent / "data" / "document_type_keywords.json"
+KEYWORDS_FILE = os.getenv("DOCUMENT_TYPE_KEYWORDS_FILE", str(DEFAULT_KEYWORDS_FILE))
+
+DEFAULT_TYPE = "Other"
+
+def load_keywords(path: str = KEYWORDS_FILE) -> Dict[str, List[str]]:
+    """Load a ``{document type: [keywords]}`` mapping from a JSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not all(isinstance(v, list) for v in data.values()):
+        raise ValueError(f"Keyword file {path} must map document types to lists of keywords")
+    return {doc_type: [str(k) for k in keywords] for doc_type, keywords in data.items()}
+
+def _normalize(keyword: str) -> str:
+    """Lowercase a keyword and collapse internal whitespace."""
+    return " ".join(keyword.lower().split())
+
+def _trie_pattern(node: Dict) -> str:
+    """Render a character trie as a regex; cost per position is bounded by keyword length."""
+    terminal = "" in node
+    branches = []
+    for char in sorted(k for k in node if k):
+        head = r"\s+" if char == " " else re.escape(char)
+        branches.append(head + _trie_pattern(node[char]))
+
+    if not branches:
+        return ""
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    pattern = "(?:" + "|".join(branches) + ")"
+    return pattern + "?" if terminal else pattern
+
+class KeywordMatcher:
+    """Score text against keyword sets per document type in a single regex pass.
+
+    All keywords are compiled into one trie-shaped regex with word boundaries,
+    so matching is linear in the text length regardless of keyword count.
+    Results are cached by content hash rather than by the content itself.
+    """
+
+    def __init__(self, type_keywords: Optional[Dict[str, List[str]]] = None, cache_size: int = 1000):
+        self.type_keywords = type_keywords if type_keywords is not None else load_keywords()
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Map each normalized keyword to the document types it counts towards
+        self._keyword_types: Dict[str, List[str]] = {}
+        for doc_type, keywords in self.type_keywords.items():
+            for keyword in keywords:
+                normalized = _normalize(keyword)
+                if normalized:
+                    self._keyword_types.setdefault(normalized, []).append(doc_type)
+
+        trie: Dict = {}
+        for keyword in self._keyword_types:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        # Zero-width lookahead so overlapping keywords ("regards" in "best regards") all count
+        self._pattern = re.compile(r"\b(?=(" + _trie_pattern(trie) + r")\b)", re.IGNORECASE) if trie else None
+
+    def _score(self, content: str) -> Dict:
+        """Count the distinct keywords of each type present in the content."""
+        found = set()
+        if self._pattern is not None:
+            total = len(self._keyword_types)
+            for match in self._pattern.finditer(content):
+                found.add(_normalize(match.group(1)))
+                if len(found) == total:
+                    break
+
+        scores = {doc_type: 0 for doc_type in self.type_keywords}
+        for keyword in found:
+            for doc_type in self._keyword_types[keyword]:
+                scores[doc_type] += 1
+
+        # Ties go to the type listed first, as with the original keyword scan
+        best_type = DEFAULT_TYPE
+        best_score = 0
+        for doc_type, score in scores.items():
+            if score > best_score:
+                best_type = doc_type
+                best_score = score
+
+        total_score = sum(scores.values())
+        return {
+            "type": best_type,
+            "confidence": best_score / total_score if total_score else 0.0,
+            "scores": scores
+        }
+
+    def match(self, content: str) -> Dict:
+        """Return the best type, its confidence and per-type scores for the content."""
+        key = hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        result = self._score(content)
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
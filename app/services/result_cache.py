@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from backend.shared_store import SharedStore
+
+# Result cache bounds (override through environment variables)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "10000"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "86400"))
+# Every this many writes, expired results are purged from the shared store and its
+# namespace is trimmed to RESULT_CACHE_SIZE entries
+RESULT_CACHE_PURGE_INTERVAL = int(os.getenv("RESULT_CACHE_PURGE_INTERVAL", "1000"))
+
+_MISSING = object()
+
+logger = logging.getLogger(__name__)
+
+def content_key(content: str, model_version: str) -> str:
+    """Build a cache key from a content hash and the model version that produced the result."""
+    digest = hashlib.blake2b(content.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+    return f"{model_version}:{digest}"
+
+class AsyncResultCache:
+    """Bounded TTL cache for analysis results with single-flight deduplication.
+
+    Concurrent ``get_or_compute`` calls for the same key share one computation;
+    failures are propagated to every waiter and never cached. Cached values are
+    shared between callers and must be treated as read-only.
+
+    With a ``store``, results are also written to the store shared by all
+    worker processes, and a local miss is looked up there before computing;
+    values must then be JSON-serializable. The store's namespace is bounded
+    like the local cache: expired rows are purged and the oldest beyond
+    ``max_size`` deleted every ``purge_interval`` writes.
+    """
+
+    def __init__(
+        self,
+        max_size: int = RESULT_CACHE_SIZE,
+        ttl: float = RESULT_CACHE_TTL,
+        store: Optional[SharedStore] = None,
+        namespace: str = "analysis_results",
+        purge_interval: int = RESULT_CACHE_PURGE_INTERVAL
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.store = store
+        self.namespace = namespace
+        self.purge_interval = purge_interval
+        self._shared_writes = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Sync accessors are used from executor threads
+        self._lock = threading.Lock()
+        self._metrics = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "errors": 0,
+            "shared_hits": 0,
+            "shared_expirations": 0,
+            "shared_evictions": 0
+        }
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a fresh cached value, or ``default``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._metrics["hits"] += 1
+                    return value
+                del self._entries[key]
+                self._metrics["expirations"] += 1
+
+        value = self._get_shared(key)
+        with self._lock:
+            if value is _MISSING:
+                self._metrics["misses"] += 1
+                return default
+            self._metrics["hits"] += 1
+            self._metrics["shared_hits"] += 1
+        self._put_local(key, value)
+        return value
+
+    def put(self, key: str, value: Any):
+        """Store a value, evicting the least recently used entries beyond max_size."""
+        self._put_local(key, value)
+        if self.store is not None:
+            try:
+                self.store.put(self.namespace, key, value, ttl=self.ttl)
+            except Exception as e:
+                logger.warning("Cannot write result to the shared store: %s", e)
+                return
+            with self._lock:
+                self._shared_writes += 1
+                purge = self.purge_interval > 0 and self._shared_writes % self.purge_interval == 0
+            if purge:
+                self.purge_shared()
+
+    def purge_shared(self):
+        """Delete expired results from the shared store and trim its namespace to max_size entries."""
+        try:
+            expired = self.store.purge_expired()
+            evicted = self.store.prune(self.namespace, self.max_size)
+        except Exception as e:
+            logger.warning("Cannot purge the shared store: %s", e)
+            return
+        with self._lock:
+            self._metrics["shared_expirations"] += expired
+            self._metrics["shared_evictions"] += evicted
+
+    def _put_local(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._metrics["evictions"] += 1
+
+    def _get_shared(self, key: str) -> Any:
+        if self.store is None:
+            return _MISSING
+        try:
+            return self.store.get(self.namespace, key, _MISSING)
+        except Exception as e:
+            logger.warning("Cannot read result from the shared store: %s", e)
+            return _MISSING
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for ``key`` or compute it once for all concurrent callers."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._metrics["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+
+        # Shield so a cancelled caller does not cancel the shared computation
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        """Store a finished computation and release its in-flight slot."""
+        self._inflight.pop(key, None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self._metrics["errors"] += 1
+            return
+        self.put(key, task.result())
+
+    def clear(self):
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters, current size and hit ratio."""
+        with self._lock:
+            metrics = dict(self._metrics)
+            size = len(self._entries)
+        lookups = metrics["hits"] + metrics["misses"]
+        metrics.update(
+            size=size,
+            in_flight=len(self._inflight),
+            hit_ratio=metrics["hits"] / lookups if lookups else 0.0
+        )
+        return metrics
@@ -0,0 +1,225 @@
+import os
+import xml.etree.ElementTree as ElementTree
+from itertools import chain, repeat
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+POLARITY_TOLERANCE = 0.1
+LABEL_AGREEMENT = 0.9
+
+# Negations that can actually occur as tokens; TextBlob's tokenizer splits "n't"
+NEGATIONS = ("no", "not", "never")
+NEGATION_FACTOR = -0.5
+EXCLAMATION_BOOST = 1.25
+MODIFIER_POS = "RB"
+
+# Polarity thresholds for the positive/negative/neutral labels
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+
+# Tokenization: punctuation (including apostrophes, so "isn't" -> "isn", "t" as in
+# TextBlob's tokenizer) becomes whitespace, "!" becomes its own token and hyphenated
+# compounds stay whole; then the text is split on whitespace
+_PUNCTUATION = "\"#$%&'()*+,./:;<=>?@[\\]^_`{|}~\u2018\u2019\u201c\u201d\u2013\u2014\u2026\u00ab\u00bb"
+_TOKEN_TABLE = str.maketrans({**{c: " " for c in _PUNCTUATION}, "!": " ! "})
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens and exclamation marks."""
+    return text.lower().translate(_TOKEN_TABLE).split()
+
+def default_lexicon_path() -> str:
+    """Return the lexicon path: SENTIMENT_LEXICON_FILE or TextBlob's bundled en-sentiment.xml."""
+    path = os.getenv("SENTIMENT_LEXICON_FILE")
+    if path:
+        return path
+    import textblob
+    return os.path.join(os.path.dirname(textblob.__file__), "en", "en-sentiment.xml")
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / len(values)
+
+def load_lexicon(path: str, derive_adverbs: bool = True) -> Dict[str, tuple]:
+    """Load ``word -> (polarity, subjectivity, intensity, is_modifier)``.
+
+    Scores are averaged over senses per part of speech and then over parts of
+    speech, as pattern does for untagged text. With ``derive_adverbs`` every
+    adjective also yields an adverb ("terrible" -> "terribly") with the same
+    scores, as TextBlob's English lexicon does.
+    """
+    senses: Dict[str, Dict[Optional[str], List[tuple]]] = {}
+    for element in ElementTree.parse(path).getroot().iter("word"):
+        form = element.get("form")
+        if not form:
+            continue
+        senses.setdefault(form, {}).setdefault(element.get("pos"), []).append((
+            float(element.get("polarity", 0.0)),
+            float(element.get("subjectivity", 0.0)),
+            float(element.get("intensity", 1.0))
+        ))
+
+    words = {
+        form: {pos: tuple(_mean(column) for column in zip(*psi)) for pos, psi in by_pos.items()}
+        for form, by_pos in senses.items()
+    }
+    scores = {form: tuple(_mean(column) for column in zip(*by_pos.values())) for form, by_pos in words.items()}
+
+    if derive_adverbs:
+        for form, by_pos in list(words.items()):
+            if "JJ" not in by_pos:
+                continue
+            if form.endswith("y"):
+                form = form[:-1] + "i"
+            if form.endswith("le"):
+                form = form[:-2]
+            adverb = form + "ly"
+            words.setdefault(adverb, {})[MODIFIER_POS] = by_pos["JJ"]
+            scores[adverb] = by_pos["JJ"]
+
+    return {
+        form: scores[form] + (MODIFIER_POS in by_pos,)
+        for form, by_pos in words.items()
+    }
+
+def label_for(polarity: float) -> str:
+    """Map a polarity score to a sentiment label."""
+    if polarity > POSITIVE_THRESHOLD:
+        return "positive"
+    if polarity < NEGATIVE_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+class SentimentEngine:
+    """Score many documents at once against TextBlob's polarity/subjectivity lexicon.
+
+    All documents are tokenized up front and every token is mapped to an
+    integer id with one C-level dictionary lookup; scoring is then done on
+    NumPy arrays, with per-document averages computed by ``np.bincount``.
+
+    Like TextBlob's PatternAnalyzer, polarity and subjectivity are the mean
+    over the lexicon words found in a document; an adverb modifier ("very
+    good") scales the following word by its intensity instead of counting on
+    its own, a negation ("not good", "not a good") multiplies polarity by -0.5
+    and each "!" boosts the preceding assessment by 1.25. Emoticons, "(!)" and
+    modifier chains that skip over other words are ignored, so scores can differ
+    slightly from TextBlob. The documented tolerance is a mean absolute polarity
+    difference of at most ``POLARITY_TOLERANCE`` and a sentiment label agreement
+    of at least ``LABEL_AGREEMENT``; benchmarks/sentiment_benchmark.py checks both.
+    """
+
+    def __init__(self, lexicon: Optional[Dict[str, tuple]] = None):
+        self.lexicon = lexicon if lexicon is not None else load_lexicon(default_lexicon_path())
+
+        # Token ids: 0 = unknown word, then one id per lexicon word, negation,
+        # "!" and single-character word (which negations are retained across)
+        vocabulary = ["", "!"] + list(self.lexicon)
+        vocabulary += [w for w in NEGATIONS if w not in self.lexicon]
+        vocabulary += [c for c in "abcdefghijklmnopqrstuvwxyz0123456789" if c not in self.lexicon]
+        self._index = {word: i for i, word in enumerate(vocabulary)}
+
+        size = len(vocabulary)
+        self._polarity = np.zeros(size)
+        self._subjectivity = np.zeros(size)
+        self._intensity = np.ones(size)
+        self._known = np.zeros(size, dtype=bool)
+        self._modifier = np.zeros(size, dtype=bool)
+        for word, (polarity, subjectivity, intensity, is_modifier) in self.lexicon.items():
+            i = self._index[word]
+            self._polarity[i] = polarity
+            self._subjectivity[i] = subjectivity
+            self._intensity[i] = intensity
+            self._known[i] = True
+            self._modifier[i] = is_modifier
+        self._negation = np.array([word in NEGATIONS for word in vocabulary])
+        self._short = np.array([0 < len(word) <= 1 for word in vocabulary])
+        self._exclamation = np.array([word == "!" for word in vocabulary])
+
+    def score(self, texts: Sequence[str]) -> List[Dict[str, object]]:
+        """Return sentiment, polarity, subjectivity and confidence for each text."""
+        n_docs = len(texts)
+        token_lists = [tokenize(text) for text in texts]
+        counts = np.fromiter(map(len, token_lists), dtype=np.int64, count=n_docs)
+        n_tokens = int(counts.sum())
+        if n_tokens == 0:
+            return [self._result(0.0, 0.0) for _ in texts]
+
+        tokens = chain.from_iterable(token_lists)
+        ids = np.fromiter(map(self._index.get, tokens, repeat(0)), dtype=np.int64, count=n_tokens)
+        doc = np.repeat(np.arange(n_docs), counts)
+
+        def previous(values, steps=1):
+            """Shift values right by ``steps`` tokens; flags never cross document boundaries."""
+            shifted = np.zeros_like(values)
+            shifted[steps:] = values[:-steps]
+            if values.dtype == bool:
+                shifted[steps:] &= doc[steps:] == doc[:-steps]
+            return shifted
+
+        known = self._known[ids]
+        polarity = self._polarity[ids]
+        subjectivity = self._subjectivity[ids]
+        intensity = self._intensity[ids]
+        negation = self._negation[ids]
+
+        # A negation applies to the next word, or the word after a one-character word
+        negated = previous(negation) | (previous(negation, 2) & previous(self._short[ids] & ~known))
+
+        # A known modifier before a known word ("very good", "really not good")
+        # merges into one assessment hosted by the word
+        modifier = self._modifier[ids] & known
+        merged = known & previous(modifier)
+        merged_over_negation = known & ~merged & previous(negation & ~known) & previous(modifier, 2)
+        assessment = known.copy()
+        assessment[:-1] &= ~merged[1:]
+        assessment[:-2] &= ~merged_over_negation[2:]
+
+        # The word is scaled by the modifier's intensity, inverted when the modifier itself was negated
+        modifier_intensity = np.where(merged, previous(intensity), previous(intensity, 2))
+        inverted = np.divide(1.0, modifier_intensity, out=np.ones(n_tokens), where=modifier_intensity != 0)
+        factor = np.where(merged & previous(negated), inverted, modifier_intensity)
+        factor = np.where(merged | merged_over_negation, factor, 1.0)
+        polarity = np.clip(polarity * factor, -1.0, 1.0)
+        subjectivity = np.clip(subjectivity * factor, -1.0, 1.0)
+        negated = negated | (merged & previous(negated))
+
+        # Each "!" boosts the most recent assessment in the same document
+        exclamation = self._exclamation[ids]
+        if exclamation.any():
+            positions = np.arange(n_tokens)
+            last = np.maximum.accumulate(np.where(assessment, positions, -1))
+            targets = last[exclamation]
+            valid = (targets >= 0) & (doc[np.maximum(targets, 0)] == doc[exclamation])
+            boosts = np.bincount(targets[valid], minlength=n_tokens)
+            polarity = np.clip(polarity * EXCLAMATION_BOOST ** boosts, -1.0, 1.0)
+
+        polarity = np.where(negated, polarity * NEGATION_FACTOR, polarity)
+
+        weights = assessment.astype(float)
+        matches = np.bincount(doc, weights=weights, minlength=n_docs)
+        polarity_sum = np.bincount(doc, weights=polarity * weights, minlength=n_docs)
+        subjectivity_sum = np.bincount(doc, weights=subjectivity * weights, minlength=n_docs)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            polarities = np.where(matches > 0, polarity_sum / matches, 0.0)
+            subjectivities = np.where(matches > 0, subjectivity_sum / matches, 0.0)
+
+        return [self._result(float(p), float(s)) for p, s in zip(polarities, subjectivities)]
+
+    @staticmethod
+    def _result(polarity: float, subjectivity: float) -> Dict[str, object]:
+        """Build a result dict with the fields DocumentService.analyze_sentiment returns."""
+        return {
+            "sentiment": label_for(polarity),
+            "polarity": polarity,
+            "subjectivity": subjectivity,
+            "confidence": abs(polarity)
+        }
+
+_engine: Optional[SentimentEngine] = None
+
+def score_texts(texts: Sequence[str]) -> List[Dict[str, object]]:
+    """Score texts with a per-process engine; suitable as a process pool task."""
+    global _engine
+    if _engine is None:
+        _engine = SentimentEngine()
+    return _engine.score(texts)
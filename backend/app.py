@@ -1,30 +1,44 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
+from typing import List, Dict, Any, BinaryIO, Iterator, Optional, Tuple
 import os
 import json
 import magic
 from datetime import datetime
 import shutil
-# from mistralai.client import ChatMessage
-from mistralai import Mistral
 from dotenv import load_dotenv
 import asyncio
+import contextvars
+from contextlib import contextmanager
 from concurrent.futures import ThreadPoolExecutor
 import hashlib
 import pickle
 from pathlib import Path
-import docx
-import PyPDF2
 import csv
 import io
 import logging
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+import threading
+import time
+import uuid
+from functools import lru_cache
+from archives import ARCHIVE_WORKERS, ArchiveError, ArchiveLimitError, ArchiveMember, ArchiveReader, archive_level, is_archive
+from chunking import CHUNK_SIZE, MAX_CHUNKS, split_into_chunks
+from file_scanner import FolderFingerprint, ScanEntry, ScanRules, folder_fingerprint, list_directory, scan_directory_async
+from local_classifier import LOCAL_CLASSIFIER_THRESHOLD, LocalClassifier, load_local_classifier, model_version
+from metrics import (
+    CacheStats, IN_FLIGHT, LOCAL_CLASSIFIER_DECISIONS, collect_timings, observe_stage, record_mistral_request,
+    render_metrics, stage_timer, track_queue
+)
+from profiling import RequestProfiler, current_profiler, parse_profile_mode
+from log_config import configure_logging, sampled
+from shared_store import get_shared_store, worker_id
+from responses import (
+    CompressionMiddleware, FastJSONResponse, is_not_modified, make_etag, not_modified, validator_headers
 )
+from snapshots import GROUP_COLUMNS, SORT_COLUMNS, Snapshot, load_snapshot, save_snapshot
+
+# Configure logging (JSON lines written by a background thread; see log_config)
+log_handler = configure_logging()
 logger = logging.getLogger(__name__)
 
 # Load environment variables
@@ -33,7 +47,8 @@ load_dotenv()
 app = FastAPI(
     title="Document Analysis API",
     description="API for analyzing and classifying documents using AI",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS
@@ -44,18 +59,45 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# brotli or gzip, as negotiated with the client (see responses.py)
+app.add_middleware(CompressionMiddleware)
 
-# Initialize Mistral client
+# The Mistral client is created on first use, so the API starts (and serves
+# cached classifications) without MISTRAL_API_KEY
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
-if not MISTRAL_API_KEY:
-    raise ValueError("MISTRAL_API_KEY environment variable is not set")
 
-mistral_client = Mistral(api_key=MISTRAL_API_KEY)
+@lru_cache(maxsize=1)
+def get_mistral_client():
+    """Create the Mistral client on first use."""
+    if not MISTRAL_API_KEY:
+        raise RuntimeError("MISTRAL_API_KEY environment variable is not set")
+    from mistralai import Mistral
+    # MISTRAL_SERVER_URL points the client at another endpoint, e.g. the benchmark's stub server
+    return Mistral(api_key=MISTRAL_API_KEY, server_url=os.getenv("MISTRAL_SERVER_URL") or None)
+
+@lru_cache(maxsize=1)
+def get_local_classifier() -> Optional[LocalClassifier]:
+    """Load the local first-stage classifier on first use; None until one is trained (see local_classifier.py)."""
+    return load_local_classifier()
 
 # Create cache directory
 CACHE_DIR = Path("cache")
 CACHE_DIR.mkdir(exist_ok=True)
 
+# Job leases and pointers to the latest analysis snapshots are shared by all workers
+# through get_shared_store() (see shared_store.py); the snapshots themselves are
+# columnar files (see snapshots.py)
+# A worker holding an analysis lease renews it every third of this many seconds
+ANALYSIS_LEASE_SECONDS = float(os.getenv("ANALYSIS_LEASE_SECONDS", "30"))
+ANALYSIS_POLL_INTERVAL = float(os.getenv("ANALYSIS_POLL_INTERVAL", "0.5"))
+ANALYSIS_WAIT_TIMEOUT = float(os.getenv("ANALYSIS_WAIT_TIMEOUT", "900"))
+# Seconds shutdown waits for running analyses
+DRAIN_TIMEOUT = float(os.getenv("DRAIN_TIMEOUT", "30"))
+draining = False
+active_analyses = 0
+# Analyses running in this worker, by folder; identical requests share one
+analysis_jobs: Dict[str, "asyncio.Task[Snapshot]"] = {}
+
 # Classification prompt in English
 CLASSIFICATION_PROMPT = """You are a document classification expert. Analyze the following text and determine its main subject or theme.
 Return only the main subject as a single word or short phrase (maximum 3 words), without any additional text or explanation.
@@ -69,74 +111,106 @@ Text:
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# Maximum text length for classification (to avoid processing very large files)
-MAX_TEXT_LENGTH = 5000
+# Long documents are classified in chunks of at most CHUNK_SIZE characters; at most
+# MAX_CHUNKS evenly spaced chunks (one Mistral request each) are used per document
+# (see chunking.py, shared with the app services)
+MAX_TEXT_LENGTH = CHUNK_SIZE
+# Maximum text extracted from a single file
+MAX_EXTRACT_LENGTH = int(os.getenv("MAX_EXTRACT_LENGTH", "200000"))
+# Bytes of in-memory content given to libmagic, as much as it reads from a file by default
+MAGIC_BUFFER_SIZE = 1024 * 1024
+
+# Part of every ETag, with the settings that change classifications; bump it to
+# make clients refetch analyses of unchanged folders
+CACHE_VERSION = os.getenv("CACHE_VERSION", "1")
+ANALYSIS_VERSION = ":".join([
+    CACHE_VERSION, str(MAX_CHUNKS), str(MAX_TEXT_LENGTH),
+    hashlib.sha1(CLASSIFICATION_PROMPT.encode("utf-8")).hexdigest()[:8],
+    str(LOCAL_CLASSIFIER_THRESHOLD), model_version()
+])
+
+# Shared pool for classifying the chunks of one document in parallel
+chunk_executor = ThreadPoolExecutor(max_workers=int(os.getenv("CHUNK_WORKERS", "8")))
+track_queue("chunk_executor", lambda: chunk_executor._work_queue.qsize())
+track_queue("log_records", log_handler.queue.qsize)
+
+classification_cache_stats = CacheStats("classification")
+local_answered = LOCAL_CLASSIFIER_DECISIONS.labels("answered")
+local_escalated = LOCAL_CLASSIFIER_DECISIONS.labels("escalated")
+files_in_flight = IN_FLIGHT.labels("process_file")
 
 def get_file_type(file_path: str) -> str:
     """Get the file extension in uppercase."""
     return os.path.splitext(file_path)[1].upper().lstrip('.')
 
-def extract_text_from_docx(file_path: str) -> str:
+def _open_binary(file_path: str, data: Optional[bytes] = None) -> BinaryIO:
+    """Open a file for reading, or wrap its content when it is already in memory (an archive member)."""
+    return io.BytesIO(data) if data is not None else open(file_path, 'rb')
+
+def extract_text_from_docx(file_path: str, data: Optional[bytes] = None) -> str:
     """Extract text from DOCX files."""
     try:
-        doc = docx.Document(file_path)
+        import docx
+        with _open_binary(file_path, data) as file:
+            doc = docx.Document(file)
         text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-        return text[:MAX_TEXT_LENGTH]
+        return text[:MAX_EXTRACT_LENGTH]
     except Exception as e:
         logger.error(f"Error extracting text from DOCX {file_path}: {str(e)}")
         return ""
 
-def extract_text_from_pdf(file_path: str) -> str:
+def extract_text_from_pdf(file_path: str, data: Optional[bytes] = None) -> str:
     """Extract text from PDF files."""
     try:
+        import PyPDF2
         text = ""
-        with open(file_path, 'rb') as file:
+        with _open_binary(file_path, data) as file:
             pdf_reader = PyPDF2.PdfReader(file)
             for page in pdf_reader.pages:
                 text += page.extract_text() + "\n"
-                if len(text) >= MAX_TEXT_LENGTH:
+                if len(text) >= MAX_EXTRACT_LENGTH:
                     break
-        return text[:MAX_TEXT_LENGTH]
+        return text[:MAX_EXTRACT_LENGTH]
     except Exception as e:
         logger.error(f"Error extracting text from PDF {file_path}: {str(e)}")
         return ""
 
-def extract_text_from_csv(file_path: str) -> str:
+def extract_text_from_csv(file_path: str, data: Optional[bytes] = None) -> str:
     """Extract text from CSV files."""
     try:
         text = ""
-        with open(file_path, 'r', encoding='utf-8') as file:
+        with io.TextIOWrapper(_open_binary(file_path, data), encoding='utf-8') as file:
             csv_reader = csv.reader(file)
             for row in csv_reader:
                 text += " ".join(row) + "\n"
-                if len(text) >= MAX_TEXT_LENGTH:
+                if len(text) >= MAX_EXTRACT_LENGTH:
                     break
-        return text[:MAX_TEXT_LENGTH]
+        return text[:MAX_EXTRACT_LENGTH]
     except Exception as e:
         logger.error(f"Error extracting text from CSV {file_path}: {str(e)}")
         return ""
 
-def read_text_file(file_path: str) -> str:
+def read_text_file(file_path: str, data: Optional[bytes] = None) -> str:
     """Read text content from a file with length limit."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read(MAX_TEXT_LENGTH)
+        with io.TextIOWrapper(_open_binary(file_path, data), encoding='utf-8') as f:
+            content = f.read(MAX_EXTRACT_LENGTH)
             return content
     except UnicodeDecodeError:
         logger.error(f"Unicode decode error for file {file_path}")
         return ""
 
-def extract_text_content(file_path: str, mime_type: str) -> str:
-    """Extract text content from various file types."""
+def extract_text_content(file_path: str, mime_type: str, data: Optional[bytes] = None) -> str:
+    """Extract text content from various file types; ``data`` is the content when it is not on disk."""
     if mime_type.startswith('text/'):
-        return read_text_file(file_path)
+        return read_text_file(file_path, data)
     elif mime_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-        return extract_text_from_docx(file_path)
+        return extract_text_from_docx(file_path, data)
     elif mime_type == 'application/pdf':
-        return extract_text_from_pdf(file_path)
+        return extract_text_from_pdf(file_path, data)
     elif mime_type == 'text/csv':
-        return extract_text_from_csv(file_path)
-    logger.warning(f"Unsupported file type: {mime_type} for {file_path}")
+        return extract_text_from_csv(file_path, data)
+    logger.warning("Unsupported file type: %s for %s", mime_type, file_path)
     return ""
 
 def get_cache_key(text: str, file_path: str) -> str:
@@ -152,25 +226,87 @@ def get_cached_classification(text: str, file_path: str) -> Dict[str, Any]:
     if cache_file.exists():
         try:
             with open(cache_file, 'rb') as f:
-                return pickle.load(f)
+                result = pickle.load(f)
+            classification_cache_stats.record(hit=True)
+            result.pop("text", None)
+            return result
         except Exception as e:
-            logger.error(f"Error reading cache for {file_path}: {str(e)}")
-            return None
+            logger.error("Error reading cache for %s: %s", file_path, e)
+    classification_cache_stats.record(hit=False)
     return None
 
 def save_to_cache(text: str, file_path: str, classification: Dict[str, Any]):
-    """Save classification to cache."""
+    """Save classification to cache, with the text it was made from as a training example for the local classifier."""
     cache_key = get_cache_key(text, file_path)
     cache_file = CACHE_DIR / f"{cache_key}.pkl"
     
     try:
-        with open(cache_file, 'wb') as f:
-            pickle.dump(classification, f)
+        # Write to a temporary file and rename, so other workers never read a partial entry
+        temp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        with open(temp_file, 'wb') as f:
+            pickle.dump(dict(classification, text=text), f)
+        os.replace(temp_file, cache_file)
     except Exception as e:
-        logger.error(f"Error saving to cache for {file_path}: {str(e)}")
+        logger.error("Error saving to cache for %s: %s", file_path, e)
+
+def aggregate_classifications(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine chunk classifications by confidence-weighted vote.
+
+    The confidence is the winning category's summed confidence divided by the
+    number of chunks, so it drops when chunks disagree.
+    """
+    classified = [r for r in results if r["category"] != "No subject"]
+    if not classified:
+        return {"category": "No subject", "confidence": 0.5, "chunks": len(results)}
+
+    votes = {}
+    labels = {}
+    for result in classified:
+        key = result["category"].strip().lower()
+        votes[key] = votes.get(key, 0.0) + result.get("confidence", 0.5)
+        labels.setdefault(key, result["category"])
+
+    # Ties go to the category seen first, i.e. earliest in the document
+    winner = max(votes, key=votes.get)
+    return {
+        "category": labels[winner],
+        "confidence": votes[winner] / len(results),
+        "chunks": len(results),
+        # A document counts as escalated when any of its chunks went to Mistral
+        "classifier": "local" if all(r.get("classifier") == "local" for r in classified) else "mistral"
+    }
 
 def classify_document(text: str, file_path: str) -> Dict[str, Any]:
-    """Classify document using Mistral AI with caching."""
+    """Classify a document, splitting long text into chunks classified in parallel."""
+    chunks = split_into_chunks(text)
+    if len(chunks) <= 1:
+        result = dict(classify_chunk(chunks[0] if chunks else text, file_path))
+        result["chunks"] = len(chunks)
+        return result
+
+    # Run each chunk in a copy of the caller's context so per-request profiling sees it
+    contexts = [contextvars.copy_context() for _ in chunks]
+    results = list(chunk_executor.map(
+        lambda context, chunk: context.run(classify_chunk, chunk, file_path), contexts, chunks
+    ))
+    classification = aggregate_classifications(results)
+    logger.debug("Combined %d chunk classifications for %s: %s", len(chunks), file_path, classification["category"])
+    return classification
+
+def classify_locally(text: str) -> Optional[Dict[str, Any]]:
+    """The local classifier's answer for a chunk, or None when it has no model or is not confident enough."""
+    model = get_local_classifier()
+    if model is None:
+        return None
+    category, confidence = model.predict(text[:MAX_TEXT_LENGTH])
+    if confidence < LOCAL_CLASSIFIER_THRESHOLD:
+        local_escalated.inc()
+        return None
+    local_answered.inc()
+    return {"category": category, "confidence": confidence, "classifier": "local"}
+
+def classify_chunk(text: str, file_path: str) -> Dict[str, Any]:
+    """Classify a piece of document text from the cache, the local classifier or, failing both, Mistral AI."""
     if not text.strip():
         return {
             "category": "No subject",
@@ -180,40 +316,53 @@ def classify_document(text: str, file_path: str) -> Dict[str, Any]:
     # Check cache first
     cached_result = get_cached_classification(text, file_path)
     if cached_result:
-        logger.info(f"Using cached classification for {file_path}")
+        logger.debug("Using cached classification for %s", file_path)
+        cached_result.setdefault("classifier", "mistral")
         return cached_result
+
+    local_result = classify_locally(text)
+    if local_result:
+        return local_result
     
     try:
         # Format the prompt with the text
         formatted_prompt = CLASSIFICATION_PROMPT.format(text=text[:MAX_TEXT_LENGTH])
         
-        logger.info(f"Sending text to Mistral AI for {file_path}")
-        chat_response = mistral_client.chat.complete(
-            model="mistral-large-latest",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a document classification expert. Your task is to analyze text and return only the main subject as a single word or short phrase (max 3 words)."
-                },
-                {
-                    "role": "user",
-                    "content": formatted_prompt
-                }
-            ],
-            temperature=0.3  # Lower temperature for more consistent results
-        )
+        client = get_mistral_client()
+        logger.debug("Sending text to Mistral AI for %s", file_path)
+        request_started = time.perf_counter()
+        try:
+            chat_response = client.chat.complete(
+                model="mistral-large-latest",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are a document classification expert. Your task is to analyze text and return only the main subject as a single word or short phrase (max 3 words)."
+                    },
+                    {
+                        "role": "user",
+                        "content": formatted_prompt
+                    }
+                ],
+                temperature=0.3  # Lower temperature for more consistent results
+            )
+        except Exception as e:
+            record_mistral_request(time.perf_counter() - request_started, e)
+            raise
+        record_mistral_request(time.perf_counter() - request_started)
         
         # Extract the classification from the response
         raw_response = chat_response.choices[0].message.content.strip()
-        logger.info(f"Raw AI response for {file_path}: {raw_response}")
+        logger.debug("Raw AI response for %s: %s", file_path, raw_response)
         
         # Clean up the classification (remove any extra text or punctuation)
         classification = raw_response.split('\n')[0].strip('.,!?')
-        logger.info(f"Cleaned classification for {file_path}: {classification}")
+        logger.debug("Cleaned classification for %s: %s", file_path, classification)
         
         result = {
             "category": classification,
-            "confidence": 0.8  # Default confidence since Mistral doesn't provide it
+            "confidence": 0.8,  # Default confidence since Mistral doesn't provide it
+            "classifier": "mistral"
         }
         
         # Save to cache
@@ -221,47 +370,300 @@ def classify_document(text: str, file_path: str) -> Dict[str, Any]:
         return result
         
     except Exception as e:
-        logger.error(f"Error classifying document {file_path}: {str(e)}")
+        logger.error("Error classifying document %s: %s", file_path, e)
         return {
             "category": "No subject",
             "confidence": 0.5
         }
 
-async def process_file(file_path: str) -> Dict[str, Any]:
-    """Process a single file asynchronously."""
+async def process_file(
+    file_path: str,
+    entry: Optional[ScanEntry] = None,
+    profile: bool = False,
+    data: Optional[bytes] = None
+) -> Dict[str, Any]:
+    """Process a single file asynchronously.
+
+    When the file comes from the scanner, its cached size and mtime are used
+    instead of statting the file again. ``data`` is the file content when it
+    is not on disk (an archive member). With ``profile`` the result includes
+    the time spent in each stage in milliseconds.
+    """
+    if not profile:
+        return await _process_file(file_path, entry, data)
+
+    started = time.perf_counter()
+    with collect_timings() as timings:
+        result = await _process_file(file_path, entry, data)
+    result["profile"] = {
+        "total_ms": (time.perf_counter() - started) * 1000,
+        "stages_ms": {stage: seconds * 1000 for stage, seconds in timings.items()}
+    }
+    return result
+
+async def _process_file(file_path: str, entry: Optional[ScanEntry], data: Optional[bytes] = None) -> Dict[str, Any]:
+    files_in_flight.inc()
     try:
-        file_size = os.path.getsize(file_path)
+        file_size = entry.size if entry else os.path.getsize(file_path)
+        modified_at = entry.modified_at if entry else os.path.getmtime(file_path)
         file_type = get_file_type(file_path)
         
         # Extract and classify text content
         classification = None
-        mime_type = magic.Magic(mime=True).from_file(file_path)
-        text_content = extract_text_content(file_path, mime_type)
+        with stage_timer("type_detection"):
+            if data is not None:
+                mime_type = magic.Magic(mime=True).from_buffer(data[:MAGIC_BUFFER_SIZE])
+            else:
+                mime_type = magic.Magic(mime=True).from_file(file_path)
+        with stage_timer("extraction"):
+            text_content = extract_text_content(file_path, mime_type, data)
         
         if text_content:
             # Run classification in a thread pool to avoid blocking
             loop = asyncio.get_event_loop()
+            profiler = current_profiler.get()
+            classify = profiler.wrap(classify_document) if profiler else classify_document
             with ThreadPoolExecutor() as pool:
-                classification = await loop.run_in_executor(pool, classify_document, text_content, file_path)
-                logger.info(f"Final classification for {file_path}: {classification['category']}")
+                with stage_timer("classification"):
+                    classification = await loop.run_in_executor(
+                        pool, contextvars.copy_context().run, classify, text_content, file_path
+                    )
+                logger.info(
+                    "Final classification for %s: %s", file_path, classification["category"],
+                    extra=sampled(file=file_path, category=classification["category"])
+                )
         
         return {
             "filename": os.path.basename(file_path),
             "file_type": file_type,
             "size": file_size,
-            "modified_at": datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat(),
+            "modified_at": datetime.fromtimestamp(modified_at).isoformat(),
             "classification": classification
         }
     except Exception as e:
-        logger.error(f"Error processing file {file_path}: {str(e)}")
+        logger.error("Error processing file %s: %s", file_path, e)
         return {
             "filename": os.path.basename(file_path),
             "error": str(e)
         }
+    finally:
+        files_in_flight.dec()
+
+async def process_archive(archive_path: str, profile: bool = False) -> List[Dict[str, Any]]:
+    """Process the members of a ZIP or TAR archive without extracting it to disk.
+
+    A thread decompresses the members one at a time into a bounded queue and
+    ARCHIVE_WORKERS tasks process them from memory as they arrive, so only a
+    few members are held at once. Members are named by their path inside the
+    archive (``<archive>/<member>``) and returned in archive order.
+    """
+    loop = asyncio.get_running_loop()
+    members: asyncio.Queue = asyncio.Queue(maxsize=ARCHIVE_WORKERS)
+    documents: Dict[int, Dict[str, Any]] = {}
+    rules = ScanRules()
+    cancelled = threading.Event()
+
+    def produce():
+        reader = ArchiveReader(archive_path)
+        started = time.perf_counter()
+        for position, (member, data) in enumerate(reader.read_members()):
+            read_seconds = time.perf_counter() - started
+            observe_stage("archive_read", read_seconds)
+            if cancelled.is_set():
+                break
+            if not rules.skip_relative_path(member.name.replace("/", os.sep)) and not rules.skip_size(member.size):
+                asyncio.run_coroutine_threadsafe(
+                    members.put((position, member, data, read_seconds)), loop
+                ).result()
+            started = time.perf_counter()
+
+    async def consume():
+        while True:
+            item = await members.get()
+            if item is None:
+                return
+            position, member, data, read_seconds = item
+            documents[position] = await process_archive_member(archive_path, member, data, read_seconds, profile)
+
+    producer = loop.run_in_executor(None, produce)
+    workers = [asyncio.ensure_future(consume()) for _ in range(ARCHIVE_WORKERS)]
+    try:
+        await producer
+        for _ in workers:
+            await members.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        # Unblock a producer waiting on the full queue, so it sees the cancellation and stops
+        cancelled.set()
+        for worker in workers:
+            worker.cancel()
+        while not members.empty():
+            members.get_nowait()
+    return [documents[position] for position in sorted(documents)]
+
+async def process_archive_member(
+    archive_path: str,
+    member: ArchiveMember,
+    data: bytes,
+    read_seconds: float = 0.0,
+    profile: bool = False
+) -> Dict[str, Any]:
+    """Process one decompressed archive member like a file found by the scanner."""
+    name = member.name.replace("/", os.sep)
+    member_path = os.path.join(archive_path, name)
+    entry = ScanEntry(member_path, name, os.path.basename(name), False, member.size, member.modified_at)
+    result = await process_file(member_path, entry, profile, data)
+    if profile and "profile" in result:
+        result["profile"]["total_ms"] += read_seconds * 1000
+        result["profile"]["stages_ms"]["archive_read"] = read_seconds * 1000
+    return result
 
 @app.post("/api/analyze-folder")
-async def analyze_folder(folder_path: str):
-    """Analyze all documents in a folder."""
+async def analyze_folder(
+    folder_path: str,
+    include_documents: bool = True,
+    profile: Optional[str] = None,
+    x_profile: Optional[str] = Header(None)
+):
+    """Analyze all documents in a folder.
+
+    ``include_documents=false`` returns only the summary; the documents can
+    then be paged through ``/api/snapshot/documents``. Profiling is opt-in: ``?profile=1`` (or an ``X-Profile: 1`` header) adds a
+    per-file, per-stage timing breakdown to the response; ``cprofile`` also
+    returns a cProfile report for the request and dumps it to PROFILE_DIR.
+    """
+    profile_mode = parse_profile_mode(profile, x_profile)
+    if profile_mode is None:
+        snapshot = await run_analysis_job(folder_path)
+        return FastJSONResponse(snapshot.to_result(include_documents))
+
+    profiler = RequestProfiler("analyze-folder") if profile_mode == "cprofile" else None
+    token = current_profiler.set(profiler)
+    started = time.perf_counter()
+    try:
+        if profiler:
+            profiler.start()
+        with collect_timings() as timings:
+            result = await _analyze_folder(folder_path, profile=True)
+    finally:
+        current_profiler.reset(token)
+        report = profiler.stop() if profiler else None
+
+    files = [doc for doc in result["documents"] if "profile" in doc]
+    result["profile"] = {
+        "mode": profile_mode,
+        "total_ms": (time.perf_counter() - started) * 1000,
+        "scan_ms": timings.get("scan", 0.0) * 1000,
+        "stages_ms": {
+            stage: sum(doc["profile"]["stages_ms"].get(stage, 0.0) for doc in files)
+            for stage in sorted({stage for doc in files for stage in doc["profile"]["stages_ms"]})
+        },
+        "slowest_files": [
+            {"filename": doc["filename"], "total_ms": doc["profile"]["total_ms"]}
+            for doc in sorted(files, key=lambda doc: doc["profile"]["total_ms"], reverse=True)[:10]
+        ]
+    }
+    if report:
+        result["profile"]["cprofile"] = report
+    return FastJSONResponse(result)
+
+async def run_analysis_job(folder_path: str, fingerprint: Optional[FolderFingerprint] = None) -> Snapshot:
+    """Analyze a folder once across all workers.
+
+    Given the folder's current ``fingerprint``, the latest snapshot is returned
+    without any analysis when it was built from the folder in that state.
+    Concurrent requests for the same folder in one worker share a single job.
+    The job that takes the folder's lease runs the analysis, saves it as the
+    folder's columnar snapshot and records it in the shared store; jobs in
+    other workers meanwhile wait for that snapshot instead of analyzing the
+    folder again. If the lease holder dies, its lease expires and a waiting
+    worker takes over.
+    """
+    if draining:
+        raise HTTPException(status_code=503, detail="Server is shutting down")
+    key = os.path.abspath(folder_path)
+    if fingerprint is not None:
+        snapshot = _current_snapshot(key, fingerprint)
+        if snapshot is not None:
+            return snapshot
+    job = analysis_jobs.get(key)
+    if job is None:
+        job = analysis_jobs[key] = asyncio.ensure_future(_run_analysis_job(folder_path, key))
+        job.add_done_callback(lambda _: analysis_jobs.pop(key, None))
+    # Shield so a disconnected client does not cancel the job other requests wait for
+    return await asyncio.shield(job)
+
+async def _run_analysis_job(folder_path: str, key: str) -> Snapshot:
+    lease = f"analysis:{key}"
+    # Each job owns the lease under its own name, so another job in this worker never shares it
+    owner = f"{worker_id()}:{uuid.uuid4().hex}"
+    requested_at = time.time()
+    with track_analysis():
+        while not get_shared_store().acquire(lease, ANALYSIS_LEASE_SECONDS, owner):
+            await asyncio.sleep(ANALYSIS_POLL_INTERVAL)
+            snapshot = _fresh_snapshot(key, requested_at)
+            if snapshot is not None:
+                return snapshot
+            if time.time() - requested_at > ANALYSIS_WAIT_TIMEOUT:
+                raise HTTPException(status_code=504, detail="Timed out waiting for another worker's analysis")
+
+        renewal = asyncio.ensure_future(_renew_lease(lease, owner))
+        try:
+            # Another worker may have finished the analysis while this one waited for the lease
+            snapshot = _fresh_snapshot(key, requested_at)
+            if snapshot is not None:
+                return snapshot
+            # Taken before the scan, so a change made during the analysis makes the snapshot stale
+            try:
+                fingerprint = await get_folder_fingerprint(folder_path)
+            except OSError:
+                fingerprint = None
+            result = await _analyze_folder(folder_path)
+            snapshot = Snapshot.from_documents(
+                key, result["documents"], result, _snapshot_source(fingerprint) if fingerprint else None
+            )
+            path = await asyncio.get_running_loop().run_in_executor(None, save_snapshot, snapshot)
+            get_shared_store().put("snapshots", key, {"path": str(path), "documents": len(snapshot)})
+            return snapshot
+        finally:
+            renewal.cancel()
+            get_shared_store().release(lease, owner)
+
+def _snapshot_source(fingerprint: FolderFingerprint) -> List[Any]:
+    """What a snapshot was built from: the folder's fingerprint and the analysis version."""
+    return [*fingerprint, ANALYSIS_VERSION]
+
+def _current_snapshot(key: str, fingerprint: FolderFingerprint) -> Optional[Snapshot]:
+    """The folder's snapshot if it was built from the folder as ``fingerprint`` describes it."""
+    snapshot = load_snapshot(key)
+    if snapshot is None or snapshot.meta.get("source") != _snapshot_source(fingerprint):
+        return None
+    return snapshot
+
+def _fresh_snapshot(key: str, requested_at: float) -> Optional[Snapshot]:
+    """The folder's snapshot if it was recorded after ``requested_at``."""
+    entry = get_shared_store().get_with_time("snapshots", key)
+    if entry is None or entry[1] < requested_at:
+        return None
+    return load_snapshot(key)
+
+async def _renew_lease(lease: str, owner: str):
+    """Keep a lease while its job runs."""
+    while True:
+        await asyncio.sleep(ANALYSIS_LEASE_SECONDS / 3)
+        get_shared_store().acquire(lease, ANALYSIS_LEASE_SECONDS, owner)
+
+@contextmanager
+def track_analysis() -> Iterator[None]:
+    """Count an analysis as in flight so shutdown can wait for it."""
+    global active_analyses
+    active_analyses += 1
+    try:
+        yield
+    finally:
+        active_analyses -= 1
+
+async def _analyze_folder(folder_path: str, profile: bool = False):
     try:
         if not os.path.exists(folder_path):
             raise HTTPException(status_code=404, detail="Folder not found")
@@ -272,18 +674,18 @@ async def analyze_folder(folder_path: str):
         classification_distribution = {}
         last_modified = None
         
-        # Collect all files first
-        files_to_process = []
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                files_to_process.append(file_path)
-        
-        logger.info(f"Processing {len(files_to_process)} files...")
-        
-        # Process files concurrently
-        tasks = [process_file(file_path) for file_path in files_to_process]
-        documents = await asyncio.gather(*tasks)
+        if is_archive(folder_path):
+            documents = await process_archive(folder_path, profile)
+        else:
+            # Start processing each file as soon as the scanner yields it
+            tasks = []
+            scan_started = time.perf_counter()
+            async for entry in scan_directory_async(folder_path, include_dirs=False):
+                tasks.append(asyncio.ensure_future(process_file(entry.path, entry, profile)))
+            observe_stage("scan", time.perf_counter() - scan_started)
+
+            logger.info("Processing %d files...", len(tasks))
+            documents = await asyncio.gather(*tasks)
         
         # Process results
         for doc in documents:
@@ -331,6 +733,14 @@ async def analyze_folder(folder_path: str):
                 classified_docs += 1
         
         avg_confidence = total_confidence / classified_docs if classified_docs > 0 else 0
+
+        # Count documents the local classifier answered and those escalated to Mistral (or its cache)
+        classifier_counts = {"local": 0, "mistral": 0}
+        for doc in documents:
+            classifier = (doc.get("classification") or {}).get("classifier")
+            if classifier in classifier_counts:
+                classifier_counts[classifier] += 1
+        routed_docs = classifier_counts["local"] + classifier_counts["mistral"]
         
         return {
             "total_documents": total_files,
@@ -341,22 +751,61 @@ async def analyze_folder(folder_path: str):
             "classification_distribution": classification_distribution,
             "most_common_classification": most_common_classification,
             "average_classification_confidence": avg_confidence,
+            "local_classifier": {
+                "enabled": get_local_classifier() is not None,
+                "threshold": LOCAL_CLASSIFIER_THRESHOLD,
+                "local_documents": classifier_counts["local"],
+                "escalated_documents": classifier_counts["mistral"],
+                "escalation_rate": classifier_counts["mistral"] / routed_docs if routed_docs else None
+            },
             "documents": documents
         }
         
+    except HTTPException:
+        raise
+    except ArchiveError as e:
+        logger.error(f"Rejected archive {folder_path}: {str(e)}")
+        raise HTTPException(status_code=413 if isinstance(e, ArchiveLimitError) else 400, detail=str(e))
     except Exception as e:
         logger.error(f"Error analyzing folder: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def get_folder_fingerprint(folder_path: str) -> FolderFingerprint:
+    """Fingerprint a folder with a stat-only scan, off the event loop."""
+    started = time.perf_counter()
+    fingerprint = await asyncio.get_running_loop().run_in_executor(None, folder_fingerprint, folder_path)
+    observe_stage("fingerprint", time.perf_counter() - started)
+    return fingerprint
+
+def folder_validators(folder_path: str, representation: str, fingerprint: FolderFingerprint) -> Tuple[str, float]:
+    """ETag and Last-Modified time of a response about a folder, from the folder's fingerprint."""
+    etag = make_etag(representation, os.path.abspath(folder_path), *fingerprint, ANALYSIS_VERSION)
+    return etag, fingerprint.modified_at
+
 @app.get("/api/folder-insights")
-async def get_folder_insights(folder_path: str):
-    """Get insights for a folder."""
+async def get_folder_insights(
+    folder_path: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None)
+):
+    """Get insights for a folder.
+
+    The response carries an ETag and Last-Modified derived from the folder's
+    file count, total size and newest modification time; a conditional request
+    for an unchanged folder gets 304 Not Modified without any analysis.
+    """
     try:
         if not os.path.exists(folder_path):
             raise HTTPException(status_code=404, detail="Folder not found")
-            
-        # Get full analysis
-        analysis = await analyze_folder(folder_path)
+
+        fingerprint = await get_folder_fingerprint(folder_path)
+        etag, last_modified = folder_validators(folder_path, "folder-insights", fingerprint)
+        headers = validator_headers(etag, last_modified)
+        if is_not_modified(etag, last_modified, if_none_match, if_modified_since):
+            return not_modified(headers)
+
+        # Get the analysis summary; the latest snapshot is used when the folder has not changed since
+        analysis = (await run_analysis_job(folder_path, fingerprint)).summary
         
         # Calculate additional insights
         total_files = analysis["total_documents"]
@@ -382,7 +831,7 @@ async def get_folder_insights(folder_path: str):
             for category, count in classification_distribution.items()
         }
         
-        return {
+        return FastJSONResponse({
             "summary": {
                 "total_documents": total_files,
                 "total_size": total_size,
@@ -393,32 +842,231 @@ async def get_folder_insights(folder_path: str):
                 "most_common_classification": analysis["most_common_classification"],
                 "average_classification_confidence": analysis["average_classification_confidence"]
             }
-        }
+        }, headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting folder insights: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def get_snapshot(folder_path: str) -> Snapshot:
+    snapshot = load_snapshot(folder_path)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Folder has not been analyzed")
+    return snapshot
+
+@app.get("/api/snapshot")
+async def describe_snapshot(folder_path: str):
+    """Summary and metadata of a folder's latest analysis, without its documents."""
+    return get_snapshot(folder_path).describe()
+
+@app.get("/api/snapshot/documents")
+async def list_snapshot_documents(
+    folder_path: str,
+    offset: int = 0,
+    limit: int = 100,
+    category: Optional[str] = None,
+    file_type: Optional[str] = None,
+    sort: Optional[str] = None,
+    descending: bool = False
+):
+    """A page of a folder's analyzed documents, optionally filtered and sorted."""
+    if sort is not None and sort not in SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(SORT_COLUMNS)}")
+    if offset < 0 or not 0 < limit <= 1000:
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and limit between 1 and 1000")
+    snapshot = get_snapshot(folder_path)
+    indices = snapshot.order(snapshot.filter(category, file_type), sort, descending)
+    return FastJSONResponse({
+        "total": len(indices),
+        "offset": offset,
+        "limit": limit,
+        "documents": snapshot.rows(indices[offset:offset + limit])
+    })
+
+@app.get("/api/snapshot/aggregates")
+async def aggregate_snapshot(
+    folder_path: str,
+    by: str = "category",
+    category: Optional[str] = None,
+    file_type: Optional[str] = None
+):
+    """Document count, total size and average confidence per category or file type."""
+    if by not in GROUP_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"by must be one of {', '.join(GROUP_COLUMNS)}")
+    snapshot = get_snapshot(folder_path)
+    indices = snapshot.filter(category, file_type) if category or file_type else None
+    return {"by": by, "groups": snapshot.aggregate(by, indices)}
+
+@app.get("/api/snapshot/size-distribution")
+async def snapshot_size_distribution(folder_path: str):
+    """Number of analyzed documents per file size bucket."""
+    return {"buckets": get_snapshot(folder_path).size_distribution()}
+
+@lru_cache(maxsize=16)
+def archive_members(archive_path: str, size: int, modified_at: float) -> List[ArchiveMember]:
+    """The members of an archive that an analysis would process; cached per archive version."""
+    rules = ScanRules()
+    return [
+        member for member in ArchiveReader(archive_path).members()
+        if not rules.skip_relative_path(member.name.replace("/", os.sep)) and not rules.skip_size(member.size)
+    ]
+
+@app.get("/api/folder-tree")
+async def get_folder_tree(folder_path: str, path: str = "", offset: int = 0, limit: int = 200):
+    """One level of a folder's tree, for a tree view that loads folders as they are expanded.
+
+    Returns the subfolders of ``path`` (relative to ``folder_path``) and a page
+    of its files; only that one directory is read. When ``folder_path`` is an
+    archive, the tree is built from its member list.
+    """
+    if offset < 0 or not 0 < limit <= 1000:
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and limit between 1 and 1000")
+    if is_archive(folder_path):
+        stat = os.stat(folder_path)
+        try:
+            members = await asyncio.get_running_loop().run_in_executor(
+                None, archive_members, os.path.abspath(folder_path), stat.st_size, stat.st_mtime
+            )
+            level = archive_level(members, path, offset, limit)
+        except ArchiveError as e:
+            raise HTTPException(status_code=413 if isinstance(e, ArchiveLimitError) else 400, detail=str(e))
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Folder not found")
+        level["files"] = [
+            {
+                "name": member.name.rpartition("/")[2],
+                "size": member.size,
+                "file_type": get_file_type(member.name),
+                "modified_at": datetime.fromtimestamp(member.modified_at).isoformat()
+            }
+            for member in level["files"]
+        ]
+        return FastJSONResponse(level)
+
+    root = os.path.realpath(folder_path)
+    directory = os.path.realpath(os.path.join(root, path))
+    if directory != root and not directory.startswith(root + os.sep):
+        raise HTTPException(status_code=400, detail="Path is outside the folder")
+    if not os.path.isdir(directory):
+        raise HTTPException(status_code=404, detail="Folder not found")
+
+    relative = os.path.relpath(directory, root)
+    relative = "" if relative == "." else relative
+    directories, files = await asyncio.get_running_loop().run_in_executor(None, list_directory, root, relative)
+    return FastJSONResponse({
+        "path": relative,
+        "folders": [{"name": entry.name, "path": entry.relative_path} for entry in directories],
+        "files": [
+            {
+                "name": entry.name,
+                "size": entry.size,
+                "file_type": os.path.splitext(entry.name)[1][1:].upper(),
+                "modified_at": datetime.fromtimestamp(entry.modified_at).isoformat()
+            }
+            for entry in files[offset:offset + limit]
+        ],
+        "total_files": len(files),
+        "offset": offset,
+        "limit": limit
+    })
+
 @app.get("/api/documents")
-async def get_documents(folder_path: str):
-    """Get list of documents in a folder."""
+async def get_documents(
+    folder_path: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None)
+):
+    """Get list of documents in a folder; conditional requests work as for /api/folder-insights."""
     try:
         if not os.path.exists(folder_path):
             raise HTTPException(status_code=404, detail="Folder not found")
-            
-        documents = []
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                doc_info = await process_file(file_path)
-                documents.append(doc_info)
+
+        etag, last_modified = folder_validators(folder_path, "documents", await get_folder_fingerprint(folder_path))
+        headers = validator_headers(etag, last_modified)
+        if is_not_modified(etag, last_modified, if_none_match, if_modified_since):
+            return not_modified(headers)
+
+        tasks = []
+        scan_started = time.perf_counter()
+        async for entry in scan_directory_async(folder_path, include_dirs=False):
+            tasks.append(asyncio.ensure_future(process_file(entry.path, entry)))
+        observe_stage("scan", time.perf_counter() - scan_started)
+        documents = await asyncio.gather(*tasks)
         
-        return {"documents": documents}
+        return FastJSONResponse({"documents": list(documents)}, headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting documents: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/jobs")
+async def list_jobs():
+    """List the folder analyses running on any worker."""
+    return {
+        "worker": worker_id(),
+        "draining": draining,
+        "active_analyses": active_analyses,
+        "jobs": [
+            dict(lease, folder_path=name[len("analysis:"):])
+            for name, lease in get_shared_store().leases("analysis:").items()
+        ]
+    }
+
+@app.on_event("shutdown")
+async def drain():
+    """Refuse new analyses and wait up to DRAIN_TIMEOUT seconds for running ones."""
+    global draining
+    draining = True
+    if active_analyses:
+        logger.info("Waiting for %d running analyses before shutting down", active_analyses)
+    deadline = time.monotonic() + DRAIN_TIMEOUT
+    while active_analyses and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    if active_analyses:
+        logger.warning("Shutting down with %d analyses still running", active_analyses)
+
+def warm_up_services() -> Dict[str, float]:
+    """Import the parsers and create the Mistral client now; returns the seconds each took."""
+    timings = {}
+    started = time.perf_counter()
+    import docx  # noqa: F401
+    import PyPDF2  # noqa: F401
+    magic.Magic(mime=True)
+    timings["parsers"] = time.perf_counter() - started
+    if MISTRAL_API_KEY:
+        started = time.perf_counter()
+        get_mistral_client()
+        timings["mistral_client"] = time.perf_counter() - started
+    return timings
+
+@app.on_event("startup")
+async def warm_up_on_startup():
+    # Heavy imports happen on first use unless WARM_UP is set (recommended in production)
+    if os.getenv("WARM_UP", "false").strip().lower() in ("1", "true", "yes", "on"):
+        logger.info("Warmed up services: %s", warm_up_services())
+
+@app.post("/api/warm-up")
+async def warm_up():
+    """Load parsers and the Mistral client ahead of the first analysis request."""
+    return {"status": "ready", "mistral_configured": bool(MISTRAL_API_KEY), "seconds": warm_up_services()}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
+    # WEB_CONCURRENCY worker processes share the cache directory and the shared store
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        timeout_graceful_shutdown=int(DRAIN_TIMEOUT)
+    ) 
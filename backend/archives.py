@@ -0,0 +1,194 @@
+"""Read ZIP and TAR archives member by member, in memory, within zip-bomb limits.
+
+Archives are analyzed without extracting them to disk: members are listed
+(for ZIP from the central directory alone, for TAR from the member headers)
+and each regular file is decompressed into memory and handed to type
+detection and extraction as bytes. Limits on the member count, the size of
+each member, the total uncompressed size and the compression ratio are
+checked against the sizes the archive declares before anything is
+decompressed, and again against the bytes actually produced, since a
+crafted archive can under-declare its sizes.
+"""
+import logging
+import os
+import tarfile
+import zipfile
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Archive limits (override through environment variables)
+ARCHIVE_MAX_MEMBERS = int(os.getenv("ARCHIVE_MAX_MEMBERS", "10000"))
+ARCHIVE_MAX_MEMBER_SIZE = int(os.getenv("ARCHIVE_MAX_MEMBER_SIZE", str(64 * 1024 * 1024)))  # bytes, uncompressed
+ARCHIVE_MAX_TOTAL_SIZE = int(os.getenv("ARCHIVE_MAX_TOTAL_SIZE", str(2 * 1024 * 1024 * 1024)))  # bytes, uncompressed
+# Largest uncompressed/compressed size ratio of a ZIP member; deflate rarely exceeds ~20 on documents
+ARCHIVE_MAX_RATIO = float(os.getenv("ARCHIVE_MAX_RATIO", "200"))
+# Members decompressed ahead of processing; bounds memory to about this many members
+ARCHIVE_WORKERS = int(os.getenv("ARCHIVE_WORKERS", "8"))
+
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tgz", ".tar.gz", ".tbz2", ".tar.bz2", ".txz", ".tar.xz")
+
+# Members smaller than this are not checked for their compression ratio
+_RATIO_MIN_SIZE = 1024 * 1024
+
+_DAMAGED = (zipfile.BadZipFile, tarfile.TarError, EOFError, zlib.error)
+
+class ArchiveError(ValueError):
+    """The archive is unreadable."""
+
+class ArchiveLimitError(ArchiveError):
+    """The archive exceeds one of the limits."""
+
+class ArchiveMember(NamedTuple):
+    """A regular file in an archive."""
+    name: str
+    size: int
+    modified_at: float
+
+def is_archive(path: str) -> bool:
+    """Whether ``path`` is a file with an archive extension (DOCX and friends are ZIPs, but not archives here)."""
+    return path.lower().endswith(ARCHIVE_EXTENSIONS) and os.path.isfile(path)
+
+def _member_name(name: str) -> Optional[str]:
+    """The member path relative to the archive root, or None for names that would leave it."""
+    parts = [part for part in name.replace("\\", "/").split("/") if part not in ("", ".")]
+    if not parts or ".." in parts:
+        return None
+    return "/".join(parts)
+
+class ArchiveReader:
+    """Members of one ZIP or TAR archive, checked against the limits."""
+
+    def __init__(
+        self,
+        path: str,
+        max_members: int = ARCHIVE_MAX_MEMBERS,
+        max_member_size: int = ARCHIVE_MAX_MEMBER_SIZE,
+        max_total_size: int = ARCHIVE_MAX_TOTAL_SIZE,
+        max_ratio: float = ARCHIVE_MAX_RATIO
+    ):
+        self.path = path
+        self.max_members = max_members
+        self.max_member_size = max_member_size
+        self.max_total_size = max_total_size
+        self.max_ratio = max_ratio
+        try:
+            self.is_zip = zipfile.is_zipfile(path)
+            # Reads the first TAR header, which fails on a truncated compressed archive
+            is_tar = not self.is_zip and tarfile.is_tarfile(path)
+        except _DAMAGED as e:
+            raise ArchiveError(f"{os.path.basename(path)} is damaged: {str(e)}") from e
+        if not self.is_zip and not is_tar:
+            raise ArchiveError(f"{os.path.basename(path)} is not a ZIP or TAR archive")
+
+    def _check_declared(self, name: str, size: int, compressed_size: Optional[int], count: int, total: int):
+        if count > self.max_members:
+            raise ArchiveLimitError(f"Archive has more than {self.max_members} members")
+        if size > self.max_member_size:
+            raise ArchiveLimitError(f"Member {name} is larger than {self.max_member_size} bytes")
+        if total > self.max_total_size:
+            raise ArchiveLimitError(f"Archive expands to more than {self.max_total_size} bytes")
+        if compressed_size is not None and size > max(compressed_size, 1) * self.max_ratio and size > _RATIO_MIN_SIZE:
+            raise ArchiveLimitError(f"Member {name} has a suspicious compression ratio")
+
+    def members(self) -> List[ArchiveMember]:
+        """List the regular files, checking the declared sizes; nothing is decompressed for a ZIP."""
+        try:
+            if self.is_zip:
+                with zipfile.ZipFile(self.path) as archive:
+                    return [member for member, _ in self._zip_members(archive)]
+            with tarfile.open(self.path, "r:*") as archive:
+                return [member for member, _ in self._tar_members(archive)]
+        except _DAMAGED as e:
+            raise ArchiveError(f"{os.path.basename(self.path)} is damaged: {str(e)}") from e
+
+    def _zip_members(self, archive: zipfile.ZipFile) -> Iterator[Tuple[ArchiveMember, zipfile.ZipInfo]]:
+        infos = [info for info in archive.infolist() if not info.is_dir()]
+        total = 0
+        for count, info in enumerate(infos, 1):
+            name = _member_name(info.filename)
+            if name is None:
+                continue
+            total += info.file_size
+            self._check_declared(name, info.file_size, info.compress_size, count, total)
+        for info in infos:
+            name = _member_name(info.filename)
+            if name is not None:
+                yield ArchiveMember(name, info.file_size, _zip_time(info)), info
+
+    def _tar_members(self, archive: tarfile.TarFile) -> Iterator[Tuple[ArchiveMember, tarfile.TarInfo]]:
+        count = total = 0
+        for info in archive:
+            # Links, devices and directories are skipped; only regular files are read
+            if not info.isreg():
+                continue
+            name = _member_name(info.name)
+            if name is None:
+                continue
+            count += 1
+            total += info.size
+            self._check_declared(name, info.size, None, count, total)
+            yield ArchiveMember(name, info.size, float(info.mtime)), info
+
+    def read_members(self) -> Iterator[Tuple[ArchiveMember, bytes]]:
+        """Decompress the regular files one at a time, in archive order."""
+        try:
+            yield from self._read_members()
+        except _DAMAGED as e:
+            raise ArchiveError(f"{os.path.basename(self.path)} is damaged: {str(e)}") from e
+
+    def _read_members(self) -> Iterator[Tuple[ArchiveMember, bytes]]:
+        if self.is_zip:
+            with zipfile.ZipFile(self.path) as archive:
+                for member, info in self._zip_members(archive):
+                    with archive.open(info) as stream:
+                        yield member, self._read(member, stream)
+            return
+        # Stream mode reads a compressed TAR front to back without seeking
+        with tarfile.open(self.path, "r|*") as archive:
+            for member, info in self._tar_members(archive):
+                stream = archive.extractfile(info)
+                yield member, self._read(member, stream)
+
+    def _read(self, member: ArchiveMember, stream) -> bytes:
+        """Read a member, never more than its declared size allows."""
+        limit = min(member.size, self.max_member_size)
+        data = stream.read(limit + 1)
+        if len(data) > limit:
+            raise ArchiveLimitError(f"Member {member.name} expands beyond its declared size")
+        return data
+
+def _zip_time(info: zipfile.ZipInfo) -> float:
+    try:
+        return datetime(*info.date_time).timestamp()
+    except ValueError:
+        return 0.0
+
+def archive_level(members: List[ArchiveMember], path: str = "", offset: int = 0, limit: int = 200) -> Dict:
+    """One folder of an archive's member tree: its subfolders and a page of its files."""
+    path = path.strip("/")
+    prefix = f"{path}/" if path else ""
+    folders = set()
+    files = []
+    for member in members:
+        if not member.name.startswith(prefix):
+            continue
+        rest = member.name[len(prefix):]
+        folder, slash, _ = rest.partition("/")
+        if slash:
+            folders.add(folder)
+        else:
+            files.append(member)
+    if path and not folders and not files:
+        raise KeyError(path)
+    files.sort(key=lambda member: member.name.lower())
+    return {
+        "path": path,
+        "folders": [{"name": name, "path": prefix + name} for name in sorted(folders, key=str.lower)],
+        "files": files[offset:offset + limit],
+        "total_files": len(files),
+        "offset": offset,
+        "limit": limit
+    }
@@ -0,0 +1,46 @@
+"""Splitting long documents into bounded windows, shared by the backend and the app services.
+
+The backend classifies each window with Mistral and the app services score
+sentiment per window; both read the same settings, so one MAX_CHUNKS gives
+the same chunk budget everywhere.
+"""
+import os
+from typing import List
+
+# Chunking settings (override through environment variables)
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "5000"))
+MAX_CHUNKS = int(os.getenv("MAX_CHUNKS", "4"))
+
+def split_into_chunks(text: str, chunk_size: int = CHUNK_SIZE, max_chunks: int = MAX_CHUNKS) -> List[str]:
+    """Split text into windows of at most ``chunk_size`` characters.
+
+    Windows end at whitespace where possible so words are not cut. When a
+    document yields more than ``max_chunks`` windows, evenly spaced windows are
+    kept so the whole document is still sampled while cost stays bounded.
+    """
+    if not text:
+        return []
+
+    chunks = []
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            # Prefer breaking on whitespace in the last tenth of the window
+            split_at = text.rfind(" ", end - chunk_size // 10, end)
+            newline_at = text.rfind("\n", end - chunk_size // 10, end)
+            split_at = max(split_at, newline_at)
+            if split_at > start:
+                end = split_at + 1
+        chunk = text[start:end]
+        if chunk.strip():
+            chunks.append(chunk)
+        start = end
+
+    if len(chunks) > max_chunks > 0:
+        if max_chunks == 1:
+            return chunks[:1]
+        last = len(chunks) - 1
+        chunks = [chunks[round(i * last / (max_chunks - 1))] for i in range(max_chunks)]
+    return chunks
@@ -0,0 +1,306 @@
+"""Shared directory scanner used by the backend API and the app services.
+
+Walks a tree with ``os.scandir`` on a thread pool (one task per directory),
+applies ignore rules to each ``DirEntry`` before anything else is scheduled,
+and streams entries back as they are found. File sizes and timestamps come
+from the ``DirEntry`` stat cache, so every file costs at most one stat call.
+"""
+import asyncio
+import fnmatch
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Scanner settings (override through environment variables)
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "8"))
+SCAN_IGNORE_PATTERNS = [p for p in os.getenv("SCAN_IGNORE_PATTERNS", "").split(",") if p]
+SCAN_MAX_FILE_SIZE = int(os.getenv("SCAN_MAX_FILE_SIZE", "0"))  # bytes, 0 = no limit
+# Directory batches buffered ahead of a slow consumer; scanner threads wait beyond that
+SCAN_QUEUE_SIZE = int(os.getenv("SCAN_QUEUE_SIZE", "64"))
+
+IGNORED_NAMES = {".DS_Store", "Thumbs.db", "desktop.ini"}
+
+class ScanEntry(NamedTuple):
+    """A file or directory found by the scanner."""
+    path: str
+    relative_path: str
+    name: str
+    is_dir: bool
+    size: int = 0
+    modified_at: float = 0.0
+    created_at: float = 0.0
+
+    @property
+    def parent_relative_path(self) -> str:
+        return os.path.dirname(self.relative_path)
+
+class ScanRules:
+    """Decide which entries are skipped before any work is scheduled for them."""
+
+    def __init__(
+        self,
+        include_hidden: bool = False,
+        ignored_names: Iterable[str] = IGNORED_NAMES,
+        ignore_patterns: Iterable[str] = SCAN_IGNORE_PATTERNS,
+        max_file_size: int = SCAN_MAX_FILE_SIZE
+    ):
+        self.include_hidden = include_hidden
+        self.ignored_names = set(ignored_names)
+        self.ignore_patterns = list(ignore_patterns)
+        self.max_file_size = max_file_size
+
+    def skip_name(self, name: str) -> bool:
+        """Check the cheap name-based rules."""
+        if not self.include_hidden and name.startswith("."):
+            return True
+        return name in self.ignored_names
+
+    def skip_path(self, relative_path: str, name: str) -> bool:
+        """Check glob patterns against the entry name and its path relative to the scan root."""
+        return any(
+            fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern)
+            for pattern in self.ignore_patterns
+        )
+
+    def skip_size(self, size: int) -> bool:
+        return self.max_file_size > 0 and size > self.max_file_size
+
+    def skip_relative_path(self, relative_path: str) -> bool:
+        """Apply the name and pattern rules to every component of a path, as a walk would."""
+        parts = relative_path.split(os.sep)
+        for depth, name in enumerate(parts, 1):
+            if self.skip_name(name):
+                return True
+            if self.ignore_patterns and self.skip_path(os.sep.join(parts[:depth]), name):
+                return True
+        return False
+
+_DONE = object()
+
+def _scan_batches(
+    root: str,
+    rules: Optional[ScanRules],
+    workers: int,
+    include_dirs: bool
+) -> Iterator[List[ScanEntry]]:
+    """Yield the surviving entries of each directory as one batch, as directories finish."""
+    rules = rules or ScanRules()
+    root = os.path.abspath(root)
+    prefix_length = len(root) + 1
+    results: "queue.Queue" = queue.Queue(maxsize=SCAN_QUEUE_SIZE)
+    stop = threading.Event()
+    lock = threading.Lock()
+    pending = 1
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="scan")
+
+    skip_hidden = not rules.include_hidden
+    ignored_names = rules.ignored_names
+    check_patterns = bool(rules.ignore_patterns)
+    max_file_size = rules.max_file_size
+    make_entry = ScanEntry._make
+
+    def publish(item):
+        """Queue an item, waiting while the queue is full until the consumer takes it or goes away."""
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def scan_one(path: str):
+        nonlocal pending
+        batch: List[ScanEntry] = []
+        subdirectories: List[str] = []
+        try:
+            if stop.is_set():
+                return
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if (skip_hidden and name[0] == ".") or name in ignored_names:
+                        continue
+                    entry_path = entry.path
+                    relative_path = entry_path[prefix_length:]
+                    if check_patterns and rules.skip_path(relative_path, name):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if include_dirs:
+                                batch.append(ScanEntry(entry_path, relative_path, name, True))
+                            subdirectories.append(entry_path)
+                        elif entry.is_file(follow_symlinks=False):
+                            stat = entry.stat(follow_symlinks=False)
+                            size = stat.st_size
+                            if 0 < max_file_size < size:
+                                continue
+                            batch.append(make_entry((
+                                entry_path, relative_path, name, False,
+                                size, stat.st_mtime, stat.st_ctime
+                            )))
+                    except OSError as e:
+                        logger.warning(f"Skipping {entry_path}: {str(e)}")
+        except OSError as e:
+            logger.warning(f"Cannot scan directory {path}: {str(e)}")
+        finally:
+            # Publish this directory's entries before its subdirectories are scheduled,
+            # so consumers always see a folder before its contents
+            if batch:
+                publish(batch)
+            for subdirectory in subdirectories:
+                if stop.is_set():
+                    break
+                with lock:
+                    pending += 1
+                try:
+                    executor.submit(scan_one, subdirectory)
+                except RuntimeError:
+                    # The consumer closed the stream and the pool is shut down
+                    with lock:
+                        pending -= 1
+            with lock:
+                pending -= 1
+                finished = pending == 0
+            if finished:
+                publish(_DONE)
+
+    try:
+        executor.submit(scan_one, root)
+        while True:
+            batch = results.get()
+            if batch is _DONE:
+                break
+            yield batch
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def scan_directory(
+    root: str,
+    rules: Optional[ScanRules] = None,
+    workers: int = SCAN_WORKERS,
+    include_dirs: bool = True
+) -> Iterator[ScanEntry]:
+    """Yield entries under root, scanning subdirectories concurrently.
+
+    A directory is always yielded before any of its contents. Order between
+    sibling directories is not defined. Unreadable directories are logged and
+    skipped.
+    """
+    for batch in _scan_batches(root, rules, workers, include_dirs):
+        yield from batch
+
+async def scan_directory_async(
+    root: str,
+    rules: Optional[ScanRules] = None,
+    workers: int = SCAN_WORKERS,
+    include_dirs: bool = True
+) -> AsyncIterator[ScanEntry]:
+    """Async variant of scan_directory; the walk runs on threads and never blocks the loop."""
+    loop = asyncio.get_running_loop()
+    results: asyncio.Queue = asyncio.Queue(maxsize=SCAN_QUEUE_SIZE)
+    cancelled = threading.Event()
+
+    def produce():
+        try:
+            for batch in _scan_batches(root, rules, workers, include_dirs):
+                if cancelled.is_set():
+                    break
+                # Wait for room in the queue, so a slow consumer slows the scan down
+                asyncio.run_coroutine_threadsafe(results.put(batch), loop).result()
+        finally:
+            asyncio.run_coroutine_threadsafe(results.put(_DONE), loop).result()
+
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            batch = await results.get()
+            if batch is _DONE:
+                break
+            for entry in batch:
+                yield entry
+    finally:
+        cancelled.set()
+        # Make room for a producer waiting on the full queue, so it sees the cancellation and stops
+        while not producer.done():
+            while not results.empty():
+                results.get_nowait()
+            await asyncio.wait([producer], timeout=0.05)
+        await producer
+
+def list_directory(
+    root: str,
+    relative_path: str = "",
+    rules: Optional[ScanRules] = None
+) -> Tuple[List[ScanEntry], List[ScanEntry]]:
+    """The subdirectories and files directly inside ``relative_path`` under ``root``, each sorted by name.
+
+    Only that one directory is read; the same rules as for a scan of ``root`` apply.
+    """
+    rules = rules or ScanRules()
+    directories: List[ScanEntry] = []
+    files: List[ScanEntry] = []
+    with os.scandir(os.path.join(root, relative_path)) as entries:
+        for entry in entries:
+            name = entry.name
+            entry_relative_path = os.path.join(relative_path, name)
+            if rules.skip_name(name) or (rules.ignore_patterns and rules.skip_path(entry_relative_path, name)):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(ScanEntry(entry.path, entry_relative_path, name, True))
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    if not rules.skip_size(stat.st_size):
+                        files.append(ScanEntry(
+                            entry.path, entry_relative_path, name, False,
+                            stat.st_size, stat.st_mtime, stat.st_ctime
+                        ))
+            except OSError as e:
+                logger.warning(f"Skipping {entry.path}: {str(e)}")
+    directories.sort(key=lambda entry: entry.name.lower())
+    files.sort(key=lambda entry: entry.name.lower())
+    return directories, files
+
+class FolderFingerprint(NamedTuple):
+    """Cheap summary of a tree that changes when a file is added, removed, renamed or modified."""
+    files: int
+    total_size: int
+    # Newest modification time of any file or directory (directories change when entries are added or removed)
+    modified_at: float
+
+def folder_fingerprint(
+    root: str,
+    rules: Optional[ScanRules] = None,
+    workers: int = SCAN_WORKERS
+) -> FolderFingerprint:
+    """Fingerprint a tree with a stat-only scan; no file is opened.
+
+    A file root (an archive analyzed in place) is fingerprinted by its own stat.
+    """
+    stat = os.stat(root)
+    if not os.path.isdir(root):
+        return FolderFingerprint(1, stat.st_size, stat.st_mtime)
+    files = 0
+    total_size = 0
+    newest = stat.st_mtime
+    for batch in _scan_batches(root, rules, workers, include_dirs=True):
+        for entry in batch:
+            if entry.is_dir:
+                try:
+                    modified_at = os.stat(entry.path).st_mtime
+                except OSError:
+                    continue
+            else:
+                files += 1
+                total_size += entry.size
+                modified_at = entry.modified_at
+            if modified_at > newest:
+                newest = modified_at
+    return FolderFingerprint(files, total_size, newest)
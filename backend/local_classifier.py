@@ -0,0 +1,237 @@
+"""Local first-stage classifier, trained offline from cached Mistral labels.
+
+Text is turned into hashed TF-IDF features (word unigrams and bigrams hashed
+into a fixed number of buckets, so no vocabulary is stored) and scored by a
+multinomial logistic regression. A chunk whose top probability reaches
+LOCAL_CLASSIFIER_THRESHOLD is answered locally; the rest are escalated to
+Mistral. The model learns from the classification cache, whose entries hold
+each classified chunk's text and Mistral's label.
+
+Train (from backend/, after analyses have filled the cache):
+    python local_classifier.py
+    python local_classifier.py --epochs 10 --holdout 0.2 --threshold 0.9
+
+The backend loads the model on first use; restart it after training.
+"""
+import argparse
+import logging
+import os
+import pickle
+import re
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Local classifier settings (override through environment variables)
+LOCAL_CLASSIFIER_PATH = Path(os.getenv("LOCAL_CLASSIFIER_PATH", "models/local_classifier.npz"))
+# Chunks the model is less sure about than this probability go to Mistral; above 1 disables the local stage
+LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv("LOCAL_CLASSIFIER_THRESHOLD", "0.9"))
+# Hash buckets for training a new model; a trained model keeps its own
+LOCAL_CLASSIFIER_FEATURES = int(os.getenv("LOCAL_CLASSIFIER_FEATURES", str(2 ** 18)))
+# Labels with fewer cached examples are left to Mistral
+LOCAL_CLASSIFIER_MIN_EXAMPLES = int(os.getenv("LOCAL_CLASSIFIER_MIN_EXAMPLES", "5"))
+
+_WORD = re.compile(r"[^\W\d_]{2,}")
+
+def _term_counts(text: str) -> Counter:
+    """Word and word-bigram counts of lowercased text."""
+    words = _WORD.findall(text.lower())
+    counts = Counter(words)
+    counts.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    return counts
+
+def hash_terms(text: str, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Bucket indices and sublinear term frequencies (1 + log tf) of a text, one entry per bucket."""
+    counts = _term_counts(text)
+    if not counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    # crc32 rather than hash(), which is salted per process
+    buckets = np.fromiter((zlib.crc32(term.encode("utf-8")) for term in counts), dtype=np.int64, count=len(counts))
+    frequencies = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    indices, inverse = np.unique(buckets % n_features, return_inverse=True)
+    return indices, np.bincount(inverse, weights=frequencies).astype(np.float32)
+
+class LocalClassifier:
+    """Hashed TF-IDF features and a softmax linear model over the cached labels."""
+
+    def __init__(self, labels: Sequence[str], weights: np.ndarray, bias: np.ndarray, idf: np.ndarray):
+        self.labels = list(labels)
+        self.weights = weights
+        self.bias = bias
+        self.idf = idf
+
+    @property
+    def n_features(self) -> int:
+        return len(self.idf)
+
+    def vectorize(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """The L2-normalized TF-IDF vector of a text, as bucket indices and values."""
+        indices, values = hash_terms(text, self.n_features)
+        values = values * self.idf[indices]
+        norm = np.linalg.norm(values)
+        return indices, values / norm if norm else values
+
+    def probabilities(self, text: str) -> np.ndarray:
+        indices, values = self.vectorize(text)
+        return _softmax(values @ self.weights[indices] + self.bias)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """The most likely label and its probability."""
+        probabilities = self.probabilities(text)
+        best = int(np.argmax(probabilities))
+        return self.labels[best], float(probabilities[best])
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        n_features: int = LOCAL_CLASSIFIER_FEATURES,
+        epochs: int = 8,
+        learning_rate: float = 0.5,
+        l2: float = 1e-5,
+        seed: int = 0
+    ) -> "LocalClassifier":
+        """Fit the model with stochastic gradient descent on the cross-entropy loss."""
+        names = sorted(set(labels))
+        codes = {name: code for code, name in enumerate(names)}
+        targets = np.array([codes[label] for label in labels])
+
+        hashed = [hash_terms(text, n_features) for text in texts]
+        document_frequency = np.zeros(n_features, dtype=np.float64)
+        for indices, _ in hashed:
+            document_frequency[indices] += 1
+        idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        model = cls(names, np.zeros((n_features, len(names)), dtype=np.float32), np.zeros(len(names), dtype=np.float32), idf)
+        rows = [model.vectorize(text) for text in texts]
+        random = np.random.default_rng(seed)
+        for epoch in range(epochs):
+            rate = learning_rate / (1 + epoch)
+            for i in random.permutation(len(rows)):
+                indices, values = rows[i]
+                touched = model.weights[indices]
+                gradient = _softmax(values @ touched + model.bias)
+                gradient[targets[i]] -= 1
+                model.weights[indices] = touched - rate * (np.outer(values, gradient) + l2 * touched)
+                model.bias -= rate * gradient
+        return model
+
+    def save(self, path: Path):
+        """Write the model atomically."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+        np.savez_compressed(temp_path, labels=np.array(self.labels), weights=self.weights, bias=self.bias, idf=self.idf)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "LocalClassifier":
+        with np.load(path) as data:
+            return cls([str(label) for label in data["labels"]], data["weights"], data["bias"], data["idf"])
+
+def _softmax(scores: np.ndarray) -> np.ndarray:
+    exponentials = np.exp(scores - scores.max())
+    return exponentials / exponentials.sum()
+
+def load_local_classifier(path: Path = LOCAL_CLASSIFIER_PATH) -> Optional[LocalClassifier]:
+    """The trained model, or None when there is none (every chunk then goes to Mistral)."""
+    if not path.exists():
+        return None
+    try:
+        model = LocalClassifier.load(path)
+    except Exception as e:
+        logger.error("Cannot load the local classifier from %s: %s", path, e)
+        return None
+    logger.info("Loaded the local classifier (%d labels) from %s", len(model.labels), path)
+    return model
+
+def model_version(path: Path = LOCAL_CLASSIFIER_PATH) -> str:
+    """Identifies the model file, for ETags: its size and modification time."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return "none"
+    return f"{stat.st_size}-{int(stat.st_mtime)}"
+
+def load_examples(cache_dir: Path, min_examples: int = LOCAL_CLASSIFIER_MIN_EXAMPLES) -> Tuple[List[str], List[str]]:
+    """Text and label pairs from the classification cache.
+
+    Labels are merged case-insensitively (as chunk votes are) and spelled as
+    Mistral spelled them most often. Entries written before the cache kept the
+    text, and labels with fewer than ``min_examples`` examples, are skipped.
+    """
+    examples: List[Tuple[str, str]] = []
+    spellings: Dict[str, Counter] = {}
+    for cache_file in cache_dir.glob("*.pkl"):
+        try:
+            with open(cache_file, "rb") as f:
+                entry = pickle.load(f)
+        except Exception as e:
+            logger.warning("Skipping cache entry %s: %s", cache_file, e)
+            continue
+        text, category = entry.get("text"), (entry.get("category") or "").strip()
+        if not text or not category or category == "No subject":
+            continue
+        key = category.lower()
+        spellings.setdefault(key, Counter())[category] += 1
+        examples.append((text, key))
+
+    counts = Counter(key for _, key in examples)
+    label = {key: spelling.most_common(1)[0][0] for key, spelling in spellings.items()}
+    kept = [(text, label[key]) for text, key in examples if counts[key] >= min_examples]
+    return [text for text, _ in kept], [name for _, name in kept]
+
+def evaluate(model: LocalClassifier, texts: Sequence[str], labels: Sequence[str], threshold: float) -> Dict[str, float]:
+    """Accuracy over all examples, and the escalation rate and accuracy of the answered ones at ``threshold``."""
+    predictions = [model.predict(text) for text in texts]
+    correct = [predicted == label for (predicted, _), label in zip(predictions, labels)]
+    answered = [is_correct for (_, confidence), is_correct in zip(predictions, correct) if confidence >= threshold]
+    return {
+        "accuracy": sum(correct) / len(correct) if correct else 0.0,
+        "escalation_rate": 1 - len(answered) / len(correct) if correct else 1.0,
+        "answered_accuracy": sum(answered) / len(answered) if answered else 0.0
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cache", type=Path, default=Path("cache"), help="classification cache directory")
+    parser.add_argument("--output", type=Path, default=LOCAL_CLASSIFIER_PATH)
+    parser.add_argument("--features", type=int, default=LOCAL_CLASSIFIER_FEATURES)
+    parser.add_argument("--epochs", type=int, default=8)
+    parser.add_argument("--min-examples", type=int, default=LOCAL_CLASSIFIER_MIN_EXAMPLES)
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of examples kept out to evaluate the model")
+    parser.add_argument("--threshold", type=float, default=LOCAL_CLASSIFIER_THRESHOLD)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    texts, labels = load_examples(args.cache, args.min_examples)
+    if len(set(labels)) < 2:
+        parser.error(f"{args.cache} has {len(texts)} usable examples of {len(set(labels))} labels; at least 2 labels are needed")
+    print(f"{len(texts)} examples, {len(set(labels))} labels")
+
+    order = np.random.default_rng(0).permutation(len(texts))
+    split = int(len(texts) * (1 - args.holdout)) if 0 < args.holdout < 1 else len(texts)
+    train, test = order[:split], order[split:]
+    if len(test):
+        started = time.perf_counter()
+        model = LocalClassifier.train([texts[i] for i in train], [labels[i] for i in train], args.features, args.epochs)
+        print(f"trained on {len(train)} in {time.perf_counter() - started:.1f}s")
+        scores = evaluate(model, [texts[i] for i in test], [labels[i] for i in test], args.threshold)
+        print(
+            f"holdout of {len(test)}: accuracy {scores['accuracy']:.1%}; at threshold {args.threshold}: "
+            f"escalation rate {scores['escalation_rate']:.1%}, accuracy of local answers {scores['answered_accuracy']:.1%}"
+        )
+
+    # The saved model learns from every example
+    model = LocalClassifier.train(texts, labels, args.features, args.epochs)
+    model.save(args.output)
+    print(f"saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
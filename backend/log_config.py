@@ -0,0 +1,147 @@
+"""Structured logging shared by the backend API and the app services.
+
+Records are handed to a bounded queue and formatted and written by a listener
+thread, so the event loop never waits for log I/O; when the queue is full the
+record is dropped and counted instead. Per-file events are logged with
+``extra=sampled()`` and only a LOG_SAMPLE_RATE fraction of them is kept
+(warnings and errors always are). Log calls should use lazy ``%s`` arguments so
+records below the configured level cost no string formatting.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+# Logging settings (override through environment variables)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# Per-module levels, e.g. "sqlalchemy.engine=INFO,file_scanner=DEBUG". httpx logs
+# every Mistral request at INFO, so it is quieted unless set here
+LOG_LEVELS = os.getenv("LOG_LEVELS", "httpx=WARNING")
+# "json" for one JSON object per line, "text" for the classic format
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+# Fraction of per-file (sampled) INFO/DEBUG records that are written
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+def sampled(**fields: Any) -> Dict[str, Any]:
+    """``extra`` for a per-file event: marks the record as sampled and adds structured fields."""
+    fields["sampled"] = True
+    return fields
+
+def parse_levels(value: str) -> Dict[str, str]:
+    """Parse ``name=LEVEL,name=LEVEL`` into a dict."""
+    levels = {}
+    for part in value.split(","):
+        if "=" in part:
+            name, level = part.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record with time, level, logger, message and any ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class SampleFilter(logging.Filter):
+    """Keep a ``rate`` fraction of records marked ``sampled``; WARNING and above always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False) or record.levelno >= logging.WARNING:
+            return True
+        if self.rate >= 1.0:
+            return True
+        if random.random() < self.rate:
+            record.sample_rate = self.rate
+            return True
+        return False
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue records without formatting them; drop records when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now (they may change after the call) but leave formatting to the listener
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    levels: str = LOG_LEVELS,
+    log_format: str = LOG_FORMAT,
+    sample_rate: float = LOG_SAMPLE_RATE,
+    queue_size: int = LOG_QUEUE_SIZE
+) -> NonBlockingQueueHandler:
+    """Route all logging through a queue to a stdout writer thread; calling it again is a no-op."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        return _queue_handler
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    _queue_handler.addFilter(SampleFilter(sample_rate))
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level.upper())
+    for name, module_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(module_level)
+    return _queue_handler
+
+def dropped_records() -> int:
+    """Number of records dropped because the log queue was full."""
+    return _queue_handler.dropped if _queue_handler else 0
@@ -0,0 +1,145 @@
+"""Prometheus metrics shared by the backend API and the app services.
+
+Metric children are bound once at import, so recording a sample is a dict
+lookup plus a lock-protected add; cache hit ratios and queue depths are read
+only when ``/metrics`` is scraped. Stage durations can also be collected per
+request or per file with ``collect_timings``.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+STAGES = ("scan", "fingerprint", "archive_read", "type_detection", "extraction", "classification", "sentiment", "db_write")
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_SECONDS = Histogram(
+    "document_stage_seconds",
+    "Time spent in each document pipeline stage",
+    ["stage"],
+    buckets=LATENCY_BUCKETS
+)
+MISTRAL_REQUESTS = Counter(
+    "mistral_requests_total",
+    "Mistral API requests by outcome (success, error, rate_limited)",
+    ["outcome"]
+)
+MISTRAL_SECONDS = Histogram(
+    "mistral_request_seconds",
+    "Mistral API request latency",
+    buckets=LATENCY_BUCKETS
+)
+LOCAL_CLASSIFIER_DECISIONS = Counter(
+    "local_classifier_decisions_total",
+    "Chunks answered by the local classifier or escalated to Mistral (answered, escalated)",
+    ["outcome"]
+)
+IN_FLIGHT = Gauge("pipeline_in_flight_tasks", "Tasks currently being processed", ["task"])
+QUEUE_DEPTH = Gauge("pipeline_queue_depth", "Work items waiting to be processed", ["queue"])
+
+_stage_children = {stage: STAGE_SECONDS.labels(stage) for stage in STAGES}
+
+# Stage durations collected for the current file or request, when profiling
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_timings", default=None)
+_timings_lock = threading.Lock()
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    """Sum stage durations recorded in the enclosed block into a dict of seconds.
+
+    Work handed to executor threads is included when it runs in a copy of the
+    caller's context (``contextvars.copy_context().run``).
+    """
+    timings: Dict[str, float] = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+def _add_timing(stage: str, seconds: float):
+    timings = _timings.get()
+    if timings is not None:
+        with _timings_lock:
+            timings[stage] = timings.get(stage, 0.0) + seconds
+
+def observe_stage(stage: str, seconds: float):
+    """Record the duration of one pipeline stage."""
+    _stage_children[stage].observe(seconds)
+    _add_timing(stage, seconds)
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """Time the enclosed block as one sample of ``stage``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+def record_mistral_request(seconds: float, error: Exception = None):
+    """Count a Mistral request; errors with HTTP status 429 are counted as rate_limited."""
+    MISTRAL_SECONDS.observe(seconds)
+    _add_timing("mistral", seconds)
+    if error is None:
+        outcome = "success"
+    elif getattr(error, "status_code", None) == 429 or "429" in str(error):
+        outcome = "rate_limited"
+    else:
+        outcome = "error"
+    MISTRAL_REQUESTS.labels(outcome).inc()
+
+class CacheStats:
+    """Hit/miss counters for a cache that does not keep its own."""
+
+    def __init__(self, name: str):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        register_cache(name, lambda: (self.hits, self.misses))
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+class _CacheCollector:
+    """Report hits, misses and hit ratio of registered caches at scrape time."""
+
+    def __init__(self):
+        self.sources: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
+    def collect(self):
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "Cache hits divided by lookups", labels=["cache"])
+        for name, source in list(self.sources.items()):
+            hit_count, miss_count = source()
+            lookups = hit_count + miss_count
+            hits.add_metric([name], hit_count)
+            misses.add_metric([name], miss_count)
+            ratio.add_metric([name], hit_count / lookups if lookups else 0.0)
+        yield hits
+        yield misses
+        yield ratio
+
+_cache_collector = _CacheCollector()
+REGISTRY.register(_cache_collector)
+
+def register_cache(name: str, source: Callable[[], Tuple[int, int]]):
+    """Expose a cache's ``(hits, misses)`` under ``name``; re-registering a name replaces it."""
+    _cache_collector.sources[name] = source
+
+def track_queue(name: str, depth: Callable[[], int]):
+    """Report the current depth of a queue at scrape time."""
+    QUEUE_DEPTH.labels(name).set_function(depth)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Return the exposition body and its content type for a /metrics endpoint."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,96 @@
+"""Opt-in cProfile support for single API requests."""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Profile dumps (.prof files, readable with pstats or snakeviz) are written here
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+# Number of functions listed in the text report returned with the response
+PROFILE_REPORT_LINES = int(os.getenv("PROFILE_REPORT_LINES", "40"))
+
+def parse_profile_mode(*values: Optional[str]) -> Optional[str]:
+    """Map a ``profile`` query parameter or ``X-Profile`` header to a profile mode.
+
+    "1", "true", "yes" and "timings" give per-stage timings; "cprofile" adds a
+    cProfile report. Anything else disables profiling.
+    """
+    for value in values:
+        if not value:
+            continue
+        value = value.strip().lower()
+        if value in ("1", "true", "yes", "on", "timings"):
+            return "timings"
+        if value == "cprofile":
+            return "cprofile"
+    return None
+
+class RequestProfiler:
+    """cProfile for one request.
+
+    Profiles the event loop thread between ``start`` and ``stop``, plus every
+    call made through ``wrap`` (used for work handed to executor threads); the
+    results are merged into one report. Other requests served by the event loop
+    at the same time show up in the report as well.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._main = cProfile.Profile()
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._enabled = False
+
+    def start(self):
+        try:
+            self._main.enable()
+            self._enabled = True
+        except ValueError as e:
+            # Another profiler is already active in this thread
+            logger.warning(f"Cannot profile request {self.name}: {str(e)}")
+
+    def wrap(self, func: Callable) -> Callable:
+        """Return func wrapped so that its calls are profiled into this report."""
+        def profiled(*args, **kwargs) -> Any:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._lock:
+                    self._profiles.append(profile)
+        return profiled
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop profiling, dump the merged stats and return the dump path and a text report."""
+        if self._enabled:
+            self._main.disable()
+        profiles = ([self._main] if self._enabled else []) + self._profiles
+        if not profiles:
+            return {"error": "profiler unavailable"}
+
+        stream = io.StringIO()
+        stats = pstats.Stats(profiles[0], stream=stream)
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.sort_stats("cumulative")
+
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        path = PROFILE_DIR / f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.prof"
+        stats.dump_stats(path)
+        stats.print_stats(PROFILE_REPORT_LINES)
+        return {"file": str(path.absolute()), "report": stream.getvalue()}
+
+current_profiler: ContextVar[Optional[RequestProfiler]] = ContextVar("current_profiler", default=None)
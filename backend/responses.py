@@ -0,0 +1,193 @@
+"""Fast JSON responses and response compression for both APIs.
+
+``FastJSONResponse`` serializes with orjson, which writes dicts, lists,
+datetimes, enums and Pydantic models straight to bytes. Returning one from an
+endpoint also skips FastAPI's ``jsonable_encoder`` pass, which copies the
+whole payload before it is serialized. ``CompressionMiddleware`` compresses
+responses with brotli (when the ``brotli`` package is installed) or gzip,
+whichever the client's ``Accept-Encoding`` prefers. The validator helpers
+answer conditional requests (``If-None-Match``, ``If-Modified-Since``) with
+304 Not Modified.
+"""
+import hashlib
+import os
+import zlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import orjson
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional; without it responses are only gzip-compressed
+    brotli = None
+
+# Responses smaller than this many bytes are sent uncompressed
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# Brotli quality 0-11; 4 compresses better than gzip at a similar speed
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+_COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg+xml")
+
+def _default(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "dict"):
+        return value.dict()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, os.PathLike):
+        return os.fspath(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes with orjson."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+class FastJSONResponse(JSONResponse):
+    """A JSON response rendered by orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def make_etag(*parts: Any) -> str:
+    """A weak ETag from the parts that determine a response (compressed and plain bodies share it)."""
+    digest = hashlib.sha1("\0".join(str(part) for part in parts).encode("utf-8", "surrogatepass")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+def validator_headers(etag: str, last_modified: float) -> Dict[str, str]:
+    """ETag and Last-Modified headers; ``no-cache`` makes clients revalidate before reusing a response."""
+    return {"ETag": etag, "Last-Modified": formatdate(last_modified, usegmt=True), "Cache-Control": "no-cache"}
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def is_not_modified(
+    etag: str,
+    last_modified: float,
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str]
+) -> bool:
+    """Whether the client's copy is current; If-None-Match takes precedence over If-Modified-Since."""
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return _opaque_tag(etag) in {_opaque_tag(tag) for tag in if_none_match.split(",")}
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second resolution
+        return int(last_modified) <= since
+    return False
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """The supported content coding the client prefers ("br" or "gzip"), or None."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    candidates = [(weights.get(coding, weights.get("*", 0.0)), coding) for coding in supported]
+    # Ties go to the first supported coding, brotli
+    weight, coding = max(candidates, key=lambda candidate: (candidate[0], -supported.index(candidate[1])))
+    return coding if weight > 0 else None
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+            self._finish = self._compressor.finish
+            self._compress = self._compressor.process
+        else:
+            # wbits 31 writes a gzip header and trailer
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._finish = self._compressor.flush
+            self._compress = self._compressor.compress
+
+    def compress(self, data: bytes, last: bool) -> bytes:
+        chunk = self._compress(data)
+        return chunk + self._finish() if last else chunk
+
+class CompressionMiddleware:
+    """Compress text and JSON responses with the coding negotiated through ``Accept-Encoding``.
+
+    Responses that are already encoded, not text, or smaller than ``minimum_size``
+    are passed through unchanged. Streamed responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def compressing_send(message: Message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = "content-encoding" in headers or not content_type.startswith(_COMPRESSIBLE_TYPES)
+                if passthrough:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding)
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                    await send(start)
+                else:
+                    body = compressor.compress(body, last=True)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+            await send({
+                "type": "http.response.body",
+                "body": compressor.compress(body, last=not more_body),
+                "more_body": more_body
+            })
+
+        await self.app(scope, receive, compressing_send)
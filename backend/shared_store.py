@@ -0,0 +1,191 @@
+"""State shared by all worker processes of one host.
+
+When the APIs run with several workers (``--workers N`` or gunicorn), each
+worker has its own memory. Results, analysis snapshots and job state that
+every worker must see live in one SQLite file instead: WAL mode lets readers
+proceed while a writer commits, and ``busy_timeout`` makes concurrent writers
+wait instead of failing. A lookup is a single indexed read (tens of
+microseconds), so it is called directly rather than through an executor.
+
+Leases give one worker exclusive ownership of a job (analyzing a folder,
+running the folder watchers) until it is released or expires, so a crashed
+worker never blocks the others for longer than the lease.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Anchored to this module rather than the working directory, so the backend (run from backend/) and
+# the app services (run from the repository root) open the same file
+SHARED_STORE_PATH = os.getenv(
+    "SHARED_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "shared.db")
+)
+SHARED_STORE_BUSY_TIMEOUT = float(os.getenv("SHARED_STORE_BUSY_TIMEOUT", "5.0"))
+
+_worker_ids: Dict[int, str] = {}
+
+def worker_id() -> str:
+    """Identify this process as the owner of leases (computed per pid, so forked workers differ)."""
+    pid = os.getpid()
+    if pid not in _worker_ids:
+        _worker_ids[pid] = f"{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}"
+    return _worker_ids[pid]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_by_age ON entries (namespace, updated_at);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    acquired_at REAL NOT NULL
+);
+"""
+
+class SharedStore:
+    """JSON values by namespace and key, plus expiring leases, in a SQLite file.
+
+    Each thread (and each forked process) uses its own connection. Values must be JSON-serializable;
+    anything else is stored as its string form.
+    """
+
+    def __init__(self, path: str = SHARED_STORE_PATH, busy_timeout: float = SHARED_STORE_BUSY_TIMEOUT):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # A connection must not be used in a process forked after it was opened
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.conn = self._connect()
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Return the stored value, or ``default`` when missing or expired."""
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return default
+        return json.loads(row[0])
+
+    def get_with_time(self, namespace: str, key: str) -> Optional[Tuple[Any, float]]:
+        """Return ``(value, updated_at)``, or None when missing or expired."""
+        row = self._conn.execute(
+            "SELECT value, expires_at, updated_at FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return json.loads(row[0]), row[2]
+
+    def put(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a value; with ``ttl`` it expires after that many seconds."""
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, json.dumps(value, default=str), now + ttl if ttl else None, now)
+        )
+
+    def delete(self, namespace: str, key: str) -> bool:
+        cursor = self._conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+        return cursor.rowcount > 0
+
+    def items(self, namespace: str) -> Iterator[Tuple[str, Any]]:
+        """Iterate over the unexpired ``(key, value)`` pairs of a namespace."""
+        rows = self._conn.execute(
+            "SELECT key, value FROM entries WHERE namespace = ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (namespace, time.time())
+        ).fetchall()
+        for key, value in rows:
+            yield key, json.loads(value)
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and leases; returns the number of entries removed."""
+        now = time.time()
+        cursor = self._conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        self._conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+        return cursor.rowcount
+
+    def prune(self, namespace: str, max_entries: int) -> int:
+        """Keep only the ``max_entries`` most recently written entries of a namespace; returns the number removed."""
+        cursor = self._conn.execute(
+            """
+            DELETE FROM entries WHERE namespace = ? AND key NOT IN (
+                SELECT key FROM entries WHERE namespace = ? ORDER BY updated_at DESC LIMIT ?
+            )
+            """,
+            (namespace, namespace, max_entries)
+        )
+        return cursor.rowcount
+
+    def acquire(self, name: str, ttl: float, owner: Optional[str] = None) -> bool:
+        """Take or renew the lease ``name`` for ``ttl`` seconds; False while another owner holds it."""
+        owner = owner or worker_id()
+        now = time.time()
+        cursor = self._conn.execute(
+            """
+            INSERT INTO leases (name, owner, expires_at, acquired_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                owner = excluded.owner,
+                expires_at = excluded.expires_at,
+                acquired_at = CASE WHEN leases.owner = excluded.owner THEN leases.acquired_at ELSE excluded.acquired_at END
+            WHERE leases.owner = excluded.owner OR leases.expires_at < ?
+            """,
+            (name, owner, now + ttl, now, now)
+        )
+        return cursor.rowcount > 0
+
+    def release(self, name: str, owner: Optional[str] = None) -> bool:
+        cursor = self._conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner or worker_id()))
+        return cursor.rowcount > 0
+
+    def lease_owner(self, name: str) -> Optional[str]:
+        """Return the current holder of a lease, or None when it is free or expired."""
+        row = self._conn.execute(
+            "SELECT owner FROM leases WHERE name = ? AND expires_at >= ?", (name, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def leases(self, prefix: str = "") -> Dict[str, Dict[str, Any]]:
+        """Return the unexpired leases whose name starts with ``prefix``."""
+        rows = self._conn.execute(
+            "SELECT name, owner, acquired_at, expires_at FROM leases WHERE expires_at >= ?", (time.time(),)
+        ).fetchall()
+        return {
+            name: {"owner": owner, "acquired_at": acquired_at, "expires_at": expires_at}
+            for name, owner, acquired_at, expires_at in rows if name.startswith(prefix)
+        }
+
+@lru_cache(maxsize=1)
+def get_shared_store() -> SharedStore:
+    """The process-wide store at SHARED_STORE_PATH, opened on first use."""
+    return SharedStore()
@@ -0,0 +1,306 @@
+"""Columnar snapshots of folder analyses.
+
+A snapshot keeps one NumPy array per field instead of one dict per document.
+Strings that repeat (file types, categories, classifiers, error messages) are
+interned into a small table and stored as integer codes, and file names are
+concatenated into one UTF-8 buffer with offsets. A document then takes about 60 bytes plus
+its file name instead of roughly a kilobyte of dicts, and slices, filters and
+aggregates are computed on the arrays: only the rows that are returned are
+turned into dicts.
+
+Snapshots are saved as one ``.npz`` file per folder in SNAPSHOT_DIR, written
+to a temporary file and renamed so readers in other workers never see a
+partial snapshot.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Anchored to this module like SHARED_STORE_PATH, so workers started from any directory share the snapshots
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "snapshots")))
+# Snapshots kept loaded per process
+SNAPSHOT_CACHE_SIZE = int(os.getenv("SNAPSHOT_CACHE_SIZE", "8"))
+SNAPSHOT_VERSION = 2
+
+# Columns that /api/snapshot/documents can sort by
+SORT_COLUMNS = ("size", "modified_at", "confidence")
+GROUP_COLUMNS = ("category", "file_type")
+# Upper bounds (bytes) of the buckets of size_distribution; the last bucket is open-ended
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2, 100 * 1024 ** 2)
+
+class _Interner:
+    """Map strings to dense integer codes."""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+class Snapshot:
+    """The documents and summary of one folder analysis, stored column-wise."""
+
+    def __init__(self, meta: Dict[str, Any], columns: Dict[str, np.ndarray], documents: Optional[List[Dict]] = None):
+        self.meta = meta
+        self.columns = columns
+        # The documents a snapshot was built from, kept so the analyzing request need not rebuild them
+        self._documents = documents
+
+    @property
+    def summary(self) -> Dict[str, Any]:
+        return self.meta["summary"]
+
+    def __len__(self) -> int:
+        return len(self.columns["size"])
+
+    @classmethod
+    def from_documents(
+        cls,
+        folder_path: str,
+        documents: Sequence[Dict],
+        summary: Dict[str, Any],
+        source: Optional[List[Any]] = None
+    ) -> "Snapshot":
+        """Build a snapshot from ``process_file`` results and the analysis summary.
+
+        ``source`` (JSON values) identifies the folder state the analysis saw,
+        so readers can tell whether the snapshot is still current.
+        """
+        count = len(documents)
+        file_types, categories, classifiers, errors = _Interner(), _Interner(), _Interner(), _Interner()
+        names = bytearray()
+        name_offsets = np.zeros(count + 1, dtype=np.int64)
+        file_type = np.full(count, -1, dtype=np.int32)
+        size = np.zeros(count, dtype=np.int64)
+        modified_at = np.full(count, np.nan, dtype=np.float64)
+        category = np.full(count, -1, dtype=np.int32)
+        confidence = np.full(count, np.nan, dtype=np.float64)
+        chunks = np.full(count, -1, dtype=np.int32)
+        classifier = np.full(count, -1, dtype=np.int32)
+        error = np.full(count, -1, dtype=np.int32)
+
+        for i, doc in enumerate(documents):
+            names += doc.get("filename", "").encode("utf-8", "surrogatepass")
+            name_offsets[i + 1] = len(names)
+            if "error" in doc:
+                error[i] = errors.code(str(doc["error"]))
+                continue
+            file_type[i] = file_types.code(doc.get("file_type"))
+            size[i] = doc.get("size", 0)
+            if doc.get("modified_at"):
+                modified_at[i] = datetime.fromisoformat(doc["modified_at"]).timestamp()
+            classification = doc.get("classification")
+            if classification:
+                category[i] = categories.code(classification.get("category"))
+                confidence[i] = classification.get("confidence", np.nan)
+                chunks[i] = classification.get("chunks", -1)
+                classifier[i] = classifiers.code(classification.get("classifier"))
+
+        meta = {
+            "version": SNAPSHOT_VERSION,
+            "folder_path": folder_path,
+            "created_at": time.time(),
+            "source": source,
+            "file_types": file_types.values,
+            "categories": categories.values,
+            "classifiers": classifiers.values,
+            "errors": errors.values,
+            "summary": {key: value for key, value in summary.items() if key != "documents"}
+        }
+        columns = {
+            "name_data": np.frombuffer(bytes(names), dtype=np.uint8),
+            "name_offsets": name_offsets,
+            "file_type": file_type,
+            "size": size,
+            "modified_at": modified_at,
+            "category": category,
+            "confidence": confidence,
+            "chunks": chunks,
+            "classifier": classifier,
+            "error": error
+        }
+        return cls(meta, columns, list(documents))
+
+    def save(self, path: Path):
+        """Write the snapshot atomically."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+        np.savez(temp_path, meta=np.array(json.dumps(self.meta)), **self.columns)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "Snapshot":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            columns = {name: data[name] for name in data.files if name != "meta"}
+        return cls(meta, columns)
+
+    def filter(self, category: Optional[str] = None, file_type: Optional[str] = None) -> np.ndarray:
+        """Return the indices of the documents matching all given values."""
+        mask = np.ones(len(self), dtype=bool)
+        for column, table, value in (
+            ("category", self.meta["categories"], category),
+            ("file_type", self.meta["file_types"], file_type)
+        ):
+            if value is not None:
+                code = table.index(value) if value in table else -2
+                mask &= self.columns[column] == code
+        return np.flatnonzero(mask)
+
+    def order(self, indices: np.ndarray, sort: Optional[str] = None, descending: bool = False) -> np.ndarray:
+        """Sort ``indices`` by a column; missing values sort last."""
+        if sort is None:
+            return indices[::-1] if descending else indices
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort!r}; use one of {', '.join(SORT_COLUMNS)}")
+        values = self.columns[sort][indices].astype(np.float64)
+        keys = -values if descending else values
+        # NaN (no value) sorts after every number in argsort
+        return indices[np.argsort(keys, kind="stable")]
+
+    def rows(self, indices: Sequence[int]) -> List[Dict[str, Any]]:
+        """Materialize the given documents as ``process_file``-style dicts."""
+        columns = self.columns
+        name_data, offsets = columns["name_data"], columns["name_offsets"]
+        file_types, categories, errors = self.meta["file_types"], self.meta["categories"], self.meta["errors"]
+        # Version 1 snapshots do not record which classifier answered
+        classifiers = self.meta.get("classifiers", [])
+        classifier = columns.get("classifier")
+        rows = []
+        for i in indices:
+            filename = name_data[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8", "surrogatepass")
+            if columns["error"][i] >= 0:
+                rows.append({"filename": filename, "error": errors[columns["error"][i]]})
+                continue
+            classification = None
+            if columns["category"][i] >= 0:
+                classification = {
+                    "category": categories[columns["category"][i]],
+                    "confidence": float(columns["confidence"][i])
+                }
+                if columns["chunks"][i] >= 0:
+                    classification["chunks"] = int(columns["chunks"][i])
+                if classifier is not None and classifier[i] >= 0:
+                    classification["classifier"] = classifiers[classifier[i]]
+            modified_at = columns["modified_at"][i]
+            rows.append({
+                "filename": filename,
+                "file_type": file_types[columns["file_type"][i]] if columns["file_type"][i] >= 0 else None,
+                "size": int(columns["size"][i]),
+                "modified_at": None if np.isnan(modified_at) else datetime.fromtimestamp(modified_at).isoformat(),
+                "classification": classification
+            })
+        return rows
+
+    def to_documents(self) -> List[Dict[str, Any]]:
+        """All documents as dicts, for responses that list every document."""
+        if self._documents is not None:
+            return self._documents
+        return self.rows(range(len(self)))
+
+    def to_result(self, include_documents: bool = True) -> Dict[str, Any]:
+        """The analyze-folder response: the summary, plus every document when requested."""
+        result = dict(self.summary)
+        if include_documents:
+            result["documents"] = self.to_documents()
+        return result
+
+    def aggregate(self, by: str, indices: Optional[np.ndarray] = None) -> Dict[str, Dict[str, Any]]:
+        """Count, total size and average confidence of documents per category or file type."""
+        if by not in GROUP_COLUMNS:
+            raise ValueError(f"Cannot aggregate by {by!r}; use one of {', '.join(GROUP_COLUMNS)}")
+        table = self.meta["categories"] if by == "category" else self.meta["file_types"]
+        codes = self.columns[by]
+        size = self.columns["size"]
+        confidence = self.columns["confidence"]
+        if indices is not None:
+            codes, size, confidence = codes[indices], size[indices], confidence[indices]
+
+        valid = codes >= 0
+        codes, size, confidence = codes[valid], size[valid], confidence[valid]
+        counts = np.bincount(codes, minlength=len(table))
+        sizes = np.bincount(codes, weights=size, minlength=len(table))
+        scored = ~np.isnan(confidence)
+        confidence_sums = np.bincount(codes[scored], weights=confidence[scored], minlength=len(table))
+        confidence_counts = np.bincount(codes[scored], minlength=len(table))
+
+        groups = {}
+        for code, label in enumerate(table):
+            if counts[code]:
+                groups[label] = {
+                    "count": int(counts[code]),
+                    "total_size": int(sizes[code]),
+                    "average_confidence": (
+                        float(confidence_sums[code] / confidence_counts[code]) if confidence_counts[code] else None
+                    )
+                }
+        return groups
+
+    def size_distribution(self, edges: Sequence[int] = SIZE_BUCKETS) -> List[Dict[str, Any]]:
+        """Number of documents per file size bucket, for a histogram of any number of documents."""
+        sizes = self.columns["size"][self.columns["error"] < 0]
+        counts = np.bincount(np.searchsorted(edges, sizes, side="right"), minlength=len(edges) + 1)
+        bounds = [0, *edges, None]
+        return [
+            {"min": bounds[i], "max": bounds[i + 1], "count": int(count)}
+            for i, count in enumerate(counts)
+        ]
+
+    def describe(self) -> Dict[str, Any]:
+        """Snapshot metadata without the string tables."""
+        return {
+            "folder_path": self.meta["folder_path"],
+            "created_at": self.meta["created_at"],
+            "documents": len(self),
+            "file_types": self.meta["file_types"],
+            "categories": self.meta["categories"],
+            "summary": self.summary
+        }
+
+def snapshot_path(folder_path: str, directory: Path = SNAPSHOT_DIR) -> Path:
+    """The snapshot file of a folder."""
+    digest = hashlib.sha1(os.path.abspath(folder_path).encode("utf-8", "surrogatepass")).hexdigest()
+    return directory / f"{digest}.npz"
+
+_loaded: "OrderedDict[Tuple[str, int], Snapshot]" = OrderedDict()
+_loaded_lock = threading.Lock()
+
+def load_snapshot(folder_path: str, directory: Path = SNAPSHOT_DIR) -> Optional[Snapshot]:
+    """Return the latest snapshot of a folder, or None; recently used snapshots stay loaded."""
+    path = snapshot_path(folder_path, directory)
+    try:
+        key = (str(path), path.stat().st_mtime_ns)
+    except FileNotFoundError:
+        return None
+    with _loaded_lock:
+        snapshot = _loaded.get(key)
+        if snapshot is not None:
+            _loaded.move_to_end(key)
+            return snapshot
+    snapshot = Snapshot.load(path)
+    with _loaded_lock:
+        _loaded[key] = snapshot
+        while len(_loaded) > SNAPSHOT_CACHE_SIZE:
+            _loaded.popitem(last=False)
+    return snapshot
+
+def save_snapshot(snapshot: Snapshot, directory: Path = SNAPSHOT_DIR) -> Path:
+    """Save a folder's snapshot, replacing the previous one."""
+    path = snapshot_path(snapshot.meta["folder_path"], directory)
+    snapshot.save(path)
+    return path
@@ -0,0 +1,210 @@
+"""Generate a reproducible synthetic document corpus.
+
+Usage:
+    python -m benchmarks.corpus --out /tmp/corpus --files 1000 --mix docx=0.25,pdf=0.25,txt=0.3,csv=0.2
+
+Files are spread over a tree of ``--depth`` levels with ``--fanout``
+subdirectories each. Text sizes follow a log-normal distribution around
+``--mean-kb``; a ``--duplicates`` fraction of files are byte-identical copies of
+earlier ones. Each document is written around one topic from TOPICS, so a
+classifier (or the stub Mistral server) has something to find. The same seed
+always produces the same corpus.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import shutil
+from typing import Dict, List
+
+import docx
+
+TOPICS = {
+    "Finance": "invoice budget revenue payment tax audit balance forecast expense ledger".split(),
+    "Legal": "contract agreement clause liability court compliance party terms signature law".split(),
+    "Human Resources": "employee hiring salary leave onboarding performance review benefits training policy".split(),
+    "Marketing": "campaign brand customer audience launch social media engagement conversion market".split(),
+    "Engineering": "system deployment server release architecture database latency incident design code".split()
+}
+FILLER = (
+    "the a of and to in for on with as by at from this that is was be are will "
+    "project team report meeting plan update week month quarter result note"
+).split()
+
+DEFAULT_MIX = {"docx": 0.25, "pdf": 0.25, "txt": 0.3, "csv": 0.2}
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse ``docx=0.25,pdf=0.25,...`` into normalized weights."""
+    mix = {}
+    for part in value.split(","):
+        kind, weight = part.split("=")
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"Unknown file type {kind!r}; use {', '.join(DEFAULT_MIX)}")
+        mix[kind] = float(weight)
+    total = sum(mix.values())
+    return {kind: weight / total for kind, weight in mix.items()}
+
+
+def make_lines(rng: random.Random, topic: str, size: int) -> List[str]:
+    """Build lines of roughly ``size`` characters in total, mentioning ``topic``'s words."""
+    words = TOPICS[topic]
+    lines = []
+    length = 0
+    while length < size:
+        line = " ".join(
+            rng.choice(words) if rng.random() < 0.3 else rng.choice(FILLER)
+            for _ in range(rng.randint(8, 16))
+        ).capitalize() + "."
+        lines.append(line)
+        length += len(line) + 1
+    return lines
+
+
+def write_txt(path: str, lines: List[str]):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+def write_csv(path: str, lines: List[str]):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "description", "amount"])
+        for i, line in enumerate(lines):
+            writer.writerow([i, line, round(len(line) * 1.5, 2)])
+
+
+def write_docx(path: str, lines: List[str]):
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    document.save(path)
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, lines: List[str], lines_per_page: int = 60):
+    """Write a minimal text PDF (Helvetica, one text stream per page) without extra dependencies."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_lines in pages:
+        stream = "BT /F1 9 Tf 40 800 Td 12 TL\n" + "".join(
+            f"({_pdf_escape(line[:110])}) '\n" for line in page_lines
+        ) + "ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        content_id = len(objects)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1", "replace")
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(body)
+
+
+WRITERS = {"txt": write_txt, "csv": write_csv, "docx": write_docx, "pdf": write_pdf}
+
+
+def make_directories(root: str, depth: int, fanout: int) -> List[str]:
+    """Create a tree of ``depth`` levels below root and return every directory, root included."""
+    directories = [root]
+    level = [root]
+    for d in range(depth):
+        next_level = []
+        for parent in level:
+            for i in range(fanout):
+                path = os.path.join(parent, f"level{d + 1}_{i}")
+                os.makedirs(path, exist_ok=True)
+                next_level.append(path)
+        directories.extend(next_level)
+        level = next_level
+    return directories
+
+
+def generate_corpus(
+    out: str,
+    files: int = 1000,
+    mix: Dict[str, float] = None,
+    mean_kb: float = 8.0,
+    duplicates: float = 0.1,
+    depth: int = 2,
+    fanout: int = 3,
+    seed: int = 42
+) -> Dict:
+    """Generate the corpus under ``out`` and return a manifest describing it."""
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    kinds, weights = zip(*mix.items())
+    os.makedirs(out, exist_ok=True)
+    directories = make_directories(out, depth, fanout)
+
+    manifest = {
+        "files": 0,
+        "bytes": 0,
+        "duplicates": 0,
+        "by_type": {kind: 0 for kind in kinds},
+        "by_topic": {topic: 0 for topic in TOPICS},
+        "directories": len(directories),
+        "params": {
+            "files": files, "mix": mix, "mean_kb": mean_kb, "duplicates": duplicates,
+            "depth": depth, "fanout": fanout, "seed": seed
+        }
+    }
+    originals = {kind: [] for kind in kinds}
+    for i in range(files):
+        kind = rng.choices(kinds, weights)[0]
+        path = os.path.join(rng.choice(directories), f"doc_{i:06d}.{kind}")
+        if originals[kind] and rng.random() < duplicates:
+            source, topic = rng.choice(originals[kind])
+            shutil.copyfile(source, path)
+            manifest["duplicates"] += 1
+        else:
+            topic = rng.choice(list(TOPICS))
+            size = int(rng.lognormvariate(0, 0.75) * mean_kb * 1024)
+            WRITERS[kind](path, make_lines(rng, topic, max(size, 200)))
+            originals[kind].append((path, topic))
+        manifest["files"] += 1
+        manifest["bytes"] += os.path.getsize(path)
+        manifest["by_type"][kind] += 1
+        manifest["by_topic"][topic] += 1
+    return manifest
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help="e.g. docx=0.25,pdf=0.25,txt=0.3,csv=0.2")
+    parser.add_argument("--mean-kb", type=float, default=8.0, help="mean text size per original file")
+    parser.add_argument("--duplicates", type=float, default=0.1, help="fraction of files that copy an earlier one")
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--fanout", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", required=True)
+    add_arguments(parser)
+    args = parser.parse_args()
+    manifest = generate_corpus(
+        args.out, args.files, args.mix, args.mean_kb, args.duplicates, args.depth, args.fanout, args.seed
+    )
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
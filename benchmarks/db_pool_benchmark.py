@@ -0,0 +1,99 @@
+"""Measure document ingest throughput against a local Postgres for several pool sizes.
+
+Usage:
+    python -m benchmarks.db_pool_benchmark --documents 5000 --workers 16 --pool-sizes 1 5 10 20
+
+Each worker writes its share of synthetic documents through one session
+(session-per-unit-of-work), committing every ``--batch`` documents.
+The target database is taken from DATABASE_URL; tables are created if missing
+and the benchmark rows are deleted afterwards.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.database import DATABASE_URL, Base, build_engine
+from app.models.database_models import DBDocument, DBFolder
+from app.models.document import Document, DocumentType
+from app.services.database_service import DatabaseService
+
+
+def make_document(index: int) -> Document:
+    """Build a synthetic document."""
+    now = datetime.now()
+    return Document(
+        id=str(uuid.uuid4()),
+        filename=f"bench_{index}.txt",
+        file_type=DocumentType.TXT,
+        size=1024 + index,
+        created_at=now,
+        modified_at=now,
+        path=f"bench/bench_{index}.txt",
+        content="lorem ipsum " * 50,
+        metadata={"mime_type": "text/plain", "processed": True}
+    )
+
+
+async def ingest(session_factory, folder_id: str, documents, batch: int):
+    """Write a slice of documents through one session."""
+    async with session_factory() as session:
+        db_service = DatabaseService(session)
+        for i, doc in enumerate(documents, start=1):
+            await db_service.create_document(doc, folder_id, commit=False)
+            if i % batch == 0:
+                await session.commit()
+        await session.commit()
+
+
+async def run(pool_size: int, args) -> float:
+    """Run one ingest round and return documents per second."""
+    engine = build_engine(DATABASE_URL, pool_size=pool_size, max_overflow=0)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        async with session_factory() as session:
+            folder = await DatabaseService(session).create_folder(
+                name="bench", path=f"/bench/{uuid.uuid4()}"
+            )
+
+        documents = [make_document(i) for i in range(args.documents)]
+        slices = [documents[w::args.workers] for w in range(args.workers)]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(ingest(session_factory, folder.id, s, args.batch) for s in slices))
+        elapsed = time.perf_counter() - start
+
+        async with session_factory() as session:
+            await session.execute(delete(DBDocument).where(DBDocument.folder_id == folder.id))
+            await session.execute(delete(DBFolder).where(DBFolder.id == folder.id))
+            await session.commit()
+
+        return args.documents / elapsed
+    finally:
+        await engine.dispose()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 5, 10, 20])
+    args = parser.parse_args()
+
+    print(f"{'pool_size':>10} {'docs/sec':>12}")
+    for pool_size in args.pool_sizes:
+        rate = await run(pool_size, args)
+        print(f"{pool_size:>10} {rate:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""Check that importing the APIs stays within an import-time budget.
+
+Usage:
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --app-budget-ms 1200 --backend-budget-ms 600 --runs 5
+
+Each API module is imported in a fresh interpreter with ``-X importtime``; the
+best of ``--runs`` is compared with its budget and the slowest imports are
+listed. Heavy dependencies that should only load on first use (spaCy, the
+Mistral and OpenAI clients, document parsers) must not appear at all. Exits
+with status 1 when a budget is exceeded or a deferred module was imported.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules loaded on first use (see ClassificationService.nlp and get_mistral_client)
+DEFERRED_MODULES = ("spacy", "asent", "openai", "mistralai", "docx", "PyPDF2", "textblob")
+
+# (module, working directory): backend/app.py runs from backend/ and imports its modules top-level
+TARGETS = {
+    "app": ("app.main", ROOT),
+    "backend": ("app", ROOT / "backend")
+}
+
+
+def measure(module: str, cwd: Path) -> Tuple[float, Dict[str, float]]:
+    """Import ``module`` in a fresh interpreter; return total ms and cumulative ms per module."""
+    env = dict(os.environ, PYTHONPATH=str(cwd))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if cumulative_us.strip().isdigit():
+            cumulative[name.strip()] = int(cumulative_us) / 1000
+    return cumulative.get(module, sum(cumulative.values())), cumulative
+
+
+def check(name: str, budget_ms: float, runs: int, top: int) -> List[str]:
+    """Measure one target, print its report and return the problems found."""
+    module, cwd = TARGETS[name]
+    best_ms, modules = min((measure(module, cwd) for _ in range(runs)), key=lambda run: run[0])
+    problems = []
+
+    status = "ok" if best_ms <= budget_ms else "OVER BUDGET"
+    print(f"{name}: import {module} took {best_ms:.0f} ms (budget {budget_ms:.0f} ms) {status}")
+    if best_ms > budget_ms:
+        problems.append(f"{name} import took {best_ms:.0f} ms, over its {budget_ms:.0f} ms budget")
+
+    for mod, ms in sorted(modules.items(), key=lambda item: item[1], reverse=True)[1:top + 1]:
+        print(f"  {ms:>8.1f} ms  {mod}")
+
+    deferred = sorted({mod.split(".")[0] for mod in modules} & set(DEFERRED_MODULES))
+    if deferred:
+        print(f"  imported at startup but should load on first use: {', '.join(deferred)}")
+        problems.append(f"{name} imports {', '.join(deferred)} at startup")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS), default=sorted(TARGETS))
+    parser.add_argument("--app-budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_APP_MS", "1500")))
+    parser.add_argument("--backend-budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_BACKEND_MS", "750")))
+    parser.add_argument("--runs", type=int, default=3, help="imports per target; the fastest counts")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports listed")
+    args = parser.parse_args()
+
+    budgets = {"app": args.app_budget_ms, "backend": args.backend_budget_ms}
+    problems = []
+    for name in args.targets:
+        problems.extend(check(name, budgets[name], args.runs, args.top))
+    if problems:
+        print("\n".join(["", *problems]))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
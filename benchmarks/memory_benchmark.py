@@ -0,0 +1,172 @@
+"""Memory used per document by the in-memory representations of the pipeline.
+
+Usage:
+    python -m benchmarks.memory_benchmark
+    python -m benchmarks.memory_benchmark --documents 200000 --only record snapshot
+
+Builds ``--documents`` documents (1M by default) from the same synthetic scan
+entries in each representation and reports the bytes allocated per document,
+measured with tracemalloc:
+
+  * ``pydantic``: the Pydantic ``Document`` with nested ``SentimentAnalysis``,
+    metadata dict and datetimes, as the app services used to build per file
+  * ``record``: the slotted ``DocumentRecord`` they build now
+  * ``result_dict``: the dict ``process_file`` returns in the backend
+  * ``snapshot``: the columnar snapshot (backend/snapshots.py) that the backend
+    keeps instead of those dicts
+
+The scan entries themselves (names, paths, hashes) exist in every case and are
+not counted.
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple
+
+from app.models.document import Document, DocumentRecord, DocumentType, SentimentAnalysis
+from backend.snapshots import Snapshot
+
+FILE_TYPES = [DocumentType.PDF, DocumentType.DOCX, DocumentType.TXT, DocumentType.MARKDOWN]
+MIME_TYPES = ["application/pdf", "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+              "text/plain", "text/markdown"]
+CATEGORIES = ["Finance", "Legal", "Human Resources", "Marketing", "Engineering"]
+LABELS = ["positive", "neutral", "negative"]
+
+
+class Entry(NamedTuple):
+    """What the scanner, hasher and analyzers produce for one file."""
+    relative_path: str
+    kind: int
+    size: int
+    created_at: float
+    modified_at: float
+    content_hash: str
+    polarity: float
+    subjectivity: float
+    label: str
+    category: str
+    confidence: float
+
+
+def make_entries(count: int, seed: int = 42) -> List[Entry]:
+    rng = random.Random(seed)
+    now = time.time()
+    entries = []
+    for i in range(count):
+        kind = rng.randrange(len(FILE_TYPES))
+        extension = FILE_TYPES[kind].value.lower()
+        modified_at = now - rng.random() * 86400 * 365
+        entries.append(Entry(
+            f"level1_{i % 7}/level2_{i % 13}/doc_{i:07d}.{extension}", kind, rng.randrange(100, 1_000_000),
+            modified_at - rng.random() * 86400, modified_at, f"sha256:{rng.getrandbits(256):064x}",
+            rng.uniform(-1, 1), rng.random(), rng.choice(LABELS), rng.choice(CATEGORIES), rng.choice([0.8, 0.6, 0.5])
+        ))
+    return entries
+
+
+def build_pydantic(entries: List[Entry]) -> List[Document]:
+    return [
+        Document(
+            id=str(uuid.uuid4()),
+            filename=entry.relative_path,
+            file_type=FILE_TYPES[entry.kind],
+            size=entry.size,
+            created_at=datetime.fromtimestamp(entry.created_at),
+            modified_at=datetime.fromtimestamp(entry.modified_at),
+            path=entry.relative_path,
+            content_hash=entry.content_hash,
+            sentiment=SentimentAnalysis(polarity=entry.polarity, subjectivity=entry.subjectivity, sentiment=entry.label),
+            metadata={"mime_type": MIME_TYPES[entry.kind], "processed": True}
+        )
+        for entry in entries
+    ]
+
+
+def build_records(entries: List[Entry]) -> List[DocumentRecord]:
+    return [
+        DocumentRecord(
+            id=str(uuid.uuid4()),
+            filename=entry.relative_path,
+            file_type=FILE_TYPES[entry.kind],
+            size=entry.size,
+            created_at=entry.created_at,
+            modified_at=entry.modified_at,
+            path=entry.relative_path,
+            content_hash=entry.content_hash,
+            mime_type=MIME_TYPES[entry.kind],
+            sentiment_polarity=entry.polarity,
+            sentiment_subjectivity=entry.subjectivity,
+            sentiment_label=entry.label
+        )
+        for entry in entries
+    ]
+
+
+def build_result_dicts(entries: List[Entry]) -> List[Dict]:
+    return [
+        {
+            "filename": entry.relative_path.rsplit("/", 1)[-1],
+            "file_type": FILE_TYPES[entry.kind].value,
+            "size": entry.size,
+            "modified_at": datetime.fromtimestamp(entry.modified_at).isoformat(),
+            "classification": {"category": entry.category, "confidence": entry.confidence, "chunks": 1}
+        }
+        for entry in entries
+    ]
+
+
+def build_snapshot(entries: List[Entry]) -> Snapshot:
+    # The result dicts only exist while the snapshot is built, so they are not counted
+    tracemalloc.stop()
+    documents = build_result_dicts(entries)
+    tracemalloc.start()
+    snapshot = Snapshot.from_documents("/benchmark", documents, {"total_documents": len(documents)})
+    snapshot._documents = None
+    del documents
+    gc.collect()
+    return snapshot
+
+
+REPRESENTATIONS: Dict[str, Callable] = {
+    "pydantic": build_pydantic,
+    "record": build_records,
+    "result_dict": build_result_dicts,
+    "snapshot": build_snapshot
+}
+
+
+def measure(build: Callable, entries: List[Entry]) -> Dict[str, float]:
+    """Bytes still allocated after building, per document, and the build time."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    built = build(entries)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return {"bytes_per_document": allocated / len(entries), "total_mb": allocated / 1024 / 1024, "seconds": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--only", nargs="+", choices=list(REPRESENTATIONS), default=list(REPRESENTATIONS))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    entries = make_entries(args.documents, args.seed)
+    print(f"{args.documents} documents")
+    print(f"{'representation':<16} {'bytes/doc':>10} {'total MB':>10} {'build s':>8}")
+    for name in args.only:
+        result = measure(REPRESENTATIONS[name], entries)
+        print(f"{name:<16} {result['bytes_per_document']:>10.0f} {result['total_mb']:>10.1f} {result['seconds']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""End-to-end pipeline benchmark on a generated corpus.
+
+Usage:
+    python -m benchmarks.pipeline_benchmark --target backend --files 500 --mistral-latency-ms 150 --output run.json
+    python -m benchmarks.pipeline_benchmark --target app --files 500 --compare baseline.json
+
+``--target backend`` runs ``/api/analyze-folder`` of ``backend/app.py`` with
+per-file profiling; Mistral requests go to a local stub server (see
+benchmarks/stub_mistral.py), so runs cost nothing and have a fixed latency.
+``--target app`` ingests the corpus through the DocumentService of ``app/``
+into DATABASE_URL, a fresh SQLite file by default (set DATABASE_URL for
+Postgres; needs the spaCy model ``en_core_web_sm``).
+
+The corpus is generated from ``--seed`` (see benchmarks/corpus.py), caches
+start empty, and the report holds files/sec, p50/p95 latency per stage, peak
+RSS, API calls, the parameters and the git commit. ``--output`` saves it as
+JSON; ``--compare`` prints the change against a saved report and exits with
+status 1 when throughput or a p95 regressed by more than ``--tolerance``.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.corpus import add_arguments, generate_corpus
+from benchmarks.stub_mistral import StubMistralServer
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def summarize_stages(files: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """p50/p95/mean milliseconds per stage over the files that went through it."""
+    stages = sorted({stage for timings in files for stage in timings})
+    summary = {}
+    for stage in stages:
+        values = [timings[stage] for timings in files if stage in timings]
+        summary[stage] = {
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "mean_ms": sum(values) / len(values),
+            "count": len(values)
+        }
+    return summary
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak resident set size of this process and of its finished child processes."""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KiB on Linux
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run_backend(corpus: str, workdir: str) -> Dict:
+    """Analyze the corpus with backend/app.py, timing every file."""
+    # The backend imports its modules as top-level names and keeps its cache in ./cache
+    sys.path.insert(0, str(ROOT / "backend"))
+    os.chdir(workdir)
+    spec = importlib.util.spec_from_file_location("backend_app", ROOT / "backend" / "app.py")
+    backend = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(backend)
+
+    started = time.perf_counter()
+    result = await backend._analyze_folder(corpus, profile=True)
+    elapsed = time.perf_counter() - started
+
+    documents = result["documents"]
+    return {
+        "elapsed_s": elapsed,
+        "files": len(documents),
+        "errors": sum(1 for doc in documents if "error" in doc),
+        "file_timings": [
+            dict(doc["profile"]["stages_ms"], total=doc["profile"]["total_ms"])
+            for doc in documents if "profile" in doc
+        ]
+    }
+
+
+async def run_app(corpus: str, workdir: str) -> Dict:
+    """Ingest the corpus with the DocumentService of app/, timing every file."""
+    os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{workdir}/benchmark.db")
+    sys.path.insert(0, str(ROOT))
+    from app.database import Base, engine
+    from app.services.document_service import DocumentService
+    from backend.metrics import collect_timings
+
+    file_timings = []
+
+    class TimedDocumentService(DocumentService):
+        async def create_documents(self, files, *args, **kwargs):
+            started = time.perf_counter()
+            with collect_timings() as timings:
+                try:
+                    return await super().create_documents(files, *args, **kwargs)
+                finally:
+                    # Files are written in batches; each file of a batch is charged an equal share
+                    share = 1000 / max(1, len(files))
+                    file_timings.extend([dict(
+                        {stage: seconds * share for stage, seconds in timings.items()},
+                        total=(time.perf_counter() - started) * share
+                    )] * len(files))
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    service = TimedDocumentService(base_directory=os.path.join(workdir, "base"))
+    try:
+        started = time.perf_counter()
+        analysis, total = await service.analyze_folder(corpus)
+        elapsed = time.perf_counter() - started
+    finally:
+        if service._sentiment_pool is not None:
+            service._sentiment_pool.shutdown()
+        await engine.dispose()
+    return {"elapsed_s": elapsed, "files": total, "errors": 0, "file_timings": file_timings}
+
+
+TARGETS = {"backend": run_backend, "app": run_app}
+
+
+def compare(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Print the change against a baseline report and return the regressions."""
+    regressions = []
+    print(f"\nCompared with {baseline.get('commit', '?')} (tolerance {tolerance:.0%}):")
+
+    def check(name: str, current: float, previous: float, higher_is_better: bool):
+        if not previous:
+            return
+        change = (current - previous) / previous
+        worse = -change if higher_is_better else change
+        flag = "REGRESSION" if worse > tolerance else ""
+        print(f"  {name:<28} {previous:>10.2f} -> {current:>10.2f} ({change:+.1%}) {flag}")
+        if flag:
+            regressions.append(name)
+
+    check("files_per_sec", report["files_per_sec"], baseline.get("files_per_sec", 0), True)
+    for stage, values in report["stages"].items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous:
+            check(f"{stage} p95_ms", values["p95_ms"], previous["p95_ms"], False)
+    check("peak_rss_mb", report["peak_rss_mb"]["self"], baseline.get("peak_rss_mb", {}).get("self", 0), False)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=sorted(TARGETS), default="backend")
+    parser.add_argument("--corpus", help="use an existing corpus directory instead of generating one")
+    add_arguments(parser)
+    parser.add_argument("--mistral-latency-ms", type=float, default=100.0)
+    parser.add_argument("--mistral-rate-limit", type=float, default=0.0, help="fraction of stub requests answered with 429")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    parser.add_argument("--compare", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="pipeline-benchmark-")
+    corpus = args.corpus or os.path.join(workdir, "corpus")
+    manifest = None
+    if not args.corpus:
+        manifest = generate_corpus(
+            corpus, args.files, args.mix, args.mean_kb, args.duplicates, args.depth, args.fanout, args.seed
+        )
+    corpus = os.path.abspath(corpus)
+
+    stub = StubMistralServer(latency_ms=args.mistral_latency_ms, rate_limit=args.mistral_rate_limit, seed=args.seed)
+    stub.start()
+    os.environ["MISTRAL_SERVER_URL"] = stub.url
+    os.environ.setdefault("MISTRAL_API_KEY", "benchmark")
+    try:
+        run = asyncio.run(TARGETS[args.target](corpus, workdir))
+    finally:
+        stub.stop()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    # Read before git is run, as a forked child reports the parent's peak RSS
+    rss = peak_rss_mb()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "target": args.target,
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "corpus": manifest or {"path": corpus},
+        "params": {
+            "mistral_latency_ms": args.mistral_latency_ms,
+            "mistral_rate_limit": args.mistral_rate_limit
+        },
+        "files": run["files"],
+        "errors": run["errors"],
+        "elapsed_s": run["elapsed_s"],
+        "files_per_sec": run["files"] / run["elapsed_s"] if run["elapsed_s"] else 0.0,
+        "stages": summarize_stages(run["file_timings"]),
+        "peak_rss_mb": rss,
+        "api_calls": {"requests": stub.requests, "rate_limited": stub.rate_limited}
+    }
+
+    print(f"{report['files']} files in {report['elapsed_s']:.2f}s ({report['files_per_sec']:.1f} files/sec), "
+          f"{report['errors']} errors")
+    print(f"{'stage':<16} {'p50_ms':>10} {'p95_ms':>10} {'count':>8}")
+    for stage, values in report["stages"].items():
+        print(f"{stage:<16} {values['p50_ms']:>10.2f} {values['p95_ms']:>10.2f} {values['count']:>8}")
+    print(f"peak RSS {report['peak_rss_mb']['self']:.1f} MB (children {report['peak_rss_mb']['children']:.1f} MB), "
+          f"{stub.requests} API calls ({stub.rate_limited} rate limited)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Compare the shared scanner with the directory walkers it replaced.
+
+Usage:
+    python -m benchmarks.scan_benchmark --files 500000 --workers 1 4 8
+
+Generates a synthetic tree (or reuses one passed with --root), then walks it
+with os.walk + os.stat (backend/app.py), Path.rglob + three stat calls
+(ClassificationService.analyze_folder), recursive Path.iterdir
+(DocumentService._process_folder_contents) and scan_directory, and reports
+files/sec for each.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from backend.file_scanner import IGNORED_NAMES, scan_directory
+
+EXTENSIONS = [".txt", ".docx", ".pdf", ".csv", ".md"]
+
+
+def make_tree(root: str, files: int, fanout: int, per_dir: int, seed: int = 42) -> int:
+    """Create ``files`` small files spread over nested directories; return the directory count."""
+    rng = random.Random(seed)
+    directories = [root]
+    created = 0
+    next_dir = 0
+    while created < files:
+        parent = directories[next_dir % len(directories)]
+        next_dir += 1
+        for i in range(fanout):
+            path = os.path.join(parent, f"dir{len(directories)}_{i}")
+            os.mkdir(path)
+            directories.append(path)
+            for j in range(min(per_dir, files - created)):
+                name = os.path.join(path, f"file{j}{rng.choice(EXTENSIONS)}")
+                with open(name, "wb") as f:
+                    f.write(b"x" * rng.randint(0, 64))
+                created += 1
+            # A few files every scanner should skip
+            open(os.path.join(path, ".DS_Store"), "wb").close()
+            if created >= files:
+                break
+    return len(directories)
+
+
+def walk_os(root: str) -> int:
+    count = 0
+    for directory, dirs, files in os.walk(root):
+        for name in files:
+            os.stat(os.path.join(directory, name))
+            count += 1
+    return count
+
+
+def walk_rglob(root: str) -> int:
+    count = 0
+    for path in Path(root).rglob("*"):
+        if path.is_file():
+            path.stat().st_size, path.stat().st_ctime, path.stat().st_mtime
+            count += 1
+    return count
+
+
+def walk_iterdir(root: Path) -> int:
+    count = 0
+    for item in root.iterdir():
+        if item.name.startswith('.') or item.name in IGNORED_NAMES:
+            continue
+        if item.is_file():
+            item.stat()
+            count += 1
+        elif item.is_dir():
+            count += walk_iterdir(item)
+    return count
+
+
+def walk_scanner(root: str, workers: int) -> int:
+    return sum(1 for entry in scan_directory(root, workers=workers) if not entry.is_dir)
+
+
+def timed(label: str, func, *args):
+    start = time.perf_counter()
+    count = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {count:>9} {elapsed:>9.2f} {count / elapsed:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=500000)
+    parser.add_argument("--fanout", type=int, default=8, help="subdirectories per directory")
+    parser.add_argument("--per-dir", type=int, default=50, help="files per directory")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--root", help="existing tree to scan instead of a generated one")
+    parser.add_argument("--keep", action="store_true", help="keep the generated tree")
+    args = parser.parse_args()
+
+    root = args.root
+    if root is None:
+        root = tempfile.mkdtemp(prefix="scan_benchmark_")
+        start = time.perf_counter()
+        directories = make_tree(root, args.files, args.fanout, args.per_dir)
+        print(f"generated {args.files} files in {directories} directories "
+              f"in {time.perf_counter() - start:.1f}s at {root}\n")
+
+    try:
+        print(f"{'walker':<28} {'files':>9} {'seconds':>9} {'files/sec':>12}")
+        timed("os.walk + stat", walk_os, root)
+        timed("Path.rglob + 3x stat", walk_rglob, root)
+        timed("Path.iterdir (recursive)", walk_iterdir, Path(root))
+        for workers in args.workers:
+            timed(f"scan_directory x{workers}", walk_scanner, root, workers)
+    finally:
+        if args.root is None and not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
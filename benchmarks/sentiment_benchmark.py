@@ -0,0 +1,93 @@
+"""Compare TextBlob sentiment with the vectorized SentimentEngine.
+
+Usage:
+    python -m benchmarks.sentiment_benchmark --documents 10000 --workers 4
+
+Generates synthetic documents, scores them with TextBlob one at a time and with
+SentimentEngine in bulk (in-process and through a process pool), then reports
+docs/sec and checks the engine against POLARITY_TOLERANCE and LABEL_AGREEMENT.
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from textblob import TextBlob
+
+from app.services.sentiment_engine import (
+    LABEL_AGREEMENT,
+    POLARITY_TOLERANCE,
+    SentimentEngine,
+    label_for,
+    score_texts,
+)
+
+WORDS = (
+    "the project report client meeting contract budget team result delivery invoice "
+    "schedule document policy agreement proposal analysis summary data plan review"
+).split()
+OPINIONS = (
+    "good bad excellent poor great terrible happy unhappy successful late useful "
+    "difficult clear confusing important expensive cheap strong weak positive negative"
+).split()
+MODIFIERS = ["", "", "", "very ", "not ", "really ", "never "]
+
+
+def make_corpus(count: int, sentences: int, seed: int = 42):
+    """Generate synthetic documents mixing neutral words, opinions and modifiers."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        parts = []
+        for _ in range(sentences):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(5, 12))]
+            words.insert(rng.randint(0, len(words)), rng.choice(MODIFIERS) + rng.choice(OPINIONS))
+            parts.append(" ".join(words).capitalize() + ".")
+        corpus.append(" ".join(parts))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--sentences", type=int, default=20, help="sentences per document")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk", type=int, default=1000, help="documents per process pool task")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.documents, args.sentences)
+
+    start = time.perf_counter()
+    reference = [TextBlob(text).sentiment for text in corpus]
+    textblob_rate = len(corpus) / (time.perf_counter() - start)
+
+    engine = SentimentEngine()
+    start = time.perf_counter()
+    results = engine.score(corpus)
+    engine_rate = len(corpus) / (time.perf_counter() - start)
+
+    chunks = [corpus[i:i + args.chunk] for i in range(0, len(corpus), args.chunk)]
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        list(pool.map(score_texts, chunks[:args.workers]))  # warm up the per-process lexicon
+        start = time.perf_counter()
+        list(pool.map(score_texts, chunks))
+        pool_rate = len(corpus) / (time.perf_counter() - start)
+
+    polarity_error = sum(abs(r["polarity"] - ref.polarity) for r, ref in zip(results, reference)) / len(corpus)
+    subjectivity_error = sum(abs(r["subjectivity"] - ref.subjectivity) for r, ref in zip(results, reference)) / len(corpus)
+    agreement = sum(r["sentiment"] == label_for(ref.polarity) for r, ref in zip(results, reference)) / len(corpus)
+
+    print(f"{'mode':<28} {'docs/sec':>10} {'speedup':>8}")
+    print(f"{'TextBlob (per document)':<28} {textblob_rate:>10.0f} {1.0:>8.1f}")
+    print(f"{'SentimentEngine':<28} {engine_rate:>10.0f} {engine_rate / textblob_rate:>8.1f}")
+    print(f"{f'SentimentEngine x{args.workers} procs':<28} {pool_rate:>10.0f} {pool_rate / textblob_rate:>8.1f}")
+    print()
+    print(f"mean |polarity diff|     {polarity_error:.4f} (tolerance {POLARITY_TOLERANCE})")
+    print(f"mean |subjectivity diff| {subjectivity_error:.4f}")
+    print(f"label agreement          {agreement:.2%} (required {LABEL_AGREEMENT:.0%})")
+    ok = polarity_error <= POLARITY_TOLERANCE and agreement >= LABEL_AGREEMENT
+    print("within tolerance" if ok else "OUTSIDE TOLERANCE")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare per-document spaCy analysis with the batched nlp.pipe path.
+
+Usage:
+    python -m benchmarks.spacy_batch_benchmark --documents 2000 --n-process 1 2 4
+
+Writes synthetic text files to a temporary directory, then reports docs/sec
+and docs/sec per core for:
+  * the old path: full en_core_web_sm pipeline, one ``nlp(text)`` call per document
+  * ClassificationService.analyze_documents_batch for each ``--n-process`` value
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import spacy
+
+from app.models.document import DocumentRecord, DocumentType
+from app.services.classification_service import ClassificationService
+
+WORDS = (
+    "the contract agreement payment invoice report summary good bad excellent poor "
+    "project client meeting proposal terms conditions analysis results happy unhappy"
+).split()
+
+
+def write_corpus(directory: Path, count: int, words_per_doc: int):
+    """Write synthetic text documents and return document records for them."""
+    rng = random.Random(42)
+    now = time.time()
+    documents = []
+    for i in range(count):
+        path = directory / f"doc_{i}.txt"
+        sentences = []
+        for _ in range(words_per_doc // 12):
+            sentences.append(" ".join(rng.choice(WORDS) for _ in range(12)).capitalize() + ".")
+        path.write_text(" ".join(sentences), encoding="utf-8")
+        documents.append(DocumentRecord(
+            id=str(i),
+            filename=path.name,
+            file_type=DocumentType.TXT,
+            size=path.stat().st_size,
+            created_at=now,
+            modified_at=now,
+            path=str(path)
+        ))
+    return documents
+
+
+def bench_per_document(documents) -> float:
+    """Old path: full pipeline, one document at a time."""
+    nlp = spacy.load("en_core_web_sm")
+    nlp.add_pipe("asent_en_v1")
+    start = time.perf_counter()
+    for document in documents:
+        with open(document.path, "r", encoding="utf-8") as f:
+            doc = nlp(f.read())
+        doc._.polarity
+    return len(documents) / (time.perf_counter() - start)
+
+
+def bench_batched(documents, batch_size: int, n_process: int) -> float:
+    """New path: trimmed pipeline through nlp.pipe."""
+    service = ClassificationService(batch_size=batch_size, n_process=n_process)
+    start = time.perf_counter()
+    service.analyze_documents_batch(documents)
+    return len(documents) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=600, help="words per document")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--n-process", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        documents = write_corpus(Path(tmp), args.documents, args.words)
+
+        print(f"{'mode':<24} {'docs/sec':>10} {'docs/sec/core':>14}")
+        rate = bench_per_document(documents)
+        print(f"{'per-document':<24} {rate:>10.1f} {rate:>14.1f}")
+        for n_process in args.n_process:
+            rate = bench_batched(documents, args.batch_size, n_process)
+            print(f"{f'pipe n_process={n_process}':<24} {rate:>10.1f} {rate / n_process:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""A local stand-in for the Mistral chat completions API.
+
+Usage:
+    python -m benchmarks.stub_mistral --port 8900 --latency-ms 150 --rate-limit 0.02
+
+Point the backend at it with ``MISTRAL_SERVER_URL=http://127.0.0.1:8900``.
+Each request sleeps ``--latency-ms`` (with +/-20% jitter) and answers with the
+corpus topic whose keywords occur most often in the prompt; a ``--rate-limit``
+fraction of requests get an HTTP 429 instead. Requests are counted so the
+benchmark can report API calls.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.corpus import TOPICS
+
+
+def classify(prompt: str) -> str:
+    """Return the topic whose keywords occur most often in ``prompt``."""
+    words = prompt.lower().split()
+    return max(TOPICS, key=lambda topic: sum(words.count(word) for word in TOPICS[topic]))
+
+
+class StubMistralServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency_ms: float = 0.0, rate_limit: float = 0.0, seed: int = 42):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency_ms = latency_ms
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.rate_limited = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "StubMistralServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def next_response(self):
+        """Count a request and return (delay in seconds, whether it is rate limited)."""
+        with self._lock:
+            self.requests += 1
+            limited = self._rng.random() < self.rate_limit
+            if limited:
+                self.rate_limited += 1
+            jitter = self._rng.uniform(0.8, 1.2)
+        return self.latency_ms * jitter / 1000, limited
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        delay, limited = self.server.next_response()
+        time.sleep(delay)
+        if not self.path.endswith("/chat/completions"):
+            self._send(404, {"message": "Not found"})
+        elif limited:
+            self._send(429, {"message": "Requests rate limit exceeded"})
+        else:
+            prompt = " ".join(message.get("content", "") for message in body.get("messages", []))
+            self._send(200, {
+                "id": uuid.uuid4().hex,
+                "object": "chat.completion",
+                "model": body.get("model", "stub"),
+                "created": int(time.time()),
+                "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 2, "total_tokens": len(prompt) // 4 + 2},
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": classify(prompt)},
+                    "finish_reason": "stop"
+                }]
+            })
+
+    def _send(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="fraction of requests answered with 429")
+    args = parser.parse_args()
+    server = StubMistralServer(args.port, args.latency_ms, args.rate_limit)
+    print(f"Stub Mistral API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"{server.requests} requests, {server.rate_limited} rate limited")
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,16 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_from_directory, g, Response
 import os
 import logging
 import shutil
 import requests
-from werkzeug.utils import secure_filename
 import sys
-from typing import Optional
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from upload_paths import FolderTree, sanitize_path
+from upload_store import UploadStore, parse_manifest
 
 # Configure logging
 logging.basicConfig(
@@ -19,6 +24,19 @@ app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 1024 * 1024 * 1024  # 1GB max file size
 app.config['UPLOAD_FOLDER'] = 'temp_uploads'
 app.config['BACKEND_URL'] = os.getenv('BACKEND_URL', 'http://localhost:8000')
+# Forward backend JSON as received (still compressed) instead of decoding and re-encoding it
+app.config['BACKEND_PASSTHROUGH'] = os.getenv('BACKEND_PASSTHROUGH', 'true').lower() in ('1', 'true', 'yes', 'on')
+
+# Backend response headers kept when relaying a response
+RELAYED_HEADERS = ('Content-Type', 'Content-Encoding', 'Content-Length', 'Vary', 'ETag', 'Last-Modified', 'Cache-Control')
+# Seconds a backend response is served from the proxy cache before it is revalidated with its ETag (0 disables it)
+app.config['PROXY_CACHE_TTL'] = float(os.getenv('PROXY_CACHE_TTL', '5'))
+app.config['PROXY_CACHE_ENTRIES'] = int(os.getenv('PROXY_CACHE_ENTRIES', '64'))
+# Larger responses are relayed but not cached
+app.config['PROXY_CACHE_MAX_BYTES'] = int(os.getenv('PROXY_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+
+# Content-addressed store that chunked uploads are assembled in; kept across uploads
+app.config['UPLOAD_STORE'] = os.getenv('UPLOAD_STORE', 'upload_store')
 
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -27,6 +45,171 @@ logger.info(f"Created upload folder: {app.config['UPLOAD_FOLDER']}")
 # Store the current folder path
 current_folder_path: Optional[str] = None
 
+upload_store = UploadStore(app.config['UPLOAD_STORE'])
+# Tree of the current upload, recorded as files arrive; None when it is not known
+upload_tree: Optional[FolderTree] = None
+# Upload folder paths waiting for content that is still being uploaded, by digest
+pending_placements: Dict[str, List[str]] = {}
+pending_placements_lock = threading.Lock()
+
+# Prometheus metrics
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+REQUEST_SECONDS = Histogram("frontend_request_seconds", "Request latency by endpoint", ["endpoint"], buckets=LATENCY_BUCKETS)
+REQUESTS_IN_FLIGHT = Gauge("frontend_requests_in_flight", "Requests currently being handled")
+BACKEND_SECONDS = Histogram("frontend_backend_request_seconds", "Backend call latency by path", ["path"], buckets=LATENCY_BUCKETS)
+BACKEND_ERRORS = Counter("frontend_backend_errors_total", "Failed or non-200 backend calls by path", ["path"])
+UPLOAD_SAVE_SECONDS = Histogram("frontend_upload_save_seconds", "Time spent saving an uploaded folder", buckets=LATENCY_BUCKETS)
+UPLOADED_FILES = Counter("frontend_uploaded_files_total", "Files received through folder uploads")
+UPLOAD_CHUNKS = Counter("frontend_upload_chunks_total", "Chunks received through chunked uploads")
+UPLOAD_SKIPPED_FILES = Counter("frontend_upload_skipped_files_total", "Files not transferred because the store already had them")
+PROXY_CACHE_REQUESTS = Counter(
+    "frontend_proxy_cache_requests_total", "Proxied GETs by outcome (hit, revalidated, miss)", ["outcome"]
+)
+
+def call_backend(method: str, path: str, **kwargs) -> requests.Response:
+    """Call the backend API, recording latency and errors."""
+    start = time.perf_counter()
+    try:
+        response = requests.request(method, f"{app.config['BACKEND_URL']}{path}", **kwargs)
+    except requests.RequestException:
+        BACKEND_ERRORS.labels(path).inc()
+        raise
+    finally:
+        BACKEND_SECONDS.labels(path).observe(time.perf_counter() - start)
+    if response.status_code not in (200, 304):
+        BACKEND_ERRORS.labels(path).inc()
+    return response
+
+def relay_options() -> dict:
+    """Extra ``call_backend`` arguments for a response that will be relayed to the client."""
+    if not app.config['BACKEND_PASSTHROUGH']:
+        return {}
+    # The backend compresses with the client's preferred coding, so the bytes can be forwarded as they are
+    return {"stream": True, "headers": {"Accept-Encoding": request.headers.get("Accept-Encoding", "identity")}}
+
+def relay(response: requests.Response) -> Response:
+    """Return a backend response to the client; in pass-through mode its bytes are never decoded."""
+    if not app.config['BACKEND_PASSTHROUGH']:
+        return jsonify(response.json())
+    headers = {name: response.headers[name] for name in RELAYED_HEADERS if name in response.headers}
+    body = response.raw.stream(64 * 1024, decode_content=False)
+    relayed = Response(body, status=response.status_code, headers=headers, direct_passthrough=True)
+    relayed.call_on_close(response.close)
+    return relayed
+
+class ResponseCache:
+    """Recent backend responses, served for ``ttl`` seconds and then revalidated with their ETag."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple, Dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: Tuple, body: bytes, headers: Dict[str, str]):
+        with self._lock:
+            self._entries.pop(key, None)
+            while len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = {"body": body, "headers": headers, "stored_at": time.monotonic()}
+
+    def refresh(self, key: Tuple):
+        """Mark an entry as fresh again after the backend confirmed it is unchanged."""
+        with self._lock:
+            if key in self._entries:
+                self._entries[key]["stored_at"] = time.monotonic()
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.monotonic() - entry["stored_at"] < self.ttl
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+response_cache = ResponseCache(app.config['PROXY_CACHE_TTL'], app.config['PROXY_CACHE_ENTRIES'])
+
+def client_has(headers: Dict[str, str]) -> bool:
+    """Whether the client already holds the response with these headers (If-None-Match)."""
+    etag = headers.get('ETag')
+    if not etag:
+        return False
+    tags = {tag.strip().removeprefix('W/') for tag in request.headers.get('If-None-Match', '').split(',')}
+    return etag.removeprefix('W/') in tags or '*' in tags
+
+def respond_cached(body: bytes, headers: Dict[str, str]) -> Response:
+    """Send a cached body, or 304 when the client's copy matches."""
+    if client_has(headers):
+        return Response(status=304, headers={name: headers[name] for name in ('ETag', 'Last-Modified', 'Cache-Control') if name in headers})
+    return Response(body, headers=headers)
+
+def read_backend_body(response: requests.Response) -> Tuple[bytes, Dict[str, str]]:
+    """The body and headers to send on; in pass-through mode the backend's bytes, still encoded."""
+    headers = {name: response.headers[name] for name in RELAYED_HEADERS if name in response.headers}
+    if app.config['BACKEND_PASSTHROUGH']:
+        return response.raw.read(decode_content=False), headers
+    headers.pop('Content-Encoding', None)
+    headers.pop('Content-Length', None)
+    return jsonify(response.json()).get_data(), headers
+
+def proxy_get(path: str, params: Dict[str, str], error_message: str) -> Response:
+    """GET a backend endpoint through the response cache.
+
+    A fresh cached response is served without calling the backend. A stale one
+    is revalidated with If-None-Match and reused when the backend answers 304.
+    Without a cached response, the client's own validators are forwarded, so
+    an unchanged folder costs neither an analysis nor a transfer.
+    """
+    encoding = request.headers.get('Accept-Encoding', 'identity') if app.config['BACKEND_PASSTHROUGH'] else ''
+    key = (path, tuple(sorted(params.items())), encoding)
+    entry = response_cache.get(key) if response_cache.ttl > 0 else None
+    if entry is not None and response_cache.is_fresh(entry):
+        PROXY_CACHE_REQUESTS.labels('hit').inc()
+        return respond_cached(entry["body"], entry["headers"])
+
+    options = relay_options()
+    headers = options.setdefault("headers", {})
+    if entry is not None and 'ETag' in entry["headers"]:
+        headers['If-None-Match'] = entry["headers"]['ETag']
+    else:
+        for name in ('If-None-Match', 'If-Modified-Since'):
+            if name in request.headers:
+                headers[name] = request.headers[name]
+
+    response = call_backend("GET", path, params=params, **options)
+    if response.status_code == 304:
+        response.close()
+        if entry is not None:
+            PROXY_CACHE_REQUESTS.labels('revalidated').inc()
+            response_cache.refresh(key)
+            return respond_cached(entry["body"], entry["headers"])
+        PROXY_CACHE_REQUESTS.labels('miss').inc()
+        return Response(status=304, headers={name: response.headers[name] for name in RELAYED_HEADERS if name in response.headers})
+    if response.status_code != 200:
+        logger.error(f"Error from backend: {response.text}")
+        return jsonify({"error": error_message}), 500
+
+    PROXY_CACHE_REQUESTS.labels('miss').inc()
+    body, relayed_headers = read_backend_body(response)
+    if response_cache.ttl > 0 and 'ETag' in relayed_headers and len(body) <= app.config['PROXY_CACHE_MAX_BYTES']:
+        response_cache.put(key, body, relayed_headers)
+    return respond_cached(body, relayed_headers)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+
+@app.teardown_request
+def record_request_metrics(error=None):
+    started = g.pop('request_started', None)
+    if started is not None:
+        REQUESTS_IN_FLIGHT.dec()
+        REQUEST_SECONDS.labels(request.endpoint or 'unknown').observe(time.perf_counter() - started)
+
 def cleanup_upload_folder():
     """Remove all files in the upload folder and recreate the directory."""
     try:
@@ -38,16 +221,52 @@ def cleanup_upload_folder():
         logger.error(f"Error cleaning up upload folder: {str(e)}")
         raise
 
+def upload_destination(path: str) -> str:
+    """Where an uploaded file is saved: its sanitized relative path inside the upload folder."""
+    return os.path.join(app.config['UPLOAD_FOLDER'], *sanitize_path(path).split('/'))
+
+def use_upload(tree: FolderTree):
+    """Make the upload the current folder; a lone archive is analyzed in place, member by member."""
+    global current_folder_path, upload_tree
+    folder = os.path.abspath(app.config['UPLOAD_FOLDER'])
+    archive = tree.single_archive()
+    if archive:
+        # The backend lists the archive's members for the tree view
+        current_folder_path = os.path.join(folder, archive)
+        upload_tree = None
+    else:
+        current_folder_path = folder
+        upload_tree = tree
+    logger.info(f"Stored folder path: {current_folder_path}")
+
+def analyze_current_folder() -> Response:
+    """Have the backend analyze the upload folder and relay its summary."""
+    logger.info("Sending folder path to backend for analysis")
+    response = call_backend(
+        "POST",
+        "/api/analyze-folder",
+        # The page loads documents, aggregates and the tree on demand,
+        # so only the summary comes back with the upload
+        params={"folder_path": current_folder_path, "include_documents": "false"},
+        **relay_options()
+    )
+
+    if response.status_code == 200:
+        logger.info("Successfully received analysis from backend")
+        return relay(response)
+    logger.error(f"Error from backend: {response.text}")
+    return jsonify({"error": "Failed to analyze folder"}), 500
+
 @app.route('/')
 def index():
     """Render the main page."""
     logger.info("Rendering index page")
-    return render_template('index.html')
+    return render_template('index.html', upload_chunk_size=upload_store.chunk_size)
 
 @app.route('/api/upload-folder', methods=['POST'])
 def upload_folder():
     """Handle folder upload and analysis."""
-    global current_folder_path
+    global upload_tree
     
     try:
         logger.info("Received upload request")
@@ -62,37 +281,184 @@ def upload_folder():
         
         # Clean up previous uploads
         cleanup_upload_folder()
+        response_cache.clear()
         
-        # Save all files
-        for file in files:
-            if file and file.filename:
-                filename = secure_filename(file.filename)
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(file_path)
-                logger.info(f"Saved file: {file_path}")
-        
-        # Store the absolute path of the upload folder
-        current_folder_path = os.path.abspath(app.config['UPLOAD_FOLDER'])
-        logger.info(f"Stored folder path: {current_folder_path}")
+        # Save all files where their relative paths put them, recording the tree on the way
+        upload_tree = None
+        tree = FolderTree()
+        with UPLOAD_SAVE_SECONDS.time():
+            for file in files:
+                if file and file.filename:
+                    relative_path = sanitize_path(file.filename)
+                    file_path = upload_destination(relative_path)
+                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                    file.save(file_path)
+                    tree.add(relative_path, os.path.getsize(file_path), time.time())
+                    UPLOADED_FILES.inc()
+                    logger.info(f"Saved file: {file_path}")
+        use_upload(tree)
         
-        # Send folder path to backend for analysis
-        logger.info("Sending folder path to backend for analysis")
-        response = requests.post(
-            f"{app.config['BACKEND_URL']}/api/analyze-folder",
-            params={"folder_path": current_folder_path}
-        )
-        
-        if response.status_code == 200:
-            logger.info("Successfully received analysis from backend")
-            return jsonify(response.json())
-        else:
-            logger.error(f"Error from backend: {response.text}")
-            return jsonify({"error": "Failed to analyze folder"}), 500
+        return analyze_current_folder()
             
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Error processing upload: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+# Chunked uploads: the page hashes the folder and sends a manifest of paths,
+# sizes and digests. The server fills the upload folder from its
+# content-addressed store and replies with the content it does not hold.
+# For each of those the page announces the file, sends the chunks the server
+# does not have yet (in parallel, retrying failed ones) and completes it;
+# finally it asks for the analysis. An interrupted upload resumes from the
+# confirmed chunks, and a repeated upload transfers only changed files.
+
+def sync_upload_folder(manifest) -> List[Dict]:
+    """Make the upload folder match a manifest from the store; returns the content still to upload.
+
+    Files already linked to the right content are left alone, so an
+    unchanged file keeps its inode and modification time. Files not in the
+    manifest are removed, as are files whose content is not stored yet.
+    """
+    folder = app.config['UPLOAD_FOLDER']
+    wanted = {os.path.normpath(upload_destination(entry.path)): entry for entry in manifest}
+    for root, _, names in os.walk(folder):
+        for name in names:
+            path = os.path.normpath(os.path.join(root, name))
+            if path not in wanted:
+                os.remove(path)
+    for root, _, _ in sorted(os.walk(folder), key=lambda item: len(item[0]), reverse=True):
+        if root != folder and not os.listdir(root):
+            os.rmdir(root)
+
+    missing: Dict[str, Dict] = {}
+    placements: Dict[str, List[str]] = {}
+    for destination, entry in wanted.items():
+        if upload_store.has(entry.digest):
+            if not upload_store.holds(entry.digest, destination):
+                upload_store.place(entry.digest, destination)
+            UPLOAD_SKIPPED_FILES.inc()
+            continue
+        if os.path.lexists(destination):
+            os.remove(destination)
+        placements.setdefault(entry.digest, []).append(destination)
+        upload = missing.setdefault(entry.digest, {"digest": entry.digest, "size": entry.size, "paths": []})
+        upload["paths"].append(entry.path)
+
+    with pending_placements_lock:
+        pending_placements.clear()
+        pending_placements.update(placements)
+    return list(missing.values())
+
+def place_upload(digest: str, path: Optional[str] = None):
+    """Put stored content at the paths the manifest wants it, and at ``path``."""
+    with pending_placements_lock:
+        destinations = pending_placements.pop(digest, [])
+    if path:
+        destinations.append(upload_destination(path))
+    for destination in dict.fromkeys(destinations):
+        upload_store.place(digest, destination)
+        UPLOADED_FILES.inc()
+
+@app.route('/api/uploads/preflight', methods=['POST'])
+def preflight_upload():
+    """Start a chunked folder upload from a manifest of ``{path, size, digest}`` entries.
+
+    Replies with the chunk size and, per content digest not in the store,
+    the paths that need it; everything else is already in the upload folder.
+    """
+    global upload_tree
+
+    try:
+        manifest = parse_manifest((request.get_json(silent=True) or {}).get('files'))
+        tree = FolderTree()
+        for entry in manifest:
+            tree.add(sanitize_path(entry.path), entry.size, entry.modified_at)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+        upload_tree = None
+        missing = sync_upload_folder(manifest)
+        use_upload(tree)
+        response_cache.clear()
+        logger.info(f"Upload preflight: {len(manifest)} files, {len(missing)} to transfer")
+        return jsonify({
+            "chunk_size": upload_store.chunk_size,
+            "files": len(manifest),
+            "missing": missing,
+            "missing_bytes": sum(upload["size"] for upload in missing)
+        })
+    except Exception as e:
+        logger.error(f"Error in upload preflight: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/uploads', methods=['POST'])
+def begin_file_upload():
+    """Announce content by size and chunked digest (and optionally the path to put it at).
+
+    Replies ``complete`` when the store already has the content (it is
+    placed without a transfer), otherwise with the upload id and the chunks
+    already received.
+    """
+    data = request.get_json(silent=True) or {}
+    path, digest, size = data.get('path'), data.get('digest'), data.get('size')
+    if not isinstance(digest, str) or not isinstance(size, int):
+        return jsonify({"error": "size and digest are required"}), 400
+    try:
+        upload = upload_store.begin(digest, size)
+        if upload["complete"]:
+            place_upload(upload["digest"], path)
+        return jsonify(upload)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error starting upload of {path or digest}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id: str, index: int):
+    """Store one chunk; the body is the raw bytes and X-Chunk-SHA256 their SHA-256."""
+    try:
+        received = upload_store.write_chunk(upload_id, index, request.get_data(), request.headers.get('X-Chunk-SHA256'))
+        UPLOAD_CHUNKS.inc()
+        return jsonify({"index": index, "received": received})
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error storing chunk {index} of {upload_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def complete_file_upload(upload_id: str):
+    """Verify a file's checksum once all chunks are in and place it in the upload folder."""
+    path = (request.get_json(silent=True) or {}).get('path')
+    try:
+        digest = upload_store.complete(upload_id)
+        place_upload(digest, path)
+        return jsonify({"complete": True, "digest": digest})
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error completing upload {upload_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/uploads/analyze', methods=['POST'])
+def analyze_uploaded_folder():
+    """Analyze the folder assembled by a chunked upload."""
+    if not current_folder_path:
+        return jsonify({"error": "No folder path available"}), 404
+    try:
+        return analyze_current_folder()
+    except Exception as e:
+        logger.error(f"Error analyzing upload: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/folder-insights')
 def get_folder_insights():
     """Get insights for the current folder."""
@@ -103,16 +469,7 @@ def get_folder_insights():
             return jsonify({"error": "No folder path available"}), 404
             
         logger.info(f"Getting insights for folder: {current_folder_path}")
-        response = requests.get(
-            f"{app.config['BACKEND_URL']}/api/folder-insights",
-            params={"folder_path": current_folder_path}
-        )
-        
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            logger.error(f"Error from backend: {response.text}")
-            return jsonify({"error": "Failed to get folder insights"}), 500
+        return proxy_get("/api/folder-insights", {"folder_path": current_folder_path}, "Failed to get folder insights")
             
     except Exception as e:
         logger.error(f"Error getting folder insights: {str(e)}")
@@ -128,26 +485,75 @@ def get_documents():
             return jsonify({"error": "No folder path available"}), 404
             
         logger.info(f"Getting documents for folder: {current_folder_path}")
-        response = requests.get(
-            f"{app.config['BACKEND_URL']}/api/documents",
-            params={"folder_path": current_folder_path}
-        )
-        
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            logger.error(f"Error from backend: {response.text}")
-            return jsonify({"error": "Failed to get documents"}), 500
+        return proxy_get("/api/documents", {"folder_path": current_folder_path}, "Failed to get documents")
             
     except Exception as e:
         logger.error(f"Error getting documents: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def proxy_folder_get(path: str, names: Tuple[str, ...], error_message: str) -> Response:
+    """Forward the named query arguments to a backend endpoint for the current folder."""
+    if not current_folder_path:
+        return jsonify({"error": "No folder path available"}), 404
+    params = {name: request.args[name] for name in names if name in request.args}
+    params["folder_path"] = current_folder_path
+    try:
+        return proxy_get(path, params, error_message)
+    except Exception as e:
+        logger.error(f"{error_message}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/documents/page')
+def get_documents_page():
+    """A window of the current folder's documents, for the virtualized document list."""
+    return proxy_folder_get(
+        "/api/snapshot/documents",
+        ("offset", "limit", "category", "file_type", "sort", "descending"),
+        "Failed to get documents"
+    )
+
+@app.route('/api/aggregates')
+def get_aggregates():
+    """Per-category or per-file-type totals of the current folder, for the charts."""
+    return proxy_folder_get("/api/snapshot/aggregates", ("by", "category", "file_type"), "Failed to get aggregates")
+
+@app.route('/api/size-distribution')
+def get_size_distribution():
+    """Document counts per file size bucket of the current folder."""
+    return proxy_folder_get("/api/snapshot/size-distribution", (), "Failed to get size distribution")
+
+@app.route('/api/folder-tree')
+def get_folder_tree():
+    """One level of the current folder's tree, fetched when a folder is expanded.
+
+    The tree recorded during the upload answers without touching the disk;
+    without one (e.g. after a restart) the backend lists the folder.
+    """
+    tree = upload_tree
+    if tree is None:
+        return proxy_folder_get("/api/folder-tree", ("path", "offset", "limit"), "Failed to get folder tree")
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', 200))
+    except ValueError:
+        return jsonify({"error": "offset and limit must be integers"}), 400
+    if offset < 0 or not 0 < limit <= 1000:
+        return jsonify({"error": "offset must be >= 0 and limit between 1 and 1000"}), 400
+    try:
+        return jsonify(tree.level(request.args.get('path', ''), offset, limit))
+    except KeyError:
+        return jsonify({"error": "Folder not found"}), 404
+
 @app.route('/health')
 def health_check():
     """Health check endpoint."""
     return jsonify({"status": "healthy"})
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics."""
+    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+
 @app.errorhandler(413)
 def request_entity_too_large(error):
     """Handle file size limit exceeded error."""
@@ -0,0 +1,120 @@
+"""Safe relative paths for uploaded files, and the folder tree of an upload.
+
+Browsers send each file of a folder upload with its path relative to the
+chosen folder (``Company B/Project 3/Project 3.docx``). ``sanitize_path``
+cleans every component on its own, so the hierarchy survives while ``..``,
+absolute paths, drive letters, control characters and reserved device names
+do not. ``FolderTree`` records the folders and files of an upload as they
+arrive, so the dashboard's tree view is served without walking the folder.
+"""
+import os
+import re
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# Longest file or folder name kept, in UTF-8 bytes (the limit of common filesystems)
+MAX_NAME_BYTES = 255
+# An upload of a single file with one of these extensions is analyzed as an archive
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tgz', '.tar.gz', '.tbz2', '.tar.bz2', '.txz', '.tar.xz')
+
+_SEPARATORS = re.compile(r'[\\/]+')
+_UNSAFE_CHARACTERS = re.compile(r'[\x00-\x1f\x7f<>:"|?*]')
+_RESERVED_NAMES = {'CON', 'PRN', 'AUX', 'NUL', *(f'COM{i}' for i in range(1, 10)), *(f'LPT{i}' for i in range(1, 10))}
+
+def sanitize_name(name: str) -> str:
+    """A file or folder name that is safe on disk; empty when nothing usable is left."""
+    name = _UNSAFE_CHARACTERS.sub('_', unicodedata.normalize('NFC', name)).strip().rstrip('.')
+    if not name.strip('.'):
+        return ''
+    if name.split('.')[0].upper() in _RESERVED_NAMES:
+        name = f'_{name}'
+    if len(name.encode('utf-8')) > MAX_NAME_BYTES:
+        stem, extension = os.path.splitext(name)
+        budget = MAX_NAME_BYTES - len(extension.encode('utf-8'))
+        name = stem.encode('utf-8')[:budget].decode('utf-8', 'ignore') + extension
+    return name
+
+def sanitize_path(path: str) -> str:
+    """A relative ``/``-separated path with every component sanitized.
+
+    Empty, ``.`` and ``..`` components are dropped, so the result never leaves
+    the folder it is joined to.
+    """
+    parts = [sanitize_name(part) for part in _SEPARATORS.split(path)]
+    parts = [part for part in parts if part]
+    if not parts:
+        raise ValueError(f"Unusable upload path {path!r}")
+    return '/'.join(parts)
+
+class _Folder:
+    __slots__ = ('subfolders', 'files')
+
+    def __init__(self):
+        self.subfolders = set()
+        self.files: Dict[str, tuple] = {}
+
+class FolderTree:
+    """The folders and files of an upload, keyed by sanitized relative path."""
+
+    def __init__(self):
+        self._folders: Dict[str, _Folder] = {'': _Folder()}
+
+    def _folder(self, path: str) -> _Folder:
+        folder = self._folders.get(path)
+        if folder is None:
+            parent, _, name = path.rpartition('/')
+            siblings = self._folder(parent)
+            if name in siblings.files:
+                raise ValueError(f"Upload path {path!r} is both a file and a folder")
+            siblings.subfolders.add(name)
+            folder = self._folders[path] = _Folder()
+        return folder
+
+    def add(self, path: str, size: int, modified_at: Optional[float] = None):
+        """Record a file; its folders are created as needed.
+
+        Raises ``ValueError`` when the path is already taken, which happens
+        when two upload paths sanitize to the same one.
+        """
+        parent, _, name = path.rpartition('/')
+        folder = self._folder(parent)
+        if name in folder.files or name in folder.subfolders:
+            raise ValueError(f"Upload path {path!r} occurs more than once")
+        folder.files[name] = (size, modified_at)
+
+    def single_archive(self) -> Optional[str]:
+        """The name of the upload's only file when it is an archive at the top level."""
+        root = self._folders['']
+        if root.subfolders or len(root.files) != 1:
+            return None
+        name = next(iter(root.files))
+        return name if name.lower().endswith(ARCHIVE_EXTENSIONS) else None
+
+    def level(self, path: str = '', offset: int = 0, limit: int = 200) -> Dict[str, Any]:
+        """One folder's subfolders and a page of its files, in the shape of the backend's /api/folder-tree."""
+        path = path.strip('/')
+        folder = self._folders.get(path)
+        if folder is None:
+            raise KeyError(path)
+        prefix = f'{path}/' if path else ''
+        names = sorted(folder.files, key=str.lower)
+        files = []
+        for name in names[offset:offset + limit]:
+            size, modified_at = folder.files[name]
+            files.append({
+                "name": name,
+                "size": size,
+                "file_type": os.path.splitext(name)[1][1:].upper(),
+                "modified_at": datetime.fromtimestamp(modified_at).isoformat() if modified_at is not None else None
+            })
+        return {
+            "path": path,
+            "folders": [
+                {"name": name, "path": prefix + name} for name in sorted(folder.subfolders, key=str.lower)
+            ],
+            "files": files,
+            "total_files": len(names),
+            "offset": offset,
+            "limit": limit
+        }
@@ -0,0 +1,229 @@
+"""Resumable, chunked uploads into a content-addressed store.
+
+A file is sent in fixed-size chunks that may arrive in any order and in
+parallel. Each chunk is checked against the SHA-256 the client sends with it,
+written at its offset in the upload's data file, and recorded by a marker
+file holding its digest, so a client that reconnects learns which chunks the
+server already has and sends only the rest.
+
+A file is identified by its chunked digest: the SHA-256 of the concatenated
+SHA-256 digests of its chunks. A browser computes it one chunk at a time
+without holding the file in memory, and the server checks it from the chunk
+markers without reading the file again. Completed files are stored once under
+that digest, so a file the store already holds is never transferred again.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Chunk size in bytes; part of the file digest, so the browser gets it from the server
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+# Unfinished uploads untouched for this many seconds are removed
+UPLOAD_SESSION_TTL = float(os.getenv('UPLOAD_SESSION_TTL', str(24 * 3600)))
+
+_DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+class ManifestEntry(NamedTuple):
+    """A file the client wants in the upload folder.
+
+    ``digest`` is the file's chunked digest (see ``chunked_digest``), not the
+    SHA-256 of its content; it depends on ``UPLOAD_CHUNK_SIZE``.
+    """
+    path: str
+    size: int
+    digest: str
+    modified_at: Optional[float] = None
+
+def parse_manifest(files: Any) -> List[ManifestEntry]:
+    """Validate an upload manifest: a list of ``{"path", "size", "digest"}`` objects.
+
+    ``digest`` is the hex SHA-256 of the concatenated raw SHA-256 digests of
+    the file's ``UPLOAD_CHUNK_SIZE`` chunks, in order; ``modified_at``
+    (seconds since the epoch) is optional.
+    """
+    if not isinstance(files, list):
+        raise ValueError("files must be a list")
+    entries = []
+    for position, item in enumerate(files):
+        if not isinstance(item, dict):
+            raise ValueError(f"files[{position}] must be an object")
+        path, size, digest = item.get('path'), item.get('size'), item.get('digest')
+        if not isinstance(path, str) or not path:
+            raise ValueError(f"files[{position}].path is required")
+        if not isinstance(size, int) or size < 0:
+            raise ValueError(f"files[{position}].size must be an integer >= 0")
+        if not isinstance(digest, str) or not _DIGEST.match(digest.lower()):
+            raise ValueError(f"files[{position}].digest must be 64 hexadecimal characters")
+        modified_at = item.get('modified_at')
+        if modified_at is not None and (isinstance(modified_at, bool) or not isinstance(modified_at, (int, float))):
+            raise ValueError(f"files[{position}].modified_at must be a number of seconds")
+        entries.append(ManifestEntry(path, size, digest.lower(), modified_at))
+    return entries
+
+def chunked_digest(chunk_digests: List[bytes]) -> str:
+    """The file digest for the given raw chunk digests, in order.
+
+    An empty file has no chunks, so its digest is the SHA-256 of no bytes.
+    """
+    return hashlib.sha256(b''.join(chunk_digests)).hexdigest()
+
+class UploadStore:
+    """Content-addressed file store fed by resumable chunked uploads.
+
+    Files live in ``<root>/blobs/<digest[:2]>/<digest>``; uploads in progress
+    in ``<root>/sessions/<digest>``. Uploads of the same content share one
+    session, so a reloaded page resumes where the previous one stopped.
+    """
+
+    def __init__(self, root: str, chunk_size: int = UPLOAD_CHUNK_SIZE, session_ttl: float = UPLOAD_SESSION_TTL):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.session_ttl = session_ttl
+        self.blob_dir = os.path.join(root, 'blobs')
+        self.session_dir = os.path.join(root, 'sessions')
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.session_dir, exist_ok=True)
+
+    def chunk_count(self, size: int) -> int:
+        return -(-size // self.chunk_size)
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def has(self, digest: str) -> bool:
+        return bool(_DIGEST.match(digest)) and os.path.exists(self.blob_path(digest))
+
+    def _session_path(self, upload_id: str) -> str:
+        if not _DIGEST.match(upload_id):
+            raise FileNotFoundError(f"Unknown upload {upload_id}")
+        return os.path.join(self.session_dir, upload_id)
+
+    def _load_session(self, upload_id: str) -> Dict[str, Any]:
+        path = self._session_path(upload_id)
+        try:
+            with open(os.path.join(path, 'session.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Unknown upload {upload_id}") from None
+
+    def _received(self, upload_id: str) -> List[int]:
+        path = self._session_path(upload_id)
+        return sorted(int(name[:-7]) for name in os.listdir(path) if name.endswith('.sha256'))
+
+    def begin(self, digest: str, size: int) -> Dict[str, Any]:
+        """Start or resume the upload of a file; ``complete`` is true when the store already has it."""
+        digest = digest.lower()
+        if not _DIGEST.match(digest):
+            raise ValueError("digest must be 64 hexadecimal characters")
+        if size < 0:
+            raise ValueError("size must be >= 0")
+        if self.has(digest):
+            return {"complete": True, "digest": digest}
+
+        self.expire_sessions()
+        path = self._session_path(digest)
+        session = {"digest": digest, "size": size, "chunk_size": self.chunk_size, "chunks": self.chunk_count(size)}
+        try:
+            existing = self._load_session(digest)
+        except FileNotFoundError:
+            existing = None
+        if existing is not None and existing != session:
+            # Same digest announced with another size or chunk size: start over
+            shutil.rmtree(path, ignore_errors=True)
+            existing = None
+        if existing is None:
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, 'data'), 'wb') as f:
+                f.truncate(size)
+            self._write_atomic(os.path.join(path, 'session.json'), json.dumps(session).encode())
+        else:
+            os.utime(path)
+        return dict(session, complete=False, upload_id=digest, received=self._received(digest))
+
+    def write_chunk(self, upload_id: str, index: int, data: bytes, checksum: str) -> int:
+        """Verify and store one chunk; returns how many chunks of the file the server now has."""
+        session = self._load_session(upload_id)
+        if not 0 <= index < session["chunks"]:
+            raise ValueError(f"Chunk index must be between 0 and {session['chunks'] - 1}")
+        offset = index * session["chunk_size"]
+        expected = min(session["chunk_size"], session["size"] - offset)
+        if len(data) != expected:
+            raise ValueError(f"Chunk {index} must be {expected} bytes, got {len(data)}")
+        digest = hashlib.sha256(data).hexdigest()
+        if digest != (checksum or '').lower():
+            raise ValueError(f"Checksum mismatch for chunk {index}")
+
+        path = self._session_path(upload_id)
+        fd = os.open(os.path.join(path, 'data'), os.O_WRONLY)
+        try:
+            os.pwrite(fd, data, offset)
+        finally:
+            os.close(fd)
+        # The marker is written after the data, so a recorded chunk is always on disk
+        self._write_atomic(os.path.join(path, f'{index}.sha256'), digest.encode())
+        return len(self._received(upload_id))
+
+    def complete(self, upload_id: str) -> str:
+        """Check the file digest and move the file into the store; returns its digest."""
+        session = self._load_session(upload_id)
+        path = self._session_path(upload_id)
+        missing = sorted(set(range(session["chunks"])) - set(self._received(upload_id)))
+        if missing:
+            raise ValueError(f"{len(missing)} chunks missing, first {missing[0]}")
+        chunk_digests = []
+        for index in range(session["chunks"]):
+            with open(os.path.join(path, f'{index}.sha256'), 'rb') as f:
+                chunk_digests.append(bytes.fromhex(f.read().decode()))
+        if chunked_digest(chunk_digests) != session["digest"]:
+            shutil.rmtree(path, ignore_errors=True)
+            raise ValueError("File checksum mismatch; the upload was discarded")
+
+        blob = self.blob_path(session["digest"])
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        if not os.path.exists(blob):
+            os.replace(os.path.join(path, 'data'), blob)
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Stored upload {session['digest']} ({session['size']} bytes)")
+        return session["digest"]
+
+    def holds(self, digest: str, path: str) -> bool:
+        """Whether ``path`` is a hard link to the stored file, so it cannot differ from it."""
+        try:
+            return os.path.samefile(self.blob_path(digest), path)
+        except OSError:
+            return False
+
+    def place(self, digest: str, destination: str):
+        """Put a stored file at ``destination``, as a hard link when the filesystem allows it."""
+        os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+        if os.path.lexists(destination):
+            os.remove(destination)
+        try:
+            os.link(self.blob_path(digest), destination)
+        except OSError:
+            shutil.copyfile(self.blob_path(digest), destination)
+
+    def expire_sessions(self):
+        """Remove unfinished uploads that have not been touched for ``session_ttl`` seconds."""
+        cutoff = time.time() - self.session_ttl
+        for entry in os.scandir(self.session_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes):
+        temporary = f'{path}.{threading.get_ident()}.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, path)
@@ -0,0 +1,23 @@
+"""gunicorn settings for running the APIs with several uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+    cd backend && gunicorn -c ../gunicorn.conf.py app:app
+
+Workers share results, analysis snapshots and job state through the SQLite
+store at SHARED_STORE_PATH, so they must run on the same host (or share that
+file on a local disk). On SIGTERM each worker stops accepting requests and
+gets DRAIN_TIMEOUT seconds to finish running analyses and ingestions.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count(), 4))))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Analyses of large folders run for minutes within one request
+timeout = int(os.getenv("WORKER_TIMEOUT", "900"))
+graceful_timeout = int(float(os.getenv("DRAIN_TIMEOUT", "30")))
+keepalive = 5
+# Models and clients are loaded per worker on first use (or with WARM_UP=true),
+# never in the master, so forked workers do not share connections or threads
+preload_app = False
@@ -0,0 +1,24 @@
+"""content hash
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # Content digest used to detect identical files across folders
+    op.add_column('documents', sa.Column('content_hash', sa.String(), nullable=True))
+    op.create_index('ix_document_content_hash', 'documents', ['content_hash'])
+
+def downgrade() -> None:
+    op.drop_index('ix_document_content_hash')
+    op.drop_column('documents', 'content_hash')
@@ -1,11 +1,33 @@
+import argparse
+import os
+
 import uvicorn
-from app.main import app
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    ) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the document analysis API")
+    parser.add_argument(
+        "--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")),
+        help="worker processes for production; 0 runs one process with auto-reload for development"
+    )
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    args = parser.parse_args()
+
+    if args.workers:
+        # Workers share results, snapshots and job state through the shared store
+        # (SHARED_STORE_PATH); shutdown waits DRAIN_TIMEOUT seconds for running work
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=args.port,
+            workers=args.workers,
+            timeout_graceful_shutdown=int(float(os.getenv("DRAIN_TIMEOUT", "30"))),
+            log_level="info"
+        )
+    else:
+        uvicorn.run(
+            "app.main:app",
+            host="0.0.0.0",
+            port=args.port,
+            reload=True,
+            log_level="info"
+        )
@@ -0,0 +1,95 @@
+import asyncio
+import functools
+import importlib.util
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+@pytest.fixture(scope="module")
+def backend(tmp_path_factory):
+    """backend/app.py, which imports its siblings as top-level modules, loaded as ``backend_app``."""
+    # Its siblings are the ``backend.*`` modules the app services import, so metrics register once
+    for name in os.listdir(BACKEND_DIR):
+        if name.endswith(".py") and name != "app.py":
+            sys.modules.setdefault(name[:-3], importlib.import_module(f"backend.{name[:-3]}"))
+    cwd = os.getcwd()
+    # The backend creates its cache and upload directories in the working directory
+    os.chdir(tmp_path_factory.mktemp("backend"))
+    try:
+        spec = importlib.util.spec_from_file_location("backend_app", os.path.join(BACKEND_DIR, "app.py"))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        os.chdir(cwd)
+    return module
+
+@pytest.fixture
+def jobs(backend, tmp_path, monkeypatch):
+    """run_analysis_job with a private shared store and snapshot directory, and a counting fake analysis."""
+    from backend import snapshots
+    from backend.shared_store import SharedStore
+
+    store = SharedStore(str(tmp_path / "shared.db"))
+    monkeypatch.setattr(backend, "get_shared_store", lambda: store)
+    monkeypatch.setattr(backend, "save_snapshot", functools.partial(snapshots.save_snapshot, directory=tmp_path))
+    monkeypatch.setattr(backend, "load_snapshot", functools.partial(snapshots.load_snapshot, directory=tmp_path))
+
+    calls = []
+
+    async def analyze(folder_path, profile=False):
+        calls.append(folder_path)
+        await asyncio.sleep(0.05)
+        documents = [{"filename": "a.txt", "file_type": "TXT", "size": 1, "classification": None}]
+        return {"total_documents": 1, "documents": documents}
+
+    monkeypatch.setattr(backend, "_analyze_folder", analyze)
+    return backend, store, calls
+
+def test_concurrent_requests_share_one_analysis(jobs, tmp_path):
+    backend, store, calls = jobs
+    folder = str(tmp_path / "folder")
+
+    async def run_twice():
+        return await asyncio.gather(backend.run_analysis_job(folder), backend.run_analysis_job(folder))
+
+    first, second = asyncio.run(run_twice())
+
+    assert calls == [folder]
+    assert first is second
+    assert first.summary["total_documents"] == 1
+    assert backend.analysis_jobs == {}
+    assert store.lease_owner(f"analysis:{os.path.abspath(folder)}") is None
+
+def test_jobs_in_one_worker_hold_the_lease_under_their_own_names(jobs, tmp_path, monkeypatch):
+    backend, store, calls = jobs
+    monkeypatch.setattr(backend, "ANALYSIS_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(backend, "ANALYSIS_WAIT_TIMEOUT", 0.1)
+    lease = f"analysis:{os.path.abspath(str(tmp_path / 'folder'))}"
+    # Held by this worker but not by the new job, so the job waits for the holder's snapshot
+    assert store.acquire(lease, 30)
+    with pytest.raises(backend.HTTPException) as error:
+        asyncio.run(backend.run_analysis_job(str(tmp_path / "folder")))
+    assert error.value.status_code == 504
+    assert calls == []
+    assert store.lease_owner(lease) == backend.worker_id()
+
+def test_unchanged_folder_is_served_from_its_snapshot(jobs, tmp_path):
+    backend, store, calls = jobs
+    folder = tmp_path / "folder"
+    folder.mkdir()
+    (folder / "a.txt").write_text("alpha")
+
+    async def insights():
+        fingerprint = await backend.get_folder_fingerprint(str(folder))
+        return await backend.run_analysis_job(str(folder), fingerprint)
+
+    asyncio.run(backend.run_analysis_job(str(folder)))
+    asyncio.run(insights())
+    assert len(calls) == 1
+
+    (folder / "b.txt").write_text("beta")
+    asyncio.run(insights())
+    assert len(calls) == 2
@@ -0,0 +1,85 @@
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from backend.archives import ArchiveError, ArchiveLimitError, ArchiveReader, archive_level, is_archive
+
+def make_zip(path, members):
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return str(path)
+
+def make_tar(path, members):
+    with tarfile.open(path, "w:gz") as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return str(path)
+
+@pytest.mark.parametrize("make, name", [(make_zip, "docs.zip"), (make_tar, "docs.tar.gz")])
+def test_read_members(tmp_path, make, name):
+    path = make(tmp_path / name, {"a.txt": b"alpha", "sub/b.txt": b"beta"})
+
+    assert is_archive(path)
+    reader = ArchiveReader(path)
+    assert [(member.name, member.size) for member in reader.members()] == [("a.txt", 5), ("sub/b.txt", 4)]
+    assert {member.name: data for member, data in reader.read_members()} == {"a.txt": b"alpha", "sub/b.txt": b"beta"}
+
+def test_members_leaving_the_archive_are_dropped(tmp_path):
+    path = make_zip(tmp_path / "evil.zip", {"../escape.txt": b"x", "/abs/ok.txt": b"y", "./dot.txt": b"z"})
+    assert [member.name for member in ArchiveReader(path).members()] == ["abs/ok.txt", "dot.txt"]
+
+@pytest.mark.parametrize("make, name", [(make_zip, "many.zip"), (make_tar, "many.tar.gz")])
+def test_member_count_limit(tmp_path, make, name):
+    path = make(tmp_path / name, {f"{i}.txt": b"x" for i in range(3)})
+    assert len(ArchiveReader(path, max_members=3).members()) == 3
+    with pytest.raises(ArchiveLimitError, match="more than 2 members"):
+        ArchiveReader(path, max_members=2).members()
+
+@pytest.mark.parametrize("make, name", [(make_zip, "big.zip"), (make_tar, "big.tar.gz")])
+def test_member_size_limit(tmp_path, make, name):
+    path = make(tmp_path / name, {"small.txt": b"x", "big.txt": b"y" * 100})
+    with pytest.raises(ArchiveLimitError, match="big.txt is larger than 99 bytes"):
+        ArchiveReader(path, max_member_size=99).members()
+
+def test_total_size_limit(tmp_path):
+    path = make_zip(tmp_path / "total.zip", {"a.txt": b"x" * 60, "b.txt": b"y" * 60})
+    assert len(ArchiveReader(path, max_total_size=120).members()) == 2
+    with pytest.raises(ArchiveLimitError, match="expands to more than 100 bytes"):
+        ArchiveReader(path, max_total_size=100).members()
+    # Nothing is decompressed when the declared sizes exceed the limits
+    with pytest.raises(ArchiveLimitError):
+        list(ArchiveReader(path, max_total_size=100).read_members())
+
+def test_compression_ratio_limit(tmp_path):
+    path = make_zip(tmp_path / "bomb.zip", {"zeros.bin": bytes(2 * 1024 * 1024)})
+    with pytest.raises(ArchiveLimitError, match="suspicious compression ratio"):
+        ArchiveReader(path).members()
+    assert len(ArchiveReader(path, max_ratio=10000).members()) == 1
+
+def test_damaged_archive(tmp_path):
+    path = tmp_path / "broken.zip"
+    path.write_bytes(b"not an archive")
+    with pytest.raises(ArchiveError):
+        ArchiveReader(str(path))
+
+    truncated = tmp_path / "truncated.tar.gz"
+    make_tar(truncated, {"a.txt": b"alpha" * 1000})
+    truncated.write_bytes(truncated.read_bytes()[:40])
+    with pytest.raises(ArchiveError):
+        list(ArchiveReader(str(truncated)).read_members())
+
+def test_archive_level(tmp_path):
+    path = make_zip(tmp_path / "tree.zip", {"b.txt": b"b", "A.txt": b"a", "sub/c.txt": b"c"})
+    members = ArchiveReader(path).members()
+
+    level = archive_level(members)
+    assert level["folders"] == [{"name": "sub", "path": "sub"}]
+    assert [member.name for member in level["files"]] == ["A.txt", "b.txt"]
+    assert [member.name for member in archive_level(members, "sub")["files"]] == ["sub/c.txt"]
+    with pytest.raises(KeyError):
+        archive_level(members, "missing")
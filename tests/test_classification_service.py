@@ -0,0 +1,42 @@
+import asyncio
+
+from app.models.document import DocumentType
+from app.services.classification_service import ClassificationService
+from app.services.result_cache import AsyncResultCache, content_key
+
+REPORT = "Quarterly report: revenue grew and the team is pleased with the results.\n"
+
+def test_analyze_folder_returns_every_document(tmp_path):
+    (tmp_path / "notes").mkdir()
+    (tmp_path / "notes" / "report.txt").write_text(REPORT)
+    (tmp_path / "copy.txt").write_text(REPORT)
+    # PNG signature and IHDR chunk of a 1x1 image, enough for libmagic
+    (tmp_path / "image.png").write_bytes(
+        b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde"
+    )
+
+    service = ClassificationService(result_cache=AsyncResultCache())
+    # A cached analysis of the text keeps the spaCy model out of the test; it is
+    # only found when the service reads the file from the analyzed folder
+    analysis = {
+        "classification": {"type": "Report", "sentiment": "Positive", "confidence": 0.9},
+        "method": "spacy",
+        "sentiment_score": 0.6,
+        "subjectivity": 0.4
+    }
+    service.result_cache.put(content_key(REPORT, service.model_version), analysis)
+
+    result = asyncio.run(service.analyze_folder(str(tmp_path)))
+
+    assert result["total_documents"] == 3
+    by_path = {doc["path"]: doc for doc in result["documents"]}
+    assert set(by_path) == {"notes/report.txt", "copy.txt", "image.png"}
+    assert by_path["notes/report.txt"]["file_type"] == DocumentType.TXT.value
+    assert by_path["notes/report.txt"]["classification"]["type"] == "Report"
+    assert by_path["copy.txt"]["classification"]["type"] == "Report"
+    assert by_path["image.png"]["classification"]["type"] == DocumentType.PNG.value
+    assert result["sentiment_distribution"]["Positive"] == 2
+
+def test_analyze_folder_reports_missing_folder(tmp_path):
+    service = ClassificationService(result_cache=AsyncResultCache())
+    assert asyncio.run(service.analyze_folder(str(tmp_path / "missing"))) == {"error": "Folder not found"}
@@ -0,0 +1,57 @@
+import asyncio
+import os
+
+import pytest
+
+from backend import file_scanner
+from backend.file_scanner import scan_directory, scan_directory_async
+
+@pytest.fixture
+def tree(tmp_path):
+    for i in range(200):
+        directory = tmp_path / f"dir{i:03d}"
+        directory.mkdir()
+        (directory / "file.txt").write_text("x")
+    return tmp_path
+
+@pytest.fixture
+def scanned(monkeypatch):
+    """Count the directories the scanner has read, with a queue of two batches."""
+    monkeypatch.setattr(file_scanner, "SCAN_QUEUE_SIZE", 2)
+    paths = []
+    scandir = os.scandir
+
+    def counting_scandir(path):
+        paths.append(path)
+        return scandir(path)
+
+    monkeypatch.setattr(file_scanner.os, "scandir", counting_scandir)
+    return paths
+
+def test_small_queue_still_yields_every_entry(tree, scanned):
+    entries = list(scan_directory(str(tree)))
+    assert sum(not entry.is_dir for entry in entries) == 200
+    assert len(scanned) == 201
+
+def test_slow_consumer_holds_the_scan_back(tree, scanned):
+    async def consume():
+        found = []
+        async for entry in scan_directory_async(str(tree), workers=2, include_dirs=False):
+            if not found:
+                # While the consumer is busy the scanner only fills its queues
+                await asyncio.sleep(0.3)
+                reads_while_busy = len(scanned)
+            found.append(entry)
+        return found, reads_while_busy
+
+    found, reads_while_busy = asyncio.run(consume())
+    assert len(found) == 200
+    assert reads_while_busy < 20
+
+def test_consumer_can_stop_early(tree, scanned):
+    async def first_entry():
+        async for entry in scan_directory_async(str(tree), workers=2):
+            return entry
+
+    assert asyncio.run(asyncio.wait_for(first_entry(), timeout=5)) is not None
+    assert next(iter(scan_directory(str(tree), workers=2))) is not None
@@ -0,0 +1,20 @@
+import os
+
+from app.models.document import DocumentType
+from app.services.file_types import detect_file_type
+
+# PNG signature and IHDR chunk of a 1x1 image, enough for libmagic
+PNG = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde"
+
+def test_file_changed_in_place_is_detected_again(tmp_path):
+    path = tmp_path / "upload.bin"
+    path.write_text("Plain text notes.\n")
+    assert detect_file_type(str(path)) == DocumentType.TXT
+
+    modified_at = path.stat().st_mtime_ns
+    path.write_bytes(PNG)
+    os.utime(path, ns=(modified_at + 10 ** 9, modified_at + 10 ** 9))
+    assert detect_file_type(str(path)) == DocumentType.PNG
+
+def test_missing_file_falls_back_to_the_extension(tmp_path):
+    assert detect_file_type(str(tmp_path / "missing.docx")) == DocumentType.DOCX
@@ -0,0 +1,69 @@
+import pickle
+
+import numpy as np
+
+from backend.local_classifier import LocalClassifier, evaluate, hash_terms, load_examples, load_local_classifier
+
+TEXTS = {
+    "Invoice": [
+        "Invoice number {i}: amount due within thirty days, payment to the bank account below.",
+        "Please pay invoice {i}; the total amount due includes tax and shipping charges.",
+        "Payment reminder for invoice {i}, the outstanding amount due is overdue."
+    ],
+    "Contract": [
+        "This agreement {i} is entered into by the parties; the contractor shall deliver the services.",
+        "The parties agree that this contract {i} terminates upon written notice and governing law applies.",
+        "Clause {i}: the supplier shall indemnify the client under the terms of this agreement."
+    ]
+}
+
+def examples():
+    texts, labels = [], []
+    for label, templates in TEXTS.items():
+        for i in range(10):
+            for template in templates:
+                texts.append(template.format(i=i))
+                labels.append(label)
+    return texts, labels
+
+def test_hash_terms_is_stable():
+    indices, values = hash_terms("Amount due, amount due!", 1024)
+    assert np.all(indices < 1024)
+    assert np.array_equal(indices, np.unique(indices))
+    assert np.array_equal(hash_terms("Amount due, amount due!", 1024)[0], indices)
+    assert len(hash_terms("12 -- 34", 1024)[0]) == 0
+
+def test_train_predict_and_save_round_trip(tmp_path):
+    texts, labels = examples()
+    model = LocalClassifier.train(texts, labels, n_features=4096)
+
+    assert model.labels == ["Contract", "Invoice"]
+    label, probability = model.predict("Final invoice: the amount due must be paid to our bank account.")
+    assert label == "Invoice" and probability > 0.5
+    assert model.predict("The contractor and the client are parties to this agreement.")[0] == "Contract"
+    assert evaluate(model, texts, labels, threshold=0.0)["accuracy"] == 1.0
+
+    path = tmp_path / "models" / "local_classifier.npz"
+    model.save(path)
+    loaded = load_local_classifier(path)
+    assert loaded.labels == model.labels and loaded.n_features == 4096
+    for text in texts[:5]:
+        assert np.allclose(loaded.probabilities(text), model.probabilities(text))
+
+def test_load_local_classifier_without_model(tmp_path):
+    assert load_local_classifier(tmp_path / "missing.npz") is None
+    broken = tmp_path / "broken.npz"
+    broken.write_bytes(b"not a model")
+    assert load_local_classifier(broken) is None
+
+def test_load_examples_from_cache(tmp_path):
+    entries = [{"category": "Invoice", "text": f"invoice {i}"} for i in range(3)]
+    entries += [{"category": "invoice", "text": "lowercase invoice"}, {"category": "Memo", "text": "memo"}]
+    entries += [{"category": "Invoice"}, {"category": "No subject", "text": "empty"}]
+    for i, entry in enumerate(entries):
+        with open(tmp_path / f"{i}.pkl", "wb") as f:
+            pickle.dump(entry, f)
+
+    texts, labels = load_examples(tmp_path, min_examples=2)
+    assert sorted(texts) == ["invoice 0", "invoice 1", "invoice 2", "lowercase invoice"]
+    assert set(labels) == {"Invoice"}
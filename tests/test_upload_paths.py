@@ -0,0 +1,58 @@
+import pytest
+
+from frontend.upload_paths import FolderTree, sanitize_path
+
+def test_sanitize_path_keeps_the_hierarchy():
+    assert sanitize_path("Company B/Project 3/Project 3.docx") == "Company B/Project 3/Project 3.docx"
+    assert sanitize_path("notes\\2024\\plan.txt") == "notes/2024/plan.txt"
+
+@pytest.mark.parametrize("path, expected", [
+    ("../../etc/passwd", "etc/passwd"),
+    ("reports/../../secret.txt", "reports/secret.txt"),
+    ("./a/./b.txt", "a/b.txt"),
+    ("/etc/passwd", "etc/passwd"),
+    ("//server/share/file.txt", "server/share/file.txt"),
+    ("C:\\Users\\me\\file.txt", "C_/Users/me/file.txt"),
+])
+def test_sanitize_path_never_leaves_the_folder(path, expected):
+    assert sanitize_path(path) == expected
+
+def test_sanitize_path_renames_reserved_names():
+    assert sanitize_path("logs/CON.txt") == "logs/_CON.txt"
+    assert sanitize_path("a<b>.txt") == "a_b_.txt"
+
+@pytest.mark.parametrize("path", ["", "/", "..", "../..", "./.", "\\\\"])
+def test_sanitize_path_rejects_paths_without_a_name(path):
+    with pytest.raises(ValueError):
+        sanitize_path(path)
+
+def test_folder_tree_level():
+    tree = FolderTree()
+    tree.add("b.txt", 2)
+    tree.add("docs/a.txt", 1, 0.0)
+    tree.add("A.txt", 3)
+
+    level = tree.level()
+    assert [folder["path"] for folder in level["folders"]] == ["docs"]
+    assert [file["name"] for file in level["files"]] == ["A.txt", "b.txt"]
+    assert tree.level("docs/")["files"][0]["size"] == 1
+    assert tree.single_archive() is None
+    with pytest.raises(KeyError):
+        tree.level("missing")
+
+def test_single_archive():
+    tree = FolderTree()
+    tree.add("export.tar.gz", 10)
+    assert tree.single_archive() == "export.tar.gz"
+
+@pytest.mark.parametrize("first, second", [
+    ("docs/plan.txt", "docs/./plan.txt"),
+    ("docs/a?.txt", "docs/a*.txt"),
+    ("docs", "docs/plan.txt"),
+    ("docs/plan.txt", "docs"),
+])
+def test_folder_tree_rejects_paths_that_sanitize_to_one(first, second):
+    tree = FolderTree()
+    tree.add(sanitize_path(first), 1)
+    with pytest.raises(ValueError):
+        tree.add(sanitize_path(second), 2)
@@ -0,0 +1,66 @@
+import hashlib
+
+import pytest
+
+from frontend.upload_store import ManifestEntry, UploadStore, chunked_digest, parse_manifest
+
+CHUNK_SIZE = 4
+
+def file_digest(data: bytes) -> str:
+    chunks = [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+    return chunked_digest([hashlib.sha256(chunk).digest() for chunk in chunks])
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def test_write_chunk_rejects_checksum_mismatch(tmp_path):
+    store = UploadStore(str(tmp_path), chunk_size=CHUNK_SIZE)
+    data = b"abcdefghij"
+    upload = store.begin(file_digest(data), len(data))
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        store.write_chunk(upload["upload_id"], 0, b"abcd", sha256(b"abcx"))
+    with pytest.raises(ValueError, match="must be 4 bytes"):
+        store.write_chunk(upload["upload_id"], 0, b"abc", sha256(b"abc"))
+
+    # A rejected chunk is not recorded
+    assert store.begin(file_digest(data), len(data))["received"] == []
+
+def test_begin_resumes_from_received_chunks(tmp_path):
+    store = UploadStore(str(tmp_path), chunk_size=CHUNK_SIZE)
+    data = b"abcdefghij"
+    digest = file_digest(data)
+    upload = store.begin(digest, len(data))
+    assert upload["chunks"] == 3 and upload["received"] == []
+
+    store.write_chunk(upload["upload_id"], 2, b"ij", sha256(b"ij"))
+    store.write_chunk(upload["upload_id"], 0, b"abcd", sha256(b"abcd"))
+    with pytest.raises(ValueError, match="1 chunks missing"):
+        store.complete(upload["upload_id"])
+
+    # A reconnecting client learns which chunks the server already has
+    resumed = store.begin(digest, len(data))
+    assert resumed["upload_id"] == upload["upload_id"]
+    assert resumed["received"] == [0, 2]
+
+    store.write_chunk(resumed["upload_id"], 1, b"efgh", sha256(b"efgh"))
+    assert store.complete(resumed["upload_id"]) == digest
+    with open(store.blob_path(digest), "rb") as f:
+        assert f.read() == data
+    assert store.begin(digest, len(data)) == {"complete": True, "digest": digest}
+
+def test_complete_discards_upload_with_wrong_file_digest(tmp_path):
+    store = UploadStore(str(tmp_path), chunk_size=CHUNK_SIZE)
+    upload = store.begin(file_digest(b"abcd"), 4)
+    store.write_chunk(upload["upload_id"], 0, b"wxyz", sha256(b"wxyz"))
+
+    with pytest.raises(ValueError, match="File checksum mismatch"):
+        store.complete(upload["upload_id"])
+    assert store.begin(file_digest(b"abcd"), 4)["received"] == []
+
+def test_parse_manifest_reads_the_chunked_digest():
+    digest = file_digest(b"abcdefghij")
+    entries = parse_manifest([{"path": "a.txt", "size": 10, "digest": digest.upper()}])
+    assert entries == [ManifestEntry("a.txt", 10, digest)]
+    with pytest.raises(ValueError, match=r"files\[0\]\.digest"):
+        parse_manifest([{"path": "a.txt", "size": 10, "sha256": digest}])